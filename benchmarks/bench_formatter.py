@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Micro-benchmark de la mise en forme des tweets (coût par tweet)
+
+Compare l'ancien _format_tweet_text (trois str.replace, deux re.sub non
+compilés, coupe du HTML final) au formateur en une passe de
+publisher/formatter.py, sur les textes des réponses enregistrées et sur des
+tweets synthétiques (courts, longs, à tronquer), ainsi que le rendu servi par
+le cache (RenderCache: diffusion vers un autre canal, republication).
+
+    python benchmarks/bench_formatter.py [--number 20000]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(ROOT), 'src'))
+
+# Variables requises par config.Settings (aucune connexion n'est ouverte)
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:benchmark')
+os.environ.setdefault('TELEGRAM_CHANNEL_ID', '@benchmark')
+os.environ.setdefault('LOG_LEVEL', 'warning')
+
+from publisher.formatter import (
+    CAPTION_LIMIT, DEFAULT_MESSAGE_TEMPLATE, TEXT_LIMIT, RenderCache, format_tweet
+)
+
+def legacy_format(tweet: Dict[str, Any]) -> str:
+    """_format_tweet_text avant le formateur en une passe"""
+    text = tweet['text']
+    text = text.replace('&', '&amp;')
+    text = text.replace('<', '&lt;')
+    text = text.replace('>', '&gt;')
+
+    import re
+    text = re.sub(r'@(\w+)', r'<a href="https://twitter.com/\1">@\1</a>', text)
+    text = re.sub(r'#(\w+)', r'<a href="https://twitter.com/hashtag/\1">#\1</a>', text)
+
+    formatted = f"""🐦 <b>{tweet['author_name']}</b> (@{tweet['author']})
+
+{text}"""
+
+    if any([tweet.get('likes'), tweet.get('retweets'), tweet.get('replies')]):
+        stats = []
+        if tweet.get('likes'):
+            stats.append(f"❤️ {tweet['likes']}")
+        if tweet.get('retweets'):
+            stats.append(f"🔄 {tweet['retweets']}")
+        if tweet.get('replies'):
+            stats.append(f"💬 {tweet['replies']}")
+        formatted += f"\n\n{' • '.join(stats)}"
+
+    date_str = tweet['created_at'].strftime('%d/%m/%Y %H:%M')
+    formatted += f"""
+
+📅 {date_str}
+🔗 <a href="{tweet['url']}">Tweet original</a>"""
+
+    if len(formatted) > CAPTION_LIMIT:
+        formatted = formatted[:CAPTION_LIMIT - 3] + "..."
+
+    return formatted
+
+def _full_texts(node: Any) -> Iterator[str]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'full_text' and isinstance(value, str):
+                yield value
+            else:
+                yield from _full_texts(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _full_texts(value)
+
+def make_tweet(text: str) -> Dict[str, Any]:
+    return {
+        'id': str(abs(hash(text))),
+        'text': text,
+        'author': 'example_user',
+        'author_name': 'Example User',
+        'created_at': datetime(2025, 10, 1, 12, 30),
+        'url': 'https://twitter.com/example_user/status/1972731170581872912',
+        'likes': 1234,
+        'retweets': 56,
+        'replies': 7,
+    }
+
+def corpora() -> Dict[str, List[Dict[str, Any]]]:
+    with open(os.path.join(ROOT, 'fixtures', 'twitter241_user_tweets.json'), encoding='utf-8') as f:
+        recorded = list(dict.fromkeys(_full_texts(json.load(f))))
+
+    sentence = ("Nouvelle version 🚀 avec @example_dev et @team_ops: détails sur https://t.co/AbCdEf123 "
+                "#release #python & <notes> ")
+    return {
+        'enregistrés': [make_tweet(text) for text in recorded],
+        'courts (280)': [make_tweet((sentence * 3)[:280])],
+        'longs (4000)': [make_tweet((sentence * 40)[:4000])],
+    }
+
+def bench(func, tweets: List[Dict[str, Any]], number: int) -> float:
+    """Microsecondes par tweet (meilleure de 5 mesures)"""
+    def run():
+        for tweet in tweets:
+            func(tweet)
+    best = min(timeit.repeat(run, number=number, repeat=5))
+    return best / (number * len(tweets)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help="passes sur chaque corpus")
+    args = parser.parse_args()
+
+    render_cache = RenderCache()
+    candidates = {
+        'ancien (légende)': legacy_format,
+        'une passe (légende, 1024)': lambda tweet: format_tweet(tweet, CAPTION_LIMIT),
+        'une passe (message, 4096)': lambda tweet: format_tweet(tweet, TEXT_LIMIT),
+        'cache (légende, 1024)': lambda tweet: render_cache.render(tweet, DEFAULT_MESSAGE_TEMPLATE, CAPTION_LIMIT),
+    }
+
+    print(f"{'corpus':<16}" + ''.join(f"{name:>28}" for name in candidates))
+    for corpus, tweets in corpora().items():
+        number = max(1, args.number // len(tweets))
+        timings = [bench(func, tweets, number) for func in candidates.values()]
+        print(f"{corpus:<16}" + ''.join(f"{timing:>25.2f} µs" for timing in timings))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Benchmark du décodage JSON des réponses Twitter241
+
+Compare json, orjson et msgspec (décodage complet) au décodage partiel des
+timelines, sur debug_user_info.json et une timeline /user-tweets synthétique
+construite sur le même modèle.
+
+    python benchmarks/bench_json_decode.py [--tweets 20] [--iterations 200]
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+# La configuration exige un bot Telegram, inutile ici
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'benchmark')
+os.environ.setdefault('TELEGRAM_CHANNEL_ID', '@benchmark')
+
+from config import settings
+from utils import json_codec
+from scraper.twitter241_scraper import Twitter241Scraper
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+def load_user_info() -> dict:
+    with open(os.path.join(ROOT, 'debug_user_info.json')) as f:
+        return json.load(f)
+
+def build_timeline(user_info: dict, count: int) -> dict:
+    """Timeline /user-tweets au format GraphQL de Twitter241, du plus récent au plus ancien"""
+    user_result = user_info['result']['data']['user']['result']
+    entries = []
+    base_id = 1800000000000000000
+
+    for i in range(count):
+        tweet_id = str(base_id + (count - i) * 1000)
+        tweet = {
+            '__typename': 'Tweet',
+            'rest_id': tweet_id,
+            'core': {'user_results': {'result': copy.deepcopy(user_result)}},
+            'views': {'count': str(1000 + i), 'state': 'EnabledWithCount'},
+            'legacy': {
+                'created_at': 'Tue Sep 30 10:53:24 +0000 2025',
+                'conversation_id_str': tweet_id,
+                'full_text': f"Tweet numéro {i} avec un lien https://t.co/abc{i} et des #hashtags " * 3,
+                'favorite_count': i * 3,
+                'retweet_count': i,
+                'reply_count': i // 2,
+                'lang': 'fr',
+                'entities': {
+                    'hashtags': [{'indices': [10, 19], 'text': 'hashtags'}],
+                    'urls': [{'url': f'https://t.co/abc{i}', 'expanded_url': 'https://example.com'}],
+                    'media': [{
+                        'type': 'photo',
+                        'media_url_https': f'https://pbs.twimg.com/media/{tweet_id}.jpg',
+                        'original_info': {'width': 1200, 'height': 675}
+                    }]
+                }
+            }
+        }
+        entries.append({
+            'entryId': f'tweet-{tweet_id}',
+            'sortIndex': tweet_id,
+            'content': {
+                'entryType': 'TimelineTimelineItem',
+                '__typename': 'TimelineTimelineItem',
+                'itemContent': {
+                    'itemType': 'TimelineTweet',
+                    'tweet_results': {'result': tweet},
+                    'tweetDisplayType': 'Tweet'
+                }
+            }
+        })
+
+    return {
+        'result': {
+            'timeline': {
+                'instructions': [
+                    {'type': 'TimelineClearCache'},
+                    {'type': 'TimelineAddEntries', 'entries': entries}
+                ]
+            }
+        }
+    }
+
+def measure(func, body, iterations: int):
+    """Temps médian (ms) et pic mémoire (Ko) d'un décodage"""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(body)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    result = func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    return statistics.median(timings), peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    user_info = load_user_info()
+    user_body = json.dumps(user_info).encode()
+    timeline = build_timeline(user_info, args.tweets)
+    timeline_body = json.dumps(timeline).encode()
+    newest_id = timeline['result']['timeline']['instructions'][1]['entries'][1]['sortIndex']
+
+    decoders = {'json': json.loads}
+    if orjson:
+        decoders['orjson'] = orjson.loads
+    if msgspec:
+        decoders['msgspec'] = msgspec.json.Decoder().decode
+
+    scraper = Twitter241Scraper()
+    parse_cases = {
+        # Décodage + parsing d'une vérification sans curseur (premier passage)
+        'complet + parse (tout)': lambda body: scraper._parse_tweets(json_codec.loads(body), 'bench'),
+        # Régime permanent: un seul nouveau tweet avant le curseur
+        'complet + parse (1 nouveau)': lambda body: scraper._parse_tweets(json_codec.loads(body), 'bench', newest_id),
+    }
+    if msgspec:
+        settings.json_partial_decode = True
+        parse_cases['partiel + parse (tout)'] = lambda body: scraper._parse_tweets(json_codec.decode_timeline(body), 'bench')
+        parse_cases['partiel + parse (1 nouveau)'] = lambda body: scraper._parse_tweets(
+            json_codec.decode_timeline(body), 'bench', newest_id)
+
+    print(f"Décodeur actif: {json_codec.BACKEND}")
+    print(f"user_info: {len(user_body) / 1024:.1f} Ko, timeline: {len(timeline_body) / 1024:.1f} Ko "
+          f"({args.tweets} tweets)\n")
+
+    print(f"{'cas':<38}{'médiane (ms)':>14}{'pic (Ko)':>12}")
+    for label, body, cases in (
+        ('user_info', user_body, decoders),
+        ('timeline', timeline_body, decoders),
+        ('timeline', timeline_body, parse_cases),
+    ):
+        for name, func in cases.items():
+            median, peak = measure(func, body, args.iterations)
+            print(f"{label + ' / ' + name:<38}{median:>14.3f}{peak:>12.1f}")
+
+if __name__ == '__main__':
+    main()
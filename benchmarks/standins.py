@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Serveurs locaux remplaçant les APIs externes pendant les benchmarks
+
+Un seul serveur aiohttp, lancé dans un processus séparé pour ne pas fausser
+les mesures du bot:
+
+- /twitter241/user-tweets, /twitter135/v2/UserTweets/, /rss/{username} et
+  /nitter/{username} servent les réponses enregistrées de benchmarks/fixtures,
+  avec les IDs de tweets et le nom d'utilisateur réécrits pour chaque compte
+- /media/{index}/{cdn}/{path} remplace les CDN de Twitter (pbs.twimg.com,
+  video.twimg.com): contenu différent pour chaque compte et chaque média
+- /bot{token}/{method} imite le Bot API Telegram (getMe, sendMessage,
+  sendPhoto, sendVideo, sendAnimation, sendMediaGroup), y compris les
+  uploads de fichiers et les file_id renvoyés
+- /stats renvoie le nombre d'appels reçus par route
+
+Le compte n° i s'appelle bench{i:05d}; sa timeline contient TIMELINE_SIZE
+tweets dont les IDs (tweet_id(i, rang), rang 0 = le plus récent) ne
+dépendent que de i, ce qui permet au benchmark de placer le curseur.
+
+    python benchmarks/standins.py --port 8081 [--api-latency 50] [--telegram-latency 30]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Nom du compte dans les réponses enregistrées
+RECORDED_USERNAME = 'example_user'
+
+# CDN des médias dans les réponses enregistrées, servis par /media
+MEDIA_HOSTS = {'https://pbs.twimg.com': 'pbs', 'https://video.twimg.com': 'video'}
+PHOTO_SIZE = 100 * 1024
+VIDEO_SIZE = 2 * 1024 * 1024
+
+TWEET_ID_BASE = 1_900_000_000_000_000_000
+TWITTER_ID_BASE = 10_000_000
+
+def bench_username(index: int) -> str:
+    return f"bench{index:05d}"
+
+def bench_twitter_id(index: int) -> str:
+    return str(TWITTER_ID_BASE + index)
+
+class Fixture:
+    """Réponse enregistrée, réécrite pour chaque compte"""
+
+    def __init__(self, filename: str, content_type: str, id_pattern: str):
+        with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+            self.body = f.read()
+        self.content_type = content_type
+        # IDs des tweets enregistrés, du plus récent au plus ancien
+        self.tweet_ids = list(dict.fromkeys(re.findall(id_pattern, self.body)))
+        self._pattern = re.compile('|'.join(map(re.escape, self.tweet_ids + [RECORDED_USERNAME, *MEDIA_HOSTS])))
+
+    def render(self, index: int, media_base: str) -> str:
+        mapping = {recorded: tweet_id(index, rank) for rank, recorded in enumerate(self.tweet_ids)}
+        mapping[RECORDED_USERNAME] = bench_username(index)
+        mapping.update({host: f"{media_base}/{index}/{cdn}" for host, cdn in MEDIA_HOSTS.items()})
+        return self._pattern.sub(lambda match: mapping[match.group(0)], self.body)
+
+FIXTURES = {
+    'twitter241': Fixture('twitter241_user_tweets.json', 'application/json', r'"entryId": "tweet-(\d+)"'),
+    'twitter135': Fixture('twitter135_user_tweets.json', 'application/json', r'"entryId": "tweet-(\d+)"'),
+    'rss': Fixture('rss_feed.xml', 'application/rss+xml', r'/status/(\d+)'),
+    'nitter': Fixture('nitter_timeline.html', 'text/html', r'/status/(\d+)'),
+}
+
+TIMELINE_SIZE = len(FIXTURES['twitter241'].tweet_ids)
+assert all(len(fixture.tweet_ids) == TIMELINE_SIZE for fixture in FIXTURES.values()), \
+    "Les fixtures doivent contenir le même nombre de tweets"
+
+def tweet_id(index: int, rank: int) -> str:
+    """ID du tweet de rang `rank` (0 = le plus récent) du compte n° index"""
+    return str(TWEET_ID_BASE + index * 1000 + TIMELINE_SIZE - rank)
+
+def _account_index(username: str) -> int:
+    if not username.startswith('bench') or not username[5:].isdigit():
+        raise web.HTTPNotFound(text=f"Compte inconnu: {username}")
+    return int(username[5:])
+
+class StandInApp:
+    def __init__(self, api_latency: float = 0.0, telegram_latency: float = 0.0,
+                 failing: Iterable[str] = ()):
+        self.api_latency = api_latency
+        self.telegram_latency = telegram_latency
+        self.failing = set(failing)
+        self.calls: Counter = Counter()
+        self.chats: Dict[str, int] = {}
+        self.message_id = 0
+        self.file_count = 0
+        self.filler = os.urandom(VIDEO_SIZE)
+
+    def build(self) -> web.Application:
+        # Uploads de médias: jusqu'à la limite du Bot API (50 Mo par fichier, 10 par album)
+        app = web.Application(client_max_size=512 * 1024 * 1024)
+        app.router.add_get('/twitter241/user-tweets', self.twitter241)
+        app.router.add_get('/twitter135/v2/UserTweets/', self.twitter135)
+        app.router.add_get('/rss/{username}', self.rss)
+        app.router.add_get('/nitter/{username}', self.nitter)
+        app.router.add_get('/media/{index}/{cdn}/{path:.+}', self.media)
+        app.router.add_post('/bot{token}/{method}', self.telegram)
+        app.router.add_get('/stats', self.stats)
+        return app
+
+    async def _serve_fixture(self, request: web.Request, source: str, index: int) -> web.Response:
+        self.calls[source] += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        if source in self.failing:
+            return web.Response(status=503, text="Service Unavailable")
+        fixture = FIXTURES[source]
+        return web.Response(text=fixture.render(index, f"{request.url.origin()}/media"), content_type=fixture.content_type)
+
+    async def twitter241(self, request: web.Request) -> web.Response:
+        user_id = request.query.get('user', '')
+        if not user_id.isdigit():
+            raise web.HTTPBadRequest(text="Paramètre user manquant")
+        return await self._serve_fixture(request, 'twitter241', int(user_id) - TWITTER_ID_BASE)
+
+    async def twitter135(self, request: web.Request) -> web.Response:
+        return await self._serve_fixture(request, 'twitter135', _account_index(request.query.get('username', '')))
+
+    async def rss(self, request: web.Request) -> web.Response:
+        return await self._serve_fixture(request, 'rss', _account_index(request.match_info['username']))
+
+    async def nitter(self, request: web.Request) -> web.Response:
+        return await self._serve_fixture(request, 'nitter', _account_index(request.match_info['username']))
+
+    async def media(self, request: web.Request) -> web.Response:
+        """Média factice: en-tête propre à l'URL, puis octets aléatoires"""
+        self.calls['media'] += 1
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        path = request.match_info['path']
+        size = VIDEO_SIZE if path.endswith(('.mp4', '.m3u8')) else PHOTO_SIZE
+        body = hashlib.sha256(request.path.encode()).digest() + self.filler[:size - 32]
+        return web.Response(body=body, content_type='video/mp4' if size == VIDEO_SIZE else 'image/jpeg')
+
+    def _file(self, media_input, data) -> dict:
+        """Fichier Telegram d'un média envoyé (upload, file_id ou URL)"""
+        if isinstance(media_input, str) and media_input.startswith('attach://'):
+            media_input = data.get(media_input[len('attach://'):])
+        if isinstance(media_input, web.FileField):
+            media_input = media_input.file.read()
+        if isinstance(media_input, (bytes, bytearray)):
+            # Partie multipart sans nom de fichier: lue directement en octets
+            self.calls['telegram.upload'] += 1
+            self.calls['telegram.upload_bytes'] += len(media_input)
+        elif isinstance(media_input, str) and media_input.startswith('bench_file_'):
+            self.calls['telegram.file_id_reused'] += 1
+            return {'file_id': media_input, 'file_unique_id': media_input[len('bench_file_'):],
+                    'width': 1, 'height': 1, 'duration': 1}
+        self.file_count += 1
+        return {'file_id': f"bench_file_{self.file_count}", 'file_unique_id': str(self.file_count),
+                'width': 1, 'height': 1, 'duration': 1}
+
+    def _message(self, chat_id: str, media_type: Optional[str] = None, media_input=None, data=None) -> dict:
+        if chat_id not in self.chats:
+            self.chats[chat_id] = -1001000000000 - len(self.chats)
+        self.message_id += 1
+        message = {
+            'message_id': self.message_id,
+            'date': int(time.time()),
+            'chat': {'id': self.chats[chat_id], 'type': 'channel', 'title': chat_id}
+        }
+        if media_type:
+            file = self._file(media_input, data)
+            message[media_type] = [file] if media_type == 'photo' else file
+        return message
+
+    async def telegram(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        self.calls[f"telegram.{method}"] += 1
+        data = await request.post()
+        if self.telegram_latency:
+            await asyncio.sleep(self.telegram_latency)
+
+        chat_id = data.get('chat_id', '')
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Benchmark', 'username': 'benchmark_bot'}
+        elif method == 'sendMediaGroup':
+            media = json.loads(data.get('media', '[]'))
+            result = [self._message(chat_id, item['type'], item['media'], data) for item in media]
+        elif method == 'sendMessage':
+            result = self._message(chat_id)
+        elif method in ('sendPhoto', 'sendVideo', 'sendAnimation'):
+            media_type = method[len('send'):].lower()
+            result = self._message(chat_id, media_type, data.get(media_type), data)
+        else:
+            return web.json_response({'ok': False, 'error_code': 404, 'description': 'Not Found'}, status=404)
+
+        return web.json_response({'ok': True, 'result': result})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.calls))
+
+async def serve(port: int = 0, ready=None, **options):
+    """Démarrer le serveur et le garder actif (ready reçoit le port choisi)"""
+    runner = web.AppRunner(StandInApp(**options).build(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    if ready is not None:
+        ready.put(port)
+    else:
+        print(f"Stand-ins à l'écoute sur http://127.0.0.1:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+def _run(ready, options):
+    asyncio.run(serve(ready=ready, **options))
+
+class StandIns:
+    """Serveur de remplacement dans un processus enfant (gestionnaire de contexte)"""
+
+    def __init__(self, api_latency: float = 0.0, telegram_latency: float = 0.0,
+                 failing: Optional[List[str]] = None):
+        self.options = {'api_latency': api_latency, 'telegram_latency': telegram_latency,
+                        'failing': list(failing or [])}
+        self.process: Optional[multiprocessing.Process] = None
+        self.base_url = ''
+
+    def __enter__(self) -> "StandIns":
+        ready = multiprocessing.Queue()
+        self.process = multiprocessing.Process(target=_run, args=(ready, self.options), daemon=True)
+        self.process.start()
+        self.base_url = f"http://127.0.0.1:{ready.get(timeout=30)}"
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.process:
+            self.process.terminate()
+            self.process.join(timeout=5)
+
+    def environment(self) -> Dict[str, str]:
+        """Variables d'environnement pointant le bot vers ce serveur"""
+        return {
+            'TELEGRAM_API_URL': f"{self.base_url}/bot",
+            'TWITTER241_BASE_URL': f"{self.base_url}/twitter241",
+            'TWITTER135_BASE_URL': f"{self.base_url}/twitter135",
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--api-latency', type=float, default=0, help="ms ajoutées aux réponses des APIs")
+    parser.add_argument('--telegram-latency', type=float, default=0, help="ms ajoutées aux réponses Telegram")
+    parser.add_argument('--fail', action='append', default=[], choices=sorted(FIXTURES),
+                        help="source répondant 503 (répétable)")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.port, api_latency=args.api_latency / 1000,
+                      telegram_latency=args.telegram_latency / 1000, failing=args.fail))
+
+if __name__ == '__main__':
+    main()
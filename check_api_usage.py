@@ -3,16 +3,20 @@
 import asyncio
 from datetime import datetime
 from src.models import db
+from src.config import settings
 
 async def check_usage():
     await db.connect()
     
-    # Compter les requêtes d'aujourd'hui
+    # Requêtes Twitter241 du mois (journal api_requests, UTC)
     query = """
-    SELECT COUNT(*) as count, MIN(created_at) as first_req, MAX(created_at) as last_req
+    SELECT COUNT(*) as count, MIN(created_at) as first_req, MAX(created_at) as last_req,
+           COUNT(*) FILTER (WHERE created_at::date = CURRENT_DATE) as today
     FROM api_requests
-    WHERE api_name = 'Twitter241' AND DATE(created_at) = CURRENT_DATE
+    WHERE api_name = 'twitter241' AND status > 0
+      AND created_at >= date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
     """
+    monthly_quota = settings.provider_rate_limits.get('twitter241', {}).get('monthly_quota', 100)
     
     try:
         async with db.pool.acquire() as conn:
@@ -26,14 +30,23 @@ async def check_usage():
             
             if not table_exists:
                 print("⚠️  La table api_requests n'existe pas encore")
-                print("   Le tracking des requêtes API n'est pas encore implémenté")
+                print("   Elle est créée au premier démarrage du bot")
             else:
                 result = await conn.fetchrow(query)
-                print(f"📊 Utilisation API Twitter241 aujourd'hui ({datetime.now().date()}):")
-                print(f"   Requêtes: {result['count']}/100")
+                print(f"📊 Utilisation API Twitter241 ce mois-ci ({datetime.now():%Y-%m}):")
+                print(f"   Requêtes: {result['count']}/{monthly_quota:.0f}")
+                print(f"   Aujourd'hui: {result['today']}")
                 if result['first_req']:
                     print(f"   Première requête: {result['first_req']}")
                     print(f"   Dernière requête: {result['last_req']}")
+                
+                # Autres APIs journalisées
+                usage = await db.get_monthly_api_usage()
+                others = {name: count for name, count in usage.items() if name != 'twitter241'}
+                if others:
+                    print("\n🌐 Autres APIs ce mois-ci:")
+                    for name, count in sorted(others.items()):
+                        print(f"   {name}: {count}")
     
     except Exception as e:
         print(f"Erreur: {e}")
@@ -45,7 +58,7 @@ async def check_usage():
     """)
     
     print(f"\n📤 Tweets publiés aujourd'hui: {published_today}")
-    print("   (Chaque publication = ~2 requêtes API: user info + tweets)")
+    print("   (Chaque vérification = 1 requête API, + 1 requête unique par compte pour résoudre son ID)")
     
     # Total global
     total_published = await db.get_published_tweets_count()
@@ -58,6 +71,6 @@ if __name__ == "__main__":
     print("=" * 50)
     asyncio.run(check_usage())
     print("\n💡 Conseil: Avec 100 requêtes/mois, vous pouvez:")
-    print("   - Vérifier ~50 fois (2 requêtes par vérification)")
-    print("   - Soit environ 1-2 vérifications par jour")
-    print("   - Configurez un intervalle de poll plus long (ex: 12h)")
\ No newline at end of file
+    print("   - Vérifier ~100 fois (1 requête par vérification une fois l'ID connu)")
+    print("   - Soit environ 3 vérifications par jour")
+    print("   - Configurez un intervalle de poll plus long (ex: 8h)")
\ No newline at end of file
@@ -26,7 +26,7 @@ async def show_accounts():
     else:
         for i, acc in enumerate(accounts, 1):
             print(f"\n{i}. @{acc['username']}")
-            print(f"   → Canal: {acc['telegram_channel_id']}")
+            print(f"   → Canaux: {', '.join(acc['channels']) or 'aucun'}")
             print(f"   → Actif: {'✅' if acc['is_active'] else '❌'}")
             if acc['last_tweet_id']:
                 print(f"   → Dernier tweet: {acc['last_tweet_id']}")
@@ -38,14 +38,18 @@ async def show_accounts():
     active_accounts = len([a for a in accounts if a['is_active']])
     checks_per_day = 3  # Depuis .env
     
-    # Chaque vérification = 1 requête user info + 1 requête tweets
-    requests_per_check = active_accounts * 2
+    # Chaque vérification = 1 requête tweets; l'ID utilisateur n'est résolu
+    # (1 requête user info) qu'une fois puis conservé dans twitter_accounts.twitter_id.
+    # Un compte suivi par plusieurs canaux n'est récupéré qu'une fois par vérification.
+    unresolved_ids = len([a for a in accounts if a['is_active'] and not a['twitter_id']])
+    requests_per_check = active_accounts
     daily_requests = requests_per_check * checks_per_day
-    monthly_requests = daily_requests * 30
+    monthly_requests = daily_requests * 30 + unresolved_ids
     
     print(f"Comptes actifs: {active_accounts}")
     print(f"Vérifications/jour: {checks_per_day}")
     print(f"Requêtes/vérification: {requests_per_check}")
+    print(f"IDs à résoudre (1 requête unique chacun): {unresolved_ids}")
     print(f"Requêtes/jour: {daily_requests}")
     print(f"Requêtes/mois: {monthly_requests}")
     
@@ -55,7 +59,7 @@ async def show_accounts():
         print(f"   Utilisation prévue: {monthly_requests} requêtes/mois")
         
         # Recommandations
-        max_accounts = 100 // (2 * checks_per_day * 30)
+        max_accounts = 100 // (checks_per_day * 30)
         print(f"\n💡 Recommandations:")
         print(f"   - Maximum {max_accounts} comptes avec 3 checks/jour")
         print(f"   - Ou réduire à 1-2 vérifications/jour")
@@ -109,6 +113,19 @@ async def add_multiple_accounts():
     
     await db.disconnect()
 
+async def unsubscribe_channel(username: str, channel: str):
+    """Retirer un canal des abonnements d'un compte"""
+    await db.connect()
+    
+    username = username.lstrip('@')
+    
+    if await db.remove_subscription(username, channel):
+        print(f"✅ {channel} ne reçoit plus les tweets de @{username}")
+    else:
+        print(f"❌ Abonnement @{username} → {channel} non trouvé")
+    
+    await db.disconnect()
+
 async def toggle_account(username: str, active: bool):
     """Activer/désactiver un compte"""
     await db.connect()
@@ -142,7 +159,8 @@ async def main():
         print("2. Ajouter plusieurs comptes")
         print("3. Désactiver un compte")
         print("4. Réactiver un compte")
-        print("5. Quitter")
+        print("5. Retirer un canal d'un compte")
+        print("6. Quitter")
         
         choice = input("\nChoix: ").strip()
         
@@ -159,6 +177,11 @@ async def main():
             if username:
                 await toggle_account(username, True)
         elif choice == '5':
+            username = input("Username (@): ").strip()
+            channel = input("Canal à retirer: ").strip()
+            if username and channel:
+                await unsubscribe_channel(username, channel)
+        elif choice == '6':
             print("👋 Au revoir!")
             break
         else:
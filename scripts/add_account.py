@@ -58,7 +58,7 @@ async def add_account(username: str, channel_id: str):
         accounts = await db.get_active_accounts()
         logger.info(f"\nComptes surveillés ({len(accounts)}):")
         for acc in accounts:
-            logger.info(f"  - @{acc['username']} -> {acc['telegram_channel_id']}")
+            logger.info(f"  - @{acc['username']} -> {', '.join(acc['channels'])}")
         
     except Exception as e:
         logger.error(f"Erreur ajout compte: {e}")
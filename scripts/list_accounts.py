@@ -28,7 +28,7 @@ async def list_accounts():
         
         for account in accounts:
             logger.info(f"Username: @{account['username']}")
-            logger.info(f"  Canal Telegram: {account['telegram_channel_id']}")
+            logger.info(f"  Canaux Telegram: {', '.join(account['channels']) or 'aucun'}")
             logger.info(f"  Twitter ID: {account['twitter_id'] or 'Non vérifié'}")
             logger.info(f"  Actif: {'✓' if account['is_active'] else '✗'}")
             logger.info(f"  Dernier tweet: {account['last_tweet_id'] or 'Aucun'}")
@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from dotenv import load_dotenv
@@ -28,14 +28,114 @@ class Settings(BaseSettings):
     
     # Redis
     redis_url: str = Field("redis://localhost:6379", env="REDIS_URL")
+    use_redis: bool = Field(True, env="USE_REDIS")  # Sinon état partagé en mémoire
     
     # Application
     environment: str = Field("development", env="ENVIRONMENT")
     log_level: str = Field("info", env="LOG_LEVEL")
     poll_interval: int = Field(300, env="POLL_INTERVAL")  # secondes
     max_tweet_age: int = Field(3600, env="MAX_TWEET_AGE")  # secondes
-    workers: int = Field(1, env="WORKERS")
-    
+    workers: int = Field(1, env="WORKERS")  # Nombre de processus bot se partageant les comptes
+    worker_id: int = Field(0, env="WORKER_ID")  # Index de ce processus (0 à WORKERS-1)
+
+    # Cycle concurrent
+    concurrent_cycle: bool = Field(False, env="CONCURRENT_CYCLE")
+    max_concurrent_accounts: int = Field(10, env="MAX_CONCURRENT_ACCOUNTS")
+    backend_concurrency: Dict[str, int] = Field(
+        default_factory=lambda: {"twscrape": 4, "twitter241": 2, "twitter135": 2, "rss": 8, "nitter": 4},
+        env="BACKEND_CONCURRENCY"
+    )  # JSON, appels simultanés par fournisseur (clés de provider_rate_limits)
+
+    # Vérification adaptative (intervalle propre à chaque compte)
+    adaptive_polling: bool = Field(False, env="ADAPTIVE_POLLING")
+    min_poll_interval: int = Field(120, env="MIN_POLL_INTERVAL")  # secondes
+    max_poll_interval: int = Field(86400, env="MAX_POLL_INTERVAL")  # secondes
+    tweets_per_poll: float = Field(1.0, env="TWEETS_PER_POLL")  # nouveaux tweets visés par vérification
+    posting_history_days: int = Field(14, env="POSTING_HISTORY_DAYS")
+    scheduler_resync_interval: int = Field(600, env="SCHEDULER_RESYNC_INTERVAL")  # secondes
+
+    # Cache de déduplication (LRU + filtre de Bloom devant published_tweets)
+    dedup_lru_size: int = Field(10000, env="DEDUP_LRU_SIZE")
+    dedup_bloom_capacity: int = Field(200000, env="DEDUP_BLOOM_CAPACITY")
+    dedup_bloom_error_rate: float = Field(0.001, env="DEDUP_BLOOM_ERROR_RATE")
+
+    # Client HTTP partagé par les scrapers
+    http_timeout: int = Field(30, env="HTTP_TIMEOUT")  # secondes, requête complète
+    http_connect_timeout: int = Field(10, env="HTTP_CONNECT_TIMEOUT")  # secondes
+    http_pool_size: int = Field(100, env="HTTP_POOL_SIZE")
+    http_pool_per_host: int = Field(10, env="HTTP_POOL_PER_HOST")
+    http_dns_ttl: int = Field(300, env="HTTP_DNS_TTL")  # secondes
+    http_keepalive: int = Field(30, env="HTTP_KEEPALIVE")  # secondes
+
+    # Limites de débit par fournisseur (JSON): requêtes/seconde, rafale, quota mensuel
+    provider_rate_limits: Dict[str, Dict[str, float]] = Field(
+        default_factory=lambda: {
+            "twitter241": {"rate": 0.5, "burst": 1, "monthly_quota": 100},
+            "twitter135": {"rate": 0.5, "burst": 1},
+            "twitterapi_io": {"rate": 5, "burst": 5},
+            "rss": {"rate": 2, "burst": 4},
+            "nitter": {"rate": 1, "burst": 2},
+        },
+        env="PROVIDER_RATE_LIMITS"
+    )
+    default_retry_after: int = Field(60, env="DEFAULT_RETRY_AFTER")  # secondes, si 429 sans Retry-After
+    rss_validators_size: int = Field(5000, env="RSS_VALIDATORS_SIZE")  # flux RSS dont l'ETag / Last-Modified est gardé
+
+    # Journal des requêtes API (table api_requests) et régulation du quota mensuel
+    api_ledger_flush_interval: int = Field(30, env="API_LEDGER_FLUSH_INTERVAL")  # secondes
+    api_ledger_batch_size: int = Field(200, env="API_LEDGER_BATCH_SIZE")
+    api_ledger_retention_days: int = Field(90, env="API_LEDGER_RETENTION_DAYS")
+    quota_governor: bool = Field(True, env="QUOTA_GOVERNOR")
+    quota_reserve: int = Field(5, env="QUOTA_RESERVE")  # requêtes gardées pour résoudre les nouveaux comptes
+    quota_max_slowdown: float = Field(8.0, env="QUOTA_MAX_SLOWDOWN")  # facteur max appliqué à l'intervalle
+
+    # Disjoncteur par fournisseur / instance (Nitter, RSS, APIs)
+    circuit_failure_threshold: int = Field(3, env="CIRCUIT_FAILURE_THRESHOLD")  # échecs consécutifs
+    circuit_failure_rate: float = Field(0.5, env="CIRCUIT_FAILURE_RATE")  # sur les 20 dernières requêtes
+    circuit_reset_timeout: int = Field(300, env="CIRCUIT_RESET_TIMEOUT")  # secondes avant nouvelle tentative
+    circuit_max_reset_timeout: int = Field(3600, env="CIRCUIT_MAX_RESET_TIMEOUT")  # secondes
+
+    # Requêtes couvertes (CheapAPIScraper): lancer le fournisseur suivant si le précédent tarde
+    hedged_requests: bool = Field(False, env="HEDGED_REQUESTS")
+    hedge_delay: float = Field(3.0, env="HEDGE_DELAY")  # secondes, tant que la latence n'est pas mesurée
+    hedge_percentile: float = Field(95, env="HEDGE_PERCENTILE")  # percentile de latence servant de délai
+
+    # Décodage JSON des réponses API
+    json_decoder: str = Field("auto", env="JSON_DECODER")  # auto, orjson, msgspec ou json
+    json_partial_decode: bool = Field(True, env="JSON_PARTIAL_DECODE")  # timelines Twitter241 (msgspec)
+
+    # File d'envoi Telegram (limites documentées par Telegram)
+    telegram_global_rate: float = Field(30, env="TELEGRAM_GLOBAL_RATE")  # messages/seconde, tous chats
+    telegram_chat_rate: float = Field(20, env="TELEGRAM_CHAT_RATE")  # messages/minute par canal ou groupe
+    telegram_chat_burst: int = Field(3, env="TELEGRAM_CHAT_BURST")
+    telegram_max_retries: int = Field(3, env="TELEGRAM_MAX_RETRIES")  # nouvelles tentatives après un RetryAfter
+    delivery_max_attempts: int = Field(5, env="DELIVERY_MAX_ATTEMPTS")  # cycles tentant d'envoyer un tweet à un canal en échec
+
+    # Cache des médias (téléchargés et uploadés une fois, file_id réutilisé)
+    media_cache: bool = Field(True, env="MEDIA_CACHE")
+    media_cache_dir: str = Field("data/cache", env="MEDIA_CACHE_DIR")
+    media_cache_max_mb: int = Field(1024, env="MEDIA_CACHE_MAX_MB")
+    media_upload_max_mb: int = Field(50, env="MEDIA_UPLOAD_MAX_MB")  # limite d'upload du Bot API
+    media_album_max_mb: int = Field(20, env="MEDIA_ALBUM_MAX_MB")  # octets d'un album lus en mémoire (au-delà: par URL)
+    media_upload_concurrency: int = Field(2, env="MEDIA_UPLOAD_CONCURRENCY")  # uploads de fichiers simultanés
+    media_prefetch: bool = Field(True, env="MEDIA_PREFETCH")
+    media_prefetch_concurrency: int = Field(4, env="MEDIA_PREFETCH_CONCURRENCY")  # téléchargements anticipés simultanés
+    media_prefetch_lookahead: int = Field(3, env="MEDIA_PREFETCH_LOOKAHEAD")  # tweets d'avance sur la publication
+
+    # Mise en forme des messages: gabarits par canal (JSON {canal: gabarit}) et cache des rendus
+    telegram_templates: Dict[str, str] = Field(default_factory=dict, env="TELEGRAM_TEMPLATES")
+    render_cache_size: int = Field(512, env="RENDER_CACHE_SIZE")  # messages rendus gardés en mémoire
+
+    # Threads: auto-réponses regroupées, ancêtres manquants récupérés (backends avec recherche par ID)
+    thread_max_depth: int = Field(20, env="THREAD_MAX_DEPTH")  # niveaux d'ancêtres récupérés au plus
+    thread_fetch_concurrency: int = Field(4, env="THREAD_FETCH_CONCURRENCY")
+    thread_cache_size: int = Field(5000, env="THREAD_CACHE_SIZE")  # tweets gardés entre les cycles
+
+    # Points d'accès des APIs (serveur Bot API local, bancs d'essai)
+    telegram_api_url: str = Field("https://api.telegram.org/bot", env="TELEGRAM_API_URL")
+    twitter241_base_url: str = Field("https://twitter241.p.rapidapi.com", env="TWITTER241_BASE_URL")
+    twitter135_base_url: str = Field("https://twitter135.p.rapidapi.com", env="TWITTER135_BASE_URL")
+
     # Features
     enable_media: bool = Field(True, env="ENABLE_MEDIA")
     enable_threads: bool = Field(True, env="ENABLE_THREADS")
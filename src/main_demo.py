@@ -2,19 +2,18 @@
 """Version de démonstration du bot pour tester sans authentification Twitter"""
 import asyncio
 import signal
-import sys
-from typing import Dict, List, Set
-from datetime import datetime, timedelta
-
 import sys
 import os
+from typing import Dict, Set
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from config import settings
 from utils.logger import get_logger
+from utils.http_client import http_client
 from scraper.simple_scraper import SimpleTwitterScraper
 from publisher import TelegramPublisher
-from models import db
+from models import db, Tweet
 
 logger = get_logger(__name__)
 
@@ -50,16 +49,49 @@ class TwitterTelegramBotDemo:
         if self.scraper:
             await self.scraper.__aexit__(None, None, None)
         
+        # Arrêter la file d'envoi Telegram
+        if self.publisher:
+            await self.publisher.close()
+        
+        # Fermer la session HTTP partagée par les scrapers
+        await http_client.close()
+        
         await db.disconnect()
         logger.info("Bot arrêté proprement")
     
+    async def retry_pending_deliveries(self, account: Dict):
+        """Renvoyer les tweets déjà publiés aux canaux abonnés qui ne les ont pas reçus"""
+        pending = await db.get_pending_deliveries(account['id'], settings.delivery_max_attempts)
+        if not pending:
+            return
+        
+        logger.info(f"[DEMO] Nouvel essai de {len(pending)} envoi(s) en attente pour @{account['username']}")
+        deliveries: Dict[str, Dict[str, int]] = {}
+        try:
+            await self.publisher.publish_pending(
+                [(Tweet.from_json(row['tweet_data']), row['channel_id']) for row in pending],
+                deliveries
+            )
+        finally:
+            await db.record_delivery_attempts([
+                (row['tweet_id'], row['channel_id'], deliveries.get(row['tweet_id'], {}).get(row['channel_id']))
+                for row in pending
+            ])
+    
     async def process_account(self, account: Dict):
         """Traiter un compte Twitter"""
         username = account['username']
-        channel_id = account['telegram_channel_id']
+        channels = account['channels']
         last_tweet_id = account['last_tweet_id']
         
+        if not channels:
+            logger.debug(f"@{username} n'a aucun abonnement actif")
+            return
+        
         try:
+            # Canaux en échec lors des cycles précédents (tweets déjà publiés ailleurs)
+            await self.retry_pending_deliveries(account)
+            
             logger.info(f"[DEMO] Vérification des tweets de @{username}")
             
             async with self.scraper:
@@ -76,42 +108,39 @@ class TwitterTelegramBotDemo:
             
             logger.info(f"[DEMO] {len(tweets)} tweets de démonstration pour @{username}")
             
-            # Traiter les tweets
-            for tweet in tweets:
-                tweet_id = tweet['id']
-                
-                # Vérifier si déjà publié
-                if await db.is_tweet_published(tweet_id):
-                    logger.debug(f"Tweet {tweet_id} déjà publié")
-                    continue
-                
-                # Publier sur Telegram
-                logger.info(f"[DEMO] Publication du tweet {tweet_id} de @{username}")
-                
-                telegram_msg_id = await self.publisher.publish_tweet(
-                    tweet=tweet,
-                    channel_id=channel_id
-                )
+            # Du plus ancien au plus récent, sans les tweets déjà publiés (une seule requête)
+            unpublished = set(await db.filter_unpublished([tweet['id'] for tweet in tweets]))
+            to_publish = [tweet for tweet in reversed(tweets) if tweet['id'] in unpublished]
+            if not to_publish:
+                logger.debug(f"Tous les tweets de @{username} sont déjà publiés")
+                return
+            
+            # Publier sur Telegram, vers tous les canaux abonnés
+            logger.info(f"[DEMO] Publication de {len(to_publish)} tweet(s) de @{username} "
+                        f"vers {len(channels)} canal(aux)")
+            deliveries: Dict[str, Dict[str, int]] = {}
+            try:
+                await self.publisher.publish_to_channels([[tweet] for tweet in to_publish], channels, deliveries)
+            finally:
+                # Un tweet reçu par au moins un canal est publié; les canaux en échec restent en attente
+                published_rows = []
+                for tweet in to_publish:
+                    delivered = deliveries.get(tweet['id'])
+                    if not delivered:
+                        logger.error(f"Échec publication tweet {tweet['id']}")
+                        continue
+                    channel_id = next(channel for channel in channels if channel in delivered)
+                    published_rows.append({
+                        'tweet_id': tweet['id'],
+                        'telegram_message_id': delivered[channel_id],
+                        'channel_id': channel_id,
+                        'channels': {channel: delivered.get(channel) for channel in channels},
+                        'tweet_data': tweet
+                    })
+                    logger.info(f"✅ Tweet {tweet['id']} publié avec succès")
                 
-                if telegram_msg_id:
-                    # Enregistrer dans la base de données
-                    await db.add_published_tweet(
-                        tweet_id=tweet_id,
-                        account_id=account['id'],
-                        telegram_message_id=telegram_msg_id,
-                        channel_id=channel_id,
-                        tweet_data=tweet
-                    )
-                    
-                    # Mettre à jour le dernier tweet traité
-                    await db.update_last_tweet_id(account['id'], tweet_id)
-                    
-                    logger.info(f"✅ Tweet {tweet_id} publié avec succès")
-                    
-                    # Petit délai entre les publications
-                    await asyncio.sleep(2)
-                else:
-                    logger.error(f"Échec publication tweet {tweet_id}")
+                if published_rows:
+                    account['last_tweet_id'] = await db.record_publications(account['id'], published_rows)
                     
         except Exception as e:
             logger.error(f"Erreur traitement compte @{username}: {e}")
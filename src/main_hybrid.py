@@ -3,35 +3,74 @@
 import asyncio
 import signal
 import sys
+import time
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from typing import Dict, List, Set
-from datetime import datetime, timedelta
+from typing import Dict, List
+from datetime import datetime
 
 from config import settings
 from utils.logger import get_logger
+from utils.http_client import http_client
+from utils.quota import api_ledger
+from utils.concurrency import CyclePool
+from utils.scheduler import AdaptiveScheduler
+from utils.dedup_cache import PublishedTweetCache
+from utils.sharding import shard_accounts
 from scraper.rss_scraper import HybridScraper
+from scraper.thread_assembler import ThreadAssembler
 from publisher import TelegramPublisher
-from models import db
+from models import db, Tweet
+from state import create_state_store
 
 logger = get_logger(__name__)
 
 class TwitterTelegramBotHybrid:
     def __init__(self):
         self.scraper = HybridScraper()
+        # Pas de recherche par ID sur ces backends: threads reconstitués depuis le lot et le cache
+        self.threads = ThreadAssembler(cache_size=settings.thread_cache_size)
         self.publisher = None
+        self.state = None
         self.running = False
-        self.processed_tweets: Set[str] = set()
+        self.published_cache = PublishedTweetCache(
+            lru_size=settings.dedup_lru_size,
+            bloom_capacity=settings.dedup_bloom_capacity,
+            error_rate=settings.dedup_bloom_error_rate
+        )
+        self.pool = CyclePool(settings.max_concurrent_accounts)
+        self.scheduler = AdaptiveScheduler(
+            base_interval=settings.poll_interval,
+            min_interval=settings.min_poll_interval,
+            max_interval=settings.max_poll_interval,
+            tweets_per_poll=settings.tweets_per_poll
+        )
+        self.last_cleanup = None
         
     async def setup(self):
         """Initialiser tous les composants"""
         logger.info("Initialisation du bot Twitter-Telegram (Version Hybride)...")
         
+        # Répartition des comptes entre workers
+        if not 0 <= settings.worker_id < settings.workers:
+            raise ValueError(f"WORKER_ID={settings.worker_id} invalide pour WORKERS={settings.workers}")
+        if settings.workers > 1:
+            logger.info(f"Worker {settings.worker_id + 1}/{settings.workers}: seuls les comptes attribués seront traités")
+        
         # Connexion à la base de données
         await db.connect()
         await db.init_schema()
         
+        # Journal des requêtes API (écritures groupées dans api_requests)
+        api_ledger.attach(db.record_api_requests)
+        
+        # État partagé entre workers (Redis, ou mémoire à défaut)
+        self.state = await create_state_store(settings.redis_url if settings.use_redis else None)
+        
+        # Préchauffer le cache de déduplication
+        self.published_cache.warm(await db.get_recent_published_tweet_ids(settings.dedup_bloom_capacity))
+        
         # Initialiser le publisher Telegram
         self.publisher = TelegramPublisher(settings.telegram_bot_token)
         
@@ -46,16 +85,66 @@ class TwitterTelegramBotHybrid:
         logger.info("Arrêt du bot...")
         self.running = False
         
+        # Arrêter la file d'envoi Telegram
+        if self.publisher:
+            await self.publisher.close()
+        
+        if self.state:
+            await self.state.close()
+        
+        # Fermer la session HTTP partagée par les scrapers
+        await http_client.close()
+        
+        # Écrire les dernières requêtes du journal
+        await api_ledger.close()
+        
         await db.disconnect()
         logger.info("Bot arrêté proprement")
     
-    async def process_account(self, account: Dict):
-        """Traiter un compte Twitter"""
+    async def get_accounts(self) -> List[Dict]:
+        """Comptes actifs attribués à ce worker"""
+        return shard_accounts(await db.get_active_accounts(), settings.worker_id, settings.workers)
+    
+    async def lookup_unpublished(self, tweet_ids: List[str]) -> List[str]:
+        """Filtrer via l'état partagé, puis PostgreSQL pour les IDs restants"""
+        tweet_ids = await self.state.filter_recent(tweet_ids)
+        return await db.filter_unpublished(tweet_ids)
+    
+    async def retry_pending_deliveries(self, account: Dict):
+        """Renvoyer les tweets déjà publiés aux canaux abonnés qui ne les ont pas reçus"""
+        pending = await db.get_pending_deliveries(account['id'], settings.delivery_max_attempts)
+        if not pending:
+            return
+        
+        logger.info(f"Nouvel essai de {len(pending)} envoi(s) en attente pour @{account['username']}")
+        deliveries: Dict[str, Dict[str, int]] = {}
+        try:
+            await self.publisher.publish_pending(
+                [(Tweet.from_json(row['tweet_data']), row['channel_id']) for row in pending],
+                deliveries
+            )
+        finally:
+            await db.record_delivery_attempts([
+                (row['tweet_id'], row['channel_id'], deliveries.get(row['tweet_id'], {}).get(row['channel_id']))
+                for row in pending
+            ])
+    
+    async def process_account(self, account: Dict) -> int:
+        """Traiter un compte Twitter, retourne le nombre de tweets publiés"""
         username = account['username']
-        channel_id = account['telegram_channel_id']
+        channels = account['channels']
         last_tweet_id = account['last_tweet_id']
+        new_tweets = 0
+        
+        if not channels:
+            # Aucun canal abonné: inutile de consommer une requête
+            logger.debug(f"@{username} n'a aucun abonnement actif")
+            return 0
         
         try:
+            # Canaux en échec lors des cycles précédents (tweets déjà publiés ailleurs)
+            await self.retry_pending_deliveries(account)
+            
             logger.info(f"Vérification des tweets de @{username}")
             
             # Récupérer les nouveaux tweets
@@ -67,60 +156,118 @@ class TwitterTelegramBotHybrid:
             
             if not tweets:
                 logger.debug(f"Aucun nouveau tweet pour @{username}")
-                return
+                self.scraper.confirm_feed(username)
+                return 0
             
             logger.info(f"{len(tweets)} tweets trouvés pour @{username} (via {self.scraper.last_method})")
             
-            # Traiter les tweets du plus ancien au plus récent
-            for tweet in reversed(tweets):
-                tweet_id = tweet['id']
-                
-                # Vérifier si déjà publié
-                if await db.is_tweet_published(tweet_id):
-                    logger.debug(f"Tweet {tweet_id} déjà publié")
-                    continue
-                
-                # Publier sur Telegram
-                logger.info(f"Publication du tweet {tweet_id} de @{username}")
+            # Threads: auto-réponses du lot regroupées (ancêtres hors du lot: contexte seulement, jamais republiés)
+            if settings.enable_threads:
+                threads = await self.threads.assemble(username, list(reversed(tweets)))
+            else:
+                threads = [[tweet] for tweet in reversed(tweets)]
+            
+            # Vérifier les tweets déjà publiés (cache mémoire, SQL seulement si nécessaire)
+            unpublished = set(await self.published_cache.filter_unpublished(
+                [tweet['id'] for thread in threads for tweet in thread],
+                self.lookup_unpublished
+            ))
+            
+            # Du plus ancien au plus récent, sans les tweets déjà publiés (un thread = une publication)
+            posts = [[tweet for tweet in thread if tweet['id'] in unpublished] for thread in threads]
+            posts = [post for post in posts if post]
+            to_publish = [tweet for post in posts for tweet in post]
+            if not to_publish:
+                logger.debug(f"Tous les tweets de @{username} sont déjà publiés")
+                self.scraper.confirm_feed(username)
+                return 0
+            
+            # Un seul fetch par compte, diffusé à tous les canaux abonnés
+            logger.info(f"Publication de {len(to_publish)} tweet(s) de @{username} "
+                        f"vers {len(channels)} canal(aux)")
+            deliveries: Dict[str, Dict[str, int]] = {}
+            try:
+                await self.publisher.publish_to_channels(posts, channels, deliveries)
+            finally:
+                # Un tweet reçu par au moins un canal est publié (enregistré en un seul lot);
+                # les canaux en échec restent en attente dans tweet_deliveries (nouvel essai au cycle suivant)
+                published_rows = []
+                for tweet in to_publish:
+                    delivered = deliveries.get(tweet['id'])
+                    if not delivered:
+                        logger.error(f"❌ Échec publication tweet {tweet['id']} (aucun canal)")
+                        continue
+                    missing = [channel for channel in channels if channel not in delivered]
+                    if missing:
+                        logger.warning(f"Tweet {tweet['id']} en attente pour {', '.join(missing)}")
+                    channel_id = next(channel for channel in channels if channel in delivered)
+                    published_rows.append({
+                        'tweet_id': tweet['id'],
+                        'telegram_message_id': delivered[channel_id],
+                        'channel_id': channel_id,
+                        'channels': {channel: delivered.get(channel) for channel in channels},
+                        'tweet_data': tweet
+                    })
+                    self.published_cache.add(tweet['id'])
                 
-                telegram_msg_id = await self.publisher.publish_tweet(
-                    tweet=tweet,
-                    channel_id=channel_id
-                )
+                new_tweets = len(published_rows)
+                if published_rows:
+                    account['last_tweet_id'] = await db.record_publications(account['id'], published_rows)
+                    await self.state.add_recent_tweets([row['tweet_id'] for row in published_rows])
                 
-                if telegram_msg_id:
-                    # Enregistrer dans la base de données
-                    await db.add_published_tweet(
-                        tweet_id=tweet_id,
-                        account_id=account['id'],
-                        telegram_message_id=telegram_msg_id,
-                        channel_id=channel_id,
-                        tweet_data=tweet
-                    )
-                    
-                    # Mettre à jour le dernier tweet traité
-                    await db.update_last_tweet_id(account['id'], tweet_id)
-                    
-                    logger.info(f"✅ Tweet {tweet_id} publié avec succès")
-                    
-                    # Petit délai entre les publications
-                    await asyncio.sleep(2)
+                # Validateurs du flux gardés seulement si tout le lot est enregistré
+                # (sinon un 304 masquerait les tweets restants jusqu'au prochain changement)
+                if new_tweets == len(to_publish):
+                    self.scraper.confirm_feed(username)
                 else:
-                    logger.error(f"Échec publication tweet {tweet_id}")
+                    self.scraper.discard_feed(username)
                     
         except Exception as e:
+            self.scraper.discard_feed(username)
             logger.error(f"Erreur traitement compte @{username}: {e}")
             await db.log_error(
                 error_type="account_processing",
                 error_message=str(e),
                 error_data={"username": username}
             )
+            # Compté comme échec par le cycle (CycleStats.failed)
+            raise
+        
+        return new_tweets
+    
+    async def process_accounts(self, accounts: List[Dict], worker=None):
+        """Traiter une liste de comptes, séquentiellement ou en parallèle"""
+        worker = worker or self.process_account
+        
+        if settings.concurrent_cycle:
+            stats = await self.pool.run(
+                accounts,
+                worker,
+                should_continue=lambda: self.running
+            )
+            logger.info(f"Cycle concurrent: {stats.summary()}")
+            return
+        
+        start = time.monotonic()
+        failed = 0
+        for account in accounts:
+            if not self.running:
+                break
+                
+            try:
+                await worker(account)
+            except Exception:
+                # Déjà journalisé par process_account: passer au compte suivant
+                failed += 1
+        
+        logger.info(f"Cycle séquentiel: {len(accounts)} comptes en {time.monotonic() - start:.1f}s "
+                    f"(échecs: {failed})")
     
     async def run_cycle(self):
         """Exécuter un cycle de vérification"""
         try:
-            # Récupérer les comptes actifs
-            accounts = await db.get_active_accounts()
+            # Récupérer les comptes actifs attribués à ce worker
+            accounts = await self.get_accounts()
             
             if not accounts:
                 logger.warning("Aucun compte Twitter configuré")
@@ -128,20 +275,14 @@ class TwitterTelegramBotHybrid:
             
             logger.info(f"Traitement de {len(accounts)} comptes")
             
-            # Traiter chaque compte
-            for account in accounts:
-                if not self.running:
-                    break
-                    
-                await self.process_account(account)
-                
-                # Délai entre les comptes
-                await asyncio.sleep(5)
+            # Traiter les comptes
+            await self.process_accounts(accounts)
             
             # Nettoyage périodique
             if datetime.now().hour == 3 and datetime.now().minute < 5:
                 await db.cleanup_old_tweets(days=30)
                 await db.cleanup_old_errors(days=7)
+                await db.cleanup_old_api_requests(days=settings.api_ledger_retention_days)
                 
         except Exception as e:
             logger.error(f"Erreur dans le cycle principal: {e}")
@@ -150,10 +291,64 @@ class TwitterTelegramBotHybrid:
                 error_message=str(e)
             )
     
+    async def poll_account(self, account: Dict) -> int:
+        """Vérifier un compte puis le replanifier selon le résultat"""
+        try:
+            new_tweets = await self.process_account(account)
+        except Exception:
+            # Compte en erreur: replanifié comme un compte sans nouveauté
+            self.scheduler.reschedule(account['id'], 0)
+            raise
+        self.scheduler.reschedule(account['id'], new_tweets)
+        return new_tweets
+    
+    async def run_adaptive(self):
+        """Boucle principale avec un intervalle adaptatif par compte"""
+        window = settings.posting_history_days * 86400
+        next_sync = 0.0
+        
+        while self.running:
+            try:
+                # Resynchroniser les comptes et leur rythme de publication
+                if time.monotonic() >= next_sync:
+                    accounts = await self.get_accounts()
+                    history = await db.get_posting_history(settings.posting_history_days)
+                    self.scheduler.sync(accounts, history, window)
+                    next_sync = time.monotonic() + settings.scheduler_resync_interval
+                    logger.info(f"{len(self.scheduler)} comptes planifiés")
+                    
+                    # Nettoyage quotidien
+                    today = datetime.now().date()
+                    if datetime.now().hour == 3 and self.last_cleanup != today:
+                        self.last_cleanup = today
+                        await db.cleanup_old_tweets(days=30)
+                        await db.cleanup_old_errors(days=7)
+                        await db.cleanup_old_api_requests(days=settings.api_ledger_retention_days)
+                
+                due_accounts = self.scheduler.pop_due()
+                if due_accounts:
+                    logger.info(f"{len(due_accounts)} comptes à vérifier")
+                    await self.process_accounts(due_accounts, worker=self.poll_account)
+                
+                # Dormir jusqu'à la prochaine échéance ou resynchronisation
+                delay = self.scheduler.seconds_until_next()
+                until_sync = max(0.0, next_sync - time.monotonic())
+                await asyncio.sleep(until_sync if delay is None else min(delay, until_sync))
+                
+            except Exception as e:
+                logger.error(f"Erreur critique: {e}")
+                await asyncio.sleep(60)  # Attendre 1 minute avant de réessayer
+    
     async def run(self):
         """Boucle principale du bot"""
         self.running = True
         
+        if settings.adaptive_polling:
+            logger.info(f"Démarrage de la boucle adaptative "
+                        f"(intervalle par compte: {settings.min_poll_interval}s-{settings.max_poll_interval}s)")
+            await self.run_adaptive()
+            return
+        
         logger.info(f"Démarrage de la boucle principale (intervalle: {settings.poll_interval}s)")
         
         while self.running:
@@ -1,3 +1,4 @@
 from .database import Database, db
+from .tweet import Tweet, Media
 
-__all__ = ['Database', 'db']
\ No newline at end of file
+__all__ = ['Database', 'db', 'Tweet', 'Media']
\ No newline at end of file
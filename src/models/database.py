@@ -1,4 +1,3 @@
-import asyncio
 import asyncpg
 import json
 from datetime import datetime
@@ -13,12 +12,20 @@ from contextlib import asynccontextmanager
 try:
     from ..utils.logger import get_logger
     from ..config import settings
+    from .tweet import serialize_tweet
 except ImportError:
     from utils.logger import get_logger
     from config import settings
+    from models.tweet import serialize_tweet
 
 logger = get_logger(__name__)
 
+def tweet_id_sort_key(tweet_id: str):
+    """Clé de tri des IDs: numérique pour les IDs Twitter, textuelle sinon"""
+    if tweet_id.isdigit():
+        return (1, int(tweet_id), tweet_id)
+    return (0, 0, tweet_id)
+
 class Database:
     def __init__(self, database_url: str):
         self.database_url = database_url
@@ -67,6 +74,27 @@ class Database:
                 )
             """)
             
+            # Abonnements: un compte Twitter peut alimenter plusieurs canaux
+            subscriptions_exist = await conn.fetchval("SELECT to_regclass('subscriptions') IS NOT NULL")
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    id SERIAL PRIMARY KEY,
+                    account_id INTEGER NOT NULL REFERENCES twitter_accounts(id) ON DELETE CASCADE,
+                    telegram_channel_id VARCHAR(255) NOT NULL,
+                    is_active BOOLEAN DEFAULT true,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+                    UNIQUE (account_id, telegram_channel_id)
+                )
+            """)
+            
+            if not subscriptions_exist:
+                # Migration: le canal historique de chaque compte devient son premier abonnement
+                await conn.execute("""
+                    INSERT INTO subscriptions (account_id, telegram_channel_id)
+                    SELECT id, telegram_channel_id FROM twitter_accounts
+                    ON CONFLICT DO NOTHING
+                """)
+            
             # Table des tweets publiés
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS published_tweets (
@@ -80,6 +108,32 @@ class Database:
                 )
             """)
             
+            # Livraison de chaque tweet publié, par canal abonné (message NULL: envoi en attente)
+            deliveries_exist = await conn.fetchval("SELECT to_regclass('tweet_deliveries') IS NOT NULL")
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS tweet_deliveries (
+                    id BIGSERIAL PRIMARY KEY,
+                    tweet_id VARCHAR(255) NOT NULL REFERENCES published_tweets(tweet_id) ON DELETE CASCADE,
+                    account_id INTEGER REFERENCES twitter_accounts(id) ON DELETE CASCADE,
+                    telegram_channel_id VARCHAR(255) NOT NULL,
+                    telegram_message_id BIGINT,
+                    attempts SMALLINT NOT NULL DEFAULT 1,
+                    delivered_at TIMESTAMP WITH TIME ZONE,
+                    UNIQUE (tweet_id, telegram_channel_id)
+                )
+            """)
+            
+            if not deliveries_exist:
+                # Migration: chaque tweet déjà publié est livré à son canal d'origine
+                await conn.execute("""
+                    INSERT INTO tweet_deliveries
+                    (tweet_id, account_id, telegram_channel_id, telegram_message_id, delivered_at)
+                    SELECT tweet_id, account_id, telegram_channel_id, telegram_message_id, published_at
+                    FROM published_tweets
+                    WHERE telegram_channel_id IS NOT NULL
+                    ON CONFLICT DO NOTHING
+                """)
+            
             # Table des erreurs
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS error_logs (
@@ -91,6 +145,18 @@ class Database:
                 )
             """)
             
+            # Journal des requêtes API sortantes (append-only, écrit par lots)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS api_requests (
+                    id BIGSERIAL PRIMARY KEY,
+                    api_name VARCHAR(100) NOT NULL,
+                    endpoint VARCHAR(255),
+                    status SMALLINT NOT NULL,
+                    latency_ms INTEGER,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+                )
+            """)
+            
             # Index pour optimiser les requêtes
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_twitter_accounts_username 
@@ -107,33 +173,63 @@ class Database:
                 ON published_tweets(account_id)
             """)
             
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_subscriptions_account_id 
+                ON subscriptions(account_id)
+            """)
+            
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_api_requests_api_name_created_at 
+                ON api_requests(api_name, created_at)
+            """)
+            
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_tweet_deliveries_pending 
+                ON tweet_deliveries(account_id) WHERE telegram_message_id IS NULL
+            """)
+            
             logger.info("Schéma de base de données initialisé")
     
     # Méthodes pour twitter_accounts
     
     async def add_twitter_account(self, username: str, channel_id: str, twitter_id: Optional[str] = None) -> int:
-        """Ajouter un compte Twitter à surveiller"""
+        """Ajouter un compte Twitter à surveiller et l'abonner au canal
+        
+        Un compte déjà suivi garde ses abonnements: le canal s'y ajoute.
+        """
         async with self.acquire() as conn:
-            result = await conn.fetchrow("""
-                INSERT INTO twitter_accounts (username, telegram_channel_id, twitter_id)
-                VALUES ($1, $2, $3)
-                ON CONFLICT (username) 
-                DO UPDATE SET 
-                    telegram_channel_id = EXCLUDED.telegram_channel_id,
-                    updated_at = NOW()
-                RETURNING id
-            """, username, channel_id, twitter_id)
+            async with conn.transaction():
+                account_id = await conn.fetchval("""
+                    INSERT INTO twitter_accounts (username, telegram_channel_id, twitter_id)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (username) 
+                    DO UPDATE SET updated_at = NOW()
+                    RETURNING id
+                """, username, channel_id, twitter_id)
+                
+                await self._subscribe(conn, account_id, channel_id)
             
             logger.info(f"Compte Twitter ajouté/mis à jour: {username} -> {channel_id}")
-            return result['id']
+            return account_id
+    
+    # Colonnes des comptes, avec la liste des canaux abonnés
+    ACCOUNT_QUERY = """
+        SELECT a.*,
+               COALESCE(
+                   array_agg(s.telegram_channel_id ORDER BY s.id) FILTER (WHERE s.id IS NOT NULL),
+                   '{}'
+               ) AS channels
+        FROM twitter_accounts a
+        LEFT JOIN subscriptions s ON s.account_id = a.id AND s.is_active = true
+    """
     
     async def get_active_accounts(self) -> List[Dict[str, Any]]:
-        """Récupérer tous les comptes actifs"""
+        """Récupérer tous les comptes actifs (channels: canaux abonnés)"""
         async with self.acquire() as conn:
-            rows = await conn.fetch("""
-                SELECT * FROM twitter_accounts
-                WHERE is_active = true
-                ORDER BY username
+            rows = await conn.fetch(self.ACCOUNT_QUERY + """
+                WHERE a.is_active = true
+                GROUP BY a.id
+                ORDER BY a.username
             """)
             
             return [dict(row) for row in rows]
@@ -141,13 +237,49 @@ class Database:
     async def get_account(self, username: str) -> Optional[Dict[str, Any]]:
         """Récupérer un compte par username"""
         async with self.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT * FROM twitter_accounts
-                WHERE username = $1
+            row = await conn.fetchrow(self.ACCOUNT_QUERY + """
+                WHERE a.username = $1
+                GROUP BY a.id
             """, username)
             
             return dict(row) if row else None
     
+    # Méthodes pour subscriptions
+    
+    async def _subscribe(self, conn, account_id: int, channel_id: str):
+        await conn.execute("""
+            INSERT INTO subscriptions (account_id, telegram_channel_id)
+            VALUES ($1, $2)
+            ON CONFLICT (account_id, telegram_channel_id)
+            DO UPDATE SET is_active = true
+        """, account_id, channel_id)
+    
+    async def add_subscription(self, username: str, channel_id: str) -> bool:
+        """Abonner un canal à un compte déjà suivi"""
+        async with self.acquire() as conn:
+            account_id = await conn.fetchval("""
+                SELECT id FROM twitter_accounts WHERE username = $1
+            """, username)
+            if account_id is None:
+                return False
+            
+            await self._subscribe(conn, account_id, channel_id)
+            logger.info(f"Abonnement ajouté: {username} -> {channel_id}")
+            return True
+    
+    async def remove_subscription(self, username: str, channel_id: str) -> bool:
+        """Désabonner un canal d'un compte"""
+        async with self.acquire() as conn:
+            result = await conn.execute("""
+                DELETE FROM subscriptions
+                USING twitter_accounts a
+                WHERE subscriptions.account_id = a.id
+                AND a.username = $1
+                AND subscriptions.telegram_channel_id = $2
+            """, username, channel_id)
+            
+            return result.split()[-1] != '0'
+    
     async def update_last_tweet_id(self, account_id: int, tweet_id: str):
         """Mettre à jour le dernier tweet traité"""
         async with self.acquire() as conn:
@@ -157,6 +289,26 @@ class Database:
                 WHERE id = $2
             """, tweet_id, account_id)
     
+    async def get_twitter_ids(self) -> Dict[str, str]:
+        """Récupérer les IDs Twitter déjà résolus (username en minuscules -> ID)"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT username, twitter_id FROM twitter_accounts
+                WHERE twitter_id IS NOT NULL
+            """)
+
+            return {row['username'].lower(): row['twitter_id'] for row in rows}
+
+    async def set_twitter_id(self, username: str, twitter_id: str):
+        """Enregistrer l'ID Twitter résolu d'un compte"""
+        async with self.acquire() as conn:
+            await conn.execute("""
+                UPDATE twitter_accounts
+                SET twitter_id = $2, updated_at = NOW()
+                WHERE LOWER(username) = LOWER($1)
+                AND twitter_id IS DISTINCT FROM $2
+            """, username, twitter_id)
+    
     async def deactivate_account(self, username: str):
         """Désactiver un compte"""
         async with self.acquire() as conn:
@@ -189,7 +341,32 @@ class Database:
             """, tweet_id)
             
             return result
-    
+
+    async def filter_unpublished(self, tweet_ids: List[str]) -> List[str]:
+        """Retourner les tweets non publiés d'un lot, en une seule requête"""
+        if not tweet_ids:
+            return []
+
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT tweet_id FROM published_tweets
+                WHERE tweet_id = ANY($1::varchar[])
+            """, list(tweet_ids))
+
+        published = {row['tweet_id'] for row in rows}
+        return [tweet_id for tweet_id in tweet_ids if tweet_id not in published]
+
+    async def get_recent_published_tweet_ids(self, limit: int) -> List[str]:
+        """Récupérer les IDs des tweets publiés, du plus récent au plus ancien"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT tweet_id FROM published_tweets
+                ORDER BY published_at DESC
+                LIMIT $1
+            """, limit)
+
+            return [row['tweet_id'] for row in rows]
+
     async def add_published_tweet(self, tweet_id: str, account_id: int, 
                                  telegram_message_id: int, channel_id: str,
                                  tweet_data: Dict[str, Any]):
@@ -200,8 +377,109 @@ class Database:
                 (tweet_id, account_id, telegram_message_id, telegram_channel_id, tweet_data)
                 VALUES ($1, $2, $3, $4, $5)
                 ON CONFLICT (tweet_id) DO NOTHING
-            """, tweet_id, account_id, telegram_message_id, channel_id, json.dumps(tweet_data, cls=DateTimeEncoder))
+            """, tweet_id, account_id, telegram_message_id, channel_id, serialize_tweet(tweet_data))
     
+    async def record_publications(self, account_id: int, rows: List[Dict[str, Any]]) -> Optional[str]:
+        """Enregistrer un lot de tweets publiés et avancer last_tweet_id dans la même transaction
+
+        Chaque ligne contient tweet_id, telegram_message_id, channel_id et tweet_data,
+        et éventuellement channels ({canal: message_id, None si l'envoi a échoué}):
+        chaque canal y est inscrit dans tweet_deliveries, les échecs en attente
+        d'un nouvel essai (get_pending_deliveries). last_tweet_id n'avance que si le plus grand ID du lot est plus récent
+        (ordre de tweet_id_sort_key). Retourne le last_tweet_id enregistré.
+        """
+        if not rows:
+            return None
+
+        records = [
+            (row['tweet_id'], account_id, row['telegram_message_id'], row['channel_id'],
+             serialize_tweet(row['tweet_data']))
+            for row in rows
+        ]
+        deliveries = [
+            (row['tweet_id'], account_id, channel_id, message_id)
+            for row in rows
+            for channel_id, message_id in (row.get('channels') or {row['channel_id']: row['telegram_message_id']}).items()
+        ]
+        last_tweet_id = max((row['tweet_id'] for row in rows), key=tweet_id_sort_key)
+
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany("""
+                    INSERT INTO published_tweets
+                    (tweet_id, account_id, telegram_message_id, telegram_channel_id, tweet_data)
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (tweet_id) DO NOTHING
+                """, records)
+
+                await conn.executemany("""
+                    INSERT INTO tweet_deliveries
+                    (tweet_id, account_id, telegram_channel_id, telegram_message_id, delivered_at)
+                    VALUES ($1, $2, $3, $4::bigint, CASE WHEN $4::bigint IS NULL THEN NULL ELSE NOW() END)
+                    ON CONFLICT (tweet_id, telegram_channel_id) DO NOTHING
+                """, deliveries)
+
+                # Colonne VARCHAR, même ordre que tweet_id_sort_key: IDs numériques comparés
+                # par longueur puis texte, au-dessus des IDs non numériques, eux comparés
+                # par texte (collation "C": ordre des points de code, comme en Python)
+                stored = await conn.fetchval("""
+                    UPDATE twitter_accounts
+                    SET last_tweet_id = $1, updated_at = NOW()
+                    WHERE id = $2
+                    AND (
+                        last_tweet_id IS NULL
+                        OR CASE
+                            WHEN $1 ~ '^[0-9]+$' AND last_tweet_id ~ '^[0-9]+$'
+                                THEN (length($1), $1) > (length(last_tweet_id), last_tweet_id)
+                            WHEN $1 ~ '^[0-9]+$' OR last_tweet_id ~ '^[0-9]+$'
+                                THEN $1 ~ '^[0-9]+$'
+                            ELSE $1 COLLATE "C" > last_tweet_id COLLATE "C"
+                        END
+                    )
+                    RETURNING last_tweet_id
+                """, last_tweet_id, account_id)
+
+                if stored is None:
+                    # Lot plus ancien que le curseur: celui-ci ne recule pas
+                    stored = await conn.fetchval("""
+                        SELECT last_tweet_id FROM twitter_accounts WHERE id = $1
+                    """, account_id)
+
+        return stored
+
+    async def get_pending_deliveries(self, account_id: int, max_attempts: int) -> List[Dict[str, Any]]:
+        """Envois en échec d'un compte vers des canaux toujours abonnés, du plus ancien au plus récent"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT d.tweet_id, d.telegram_channel_id AS channel_id, p.tweet_data
+                FROM tweet_deliveries d
+                JOIN published_tweets p ON p.tweet_id = d.tweet_id
+                JOIN subscriptions s ON s.account_id = d.account_id
+                    AND s.telegram_channel_id = d.telegram_channel_id
+                    AND s.is_active = true
+                WHERE d.account_id = $1
+                AND d.telegram_message_id IS NULL
+                AND d.attempts < $2
+                ORDER BY d.id
+            """, account_id, max_attempts)
+
+            return [dict(row) for row in rows]
+
+    async def record_delivery_attempts(self, attempts: List[tuple]):
+        """Résultat des nouveaux essais: (tweet_id, channel_id, message_id ou None si nouvel échec)"""
+        if not attempts:
+            return
+
+        async with self.acquire() as conn:
+            await conn.executemany("""
+                UPDATE tweet_deliveries
+                SET telegram_message_id = $3::bigint,
+                    delivered_at = CASE WHEN $3::bigint IS NULL THEN NULL ELSE NOW() END,
+                    attempts = attempts + 1
+                WHERE tweet_id = $1 AND telegram_channel_id = $2
+                AND telegram_message_id IS NULL
+            """, attempts)
+
     async def get_published_tweets_count(self, account_id: Optional[int] = None) -> int:
         """Compter les tweets publiés"""
         async with self.acquire() as conn:
@@ -215,6 +493,20 @@ class Database:
                     SELECT COUNT(*) FROM published_tweets
                 """)
     
+    async def get_posting_history(self, days: int = 14) -> Dict[int, Dict[str, Any]]:
+        """Nombre de tweets publiés par compte sur les derniers jours"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT account_id, COUNT(*) AS tweet_count,
+                       MIN(published_at) AS first_published_at,
+                       MAX(published_at) AS last_published_at
+                FROM published_tweets
+                WHERE published_at > NOW() - make_interval(days => $1)
+                GROUP BY account_id
+            """, days)
+
+            return {row['account_id']: dict(row) for row in rows}
+
     async def cleanup_old_tweets(self, days: int = 30):
         """Nettoyer les vieux tweets"""
         async with self.acquire() as conn:
@@ -227,6 +519,37 @@ class Database:
             if count > 0:
                 logger.info(f"Supprimé {count} vieux tweets")
     
+    # Méthodes pour api_requests
+    
+    async def record_api_requests(self, rows: List[tuple]):
+        """Enregistrer un lot de requêtes (api_name, endpoint, status, latency_ms, created_at)"""
+        async with self.acquire() as conn:
+            await conn.executemany("""
+                INSERT INTO api_requests (api_name, endpoint, status, latency_ms, created_at)
+                VALUES ($1, $2, $3, $4, $5)
+            """, rows)
+    
+    async def get_monthly_api_usage(self) -> Dict[str, int]:
+        """Requêtes ayant reçu une réponse depuis le début du mois (UTC), par API"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT api_name, COUNT(*) AS count
+                FROM api_requests
+                WHERE created_at >= date_trunc('month', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+                  AND status > 0
+                GROUP BY api_name
+            """)
+            
+            return {row['api_name']: row['count'] for row in rows}
+    
+    async def cleanup_old_api_requests(self, days: int = 90):
+        """Nettoyer le journal des requêtes API"""
+        async with self.acquire() as conn:
+            await conn.execute("""
+                DELETE FROM api_requests
+                WHERE created_at < NOW() - make_interval(days => $1)
+            """, days)
+    
     # Méthodes pour error_logs
     
     async def log_error(self, error_type: str, error_message: str, 
@@ -0,0 +1,292 @@
+"""Modèle Tweet compact (slots), commun à tous les scrapers"""
+import hashlib
+import re
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+try:
+    from ..utils.json_codec import dumps, loads
+except ImportError:
+    from utils.json_codec import dumps, loads
+
+TWITTER_DATE_FORMAT = "%a %b %d %H:%M:%S +0000 %Y"
+
+def parse_twitter_date(date_str: Optional[str]) -> datetime:
+    """Date Twitter classique ou ISO 8601 (maintenant si illisible)"""
+    if not date_str:
+        return datetime.now()
+    try:
+        # Format: "Wed Oct 10 20:19:24 +0000 2018"
+        return datetime.strptime(date_str, TWITTER_DATE_FORMAT)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+        except ValueError:
+            return datetime.now()
+
+class _MappingAccess:
+    """Lecture façon dict (tweet['id'], tweet.get('media')) pour le code existant"""
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+@dataclass(slots=True)
+class Media(_MappingAccess):
+    type: str  # photo, video ou gif
+    url: str
+
+    def to_dict(self) -> Dict[str, str]:
+        return {'type': self.type, 'url': self.url}
+
+def media_from_entities(entities: Optional[Dict]) -> List[Media]:
+    """Médias d'un bloc entities / extended_entities (API v1.1 et GraphQL)"""
+    media_list = []
+
+    for media in (entities or {}).get('media', []):
+        media_type = media.get('type', 'photo')
+
+        if media_type == 'photo':
+            url = media.get('media_url_https') or media.get('media_url')
+            if url:
+                media_list.append(Media('photo', url))
+        elif media_type in ('video', 'animated_gif'):
+            # Prendre la meilleure qualité mp4
+            variants = media.get('video_info', {}).get('variants', [])
+            best_variant = max(
+                (v for v in variants if v.get('content_type', 'video/mp4') == 'video/mp4' and v.get('url')),
+                key=lambda v: v.get('bitrate', 0),
+                default=None
+            )
+            if best_variant:
+                media_list.append(Media('video' if media_type == 'video' else 'gif', best_variant['url']))
+
+    return media_list
+
+@dataclass(slots=True)
+class Tweet(_MappingAccess):
+    """Tweet normalisé, quel que soit le backend de scraping
+
+    Se lit comme l'ancien dict (tweet['text'], tweet.get('media')) et se
+    sérialise directement pour la colonne JSONB tweet_data (to_json).
+    """
+    id: str
+    text: str
+    created_at: datetime
+    author: str
+    author_name: str = ''
+    url: str = ''
+    media: List[Media] = field(default_factory=list)
+    likes: int = 0
+    retweets: int = 0
+    replies: int = 0
+    is_retweet: bool = False
+    is_quote: bool = False
+    reply_to: Optional[str] = None  # ID du tweet parent
+    reply_to_user: Optional[str] = None  # username de l'auteur du tweet parent
+
+    def __post_init__(self):
+        if not self.id:
+            raise ValueError("Tweet sans ID")
+        if not self.author:
+            raise ValueError(f"Tweet {self.id} sans auteur")
+        if not isinstance(self.created_at, datetime):
+            raise ValueError(f"Tweet {self.id}: date invalide ({self.created_at!r})")
+
+        self.id = str(self.id)
+        self.text = self.text or ''
+        self.author_name = self.author_name or self.author
+        self.url = self.url or f"https://twitter.com/{self.author}/status/{self.id}"
+        self.reply_to = str(self.reply_to) if self.reply_to else None
+        self.likes = self.likes or 0
+        self.retweets = self.retweets or 0
+        self.replies = self.replies or 0
+        self.media = [
+            media if isinstance(media, Media) else Media(media['type'], media['url'])
+            for media in self.media
+            if media and media['url']
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data['media'] = [media.to_dict() for media in self.media]
+        return data
+
+    def to_json(self) -> str:
+        """Sérialisation pour la colonne tweet_data (JSONB)"""
+        return dumps(self)
+
+    @classmethod
+    def from_json(cls, data: str) -> "Tweet":
+        """Tweet relu depuis la colonne tweet_data (inverse de to_json)"""
+        values = loads(data)
+        known = {f.name for f in fields(cls)}
+        values = {key: value for key, value in values.items() if key in known}
+        if isinstance(values.get('created_at'), str):
+            values['created_at'] = datetime.fromisoformat(values['created_at'])
+        return cls(**values)
+
+    # Constructeurs par backend
+
+    @classmethod
+    def from_twitter241(cls, tweet_data: Dict, username: str) -> "Tweet":
+        """Résultat GraphQL (tweet_results.result) de Twitter241"""
+        legacy = tweet_data.get('legacy', {})
+        user_data = tweet_data.get('core', {}).get('user_results', {}).get('result', {}).get('legacy', {})
+        author = user_data.get('screen_name') or username
+
+        return cls(
+            id=tweet_data.get('rest_id', ''),
+            text=legacy.get('full_text', ''),
+            created_at=parse_twitter_date(legacy.get('created_at')),
+            author=author,
+            author_name=user_data.get('name', author),
+            media=media_from_entities(legacy.get('extended_entities') or legacy.get('entities')),
+            likes=legacy.get('favorite_count', 0),
+            retweets=legacy.get('retweet_count', 0),
+            replies=legacy.get('reply_count', 0),
+            is_retweet=legacy.get('retweeted', False) or 'retweeted_status_result' in legacy,
+            is_quote=tweet_data.get('quoted_status_result') is not None,
+            reply_to=legacy.get('in_reply_to_status_id_str'),
+            reply_to_user=legacy.get('in_reply_to_screen_name')
+        )
+
+    @classmethod
+    def from_twitter_v1(cls, raw_tweet: Dict) -> "Tweet":
+        """Format API v1.1 (RapidAPI génériques, proxies)"""
+        user = raw_tweet.get('user', {})
+        author = user.get('screen_name') or 'unknown'
+
+        return cls(
+            id=raw_tweet.get('id_str') or raw_tweet.get('id'),
+            text=raw_tweet.get('full_text') or raw_tweet.get('text', ''),
+            created_at=parse_twitter_date(raw_tweet.get('created_at')),
+            author=author,
+            author_name=user.get('name', 'Unknown'),
+            media=media_from_entities(raw_tweet.get('extended_entities') or raw_tweet.get('entities')),
+            likes=raw_tweet.get('favorite_count', 0),
+            retweets=raw_tweet.get('retweet_count', 0),
+            replies=raw_tweet.get('reply_count', 0),
+            is_retweet=raw_tweet.get('retweeted', False),
+            is_quote=raw_tweet.get('is_quote_status', False),
+            reply_to=raw_tweet.get('in_reply_to_status_id_str'),
+            reply_to_user=raw_tweet.get('in_reply_to_screen_name')
+        )
+
+    @classmethod
+    def from_twitterapi_io(cls, tweet: Dict) -> "Tweet":
+        """Format TwitterAPI.io (proche de l'API v2)"""
+        author = tweet.get('author', {})
+        metrics = tweet.get('public_metrics', {})
+
+        return cls(
+            id=tweet.get('id'),
+            text=tweet.get('text'),
+            created_at=parse_twitter_date(tweet.get('created_at')),
+            author=author.get('username'),
+            author_name=author.get('name'),
+            media=media_from_entities(tweet.get('attachments')),
+            likes=metrics.get('like_count', 0),
+            retweets=metrics.get('retweet_count', 0),
+            replies=metrics.get('reply_count', 0),
+            # in_reply_to_user_id est un ID utilisateur, pas un ID de tweet
+            reply_to=tweet.get('in_reply_to_tweet_id')
+        )
+
+    @classmethod
+    def from_rss_entry(cls, entry, username: str) -> "Tweet":
+        """Entrée feedparser d'un flux RSS (RSSHub, Nitter, TwitRSS)"""
+        link = getattr(entry, 'link', '')
+
+        # Extraire l'ID du tweet depuis le lien
+        match = re.search(r'/status/(\d+)', link)
+        tweet_id = match.group(1) if match else None
+        if not tweet_id and getattr(entry, 'id', None):
+            # Certains flux utilisent l'ID directement
+            tweet_id = entry.id.split('/')[-1]
+
+        # Texte du tweet, sans HTML
+        text = getattr(entry, 'summary', None) or getattr(entry, 'description', None) or getattr(entry, 'title', '')
+        text = re.sub(r'<[^>]+>', '', text).strip()
+
+        if not tweet_id:
+            # ID stable d'un démarrage à l'autre (hash() est aléatoire par processus)
+            tweet_id = "rss_" + hashlib.sha1((link or text).encode()).hexdigest()[:16]
+
+        published = getattr(entry, 'published_parsed', None)
+
+        return cls(
+            id=tweet_id,
+            text=text,
+            created_at=datetime(*published[:6]) if published else datetime.now(),
+            author=username,
+            author_name=username.title(),
+            url=link or f"https://twitter.com/{username}",
+            media=[
+                Media('photo', link_data.get('href', ''))
+                for link_data in getattr(entry, 'links', [])
+                if link_data.get('type', '').startswith('image/')
+            ],
+            is_retweet=text.startswith('RT @')
+        )
+
+    @classmethod
+    def from_nitter(cls, tweet_id: str, text: str, created_at: datetime, username: str,
+                    media: List[Media], likes: int = 0, retweets: int = 0, replies: int = 0) -> "Tweet":
+        """Carte de tweet parsée depuis le HTML d'une instance Nitter"""
+        return cls(
+            id=tweet_id,
+            text=text,
+            created_at=created_at,
+            author=username,
+            author_name=username.title(),
+            media=media,
+            likes=likes,
+            retweets=retweets,
+            replies=replies,
+            is_retweet='RT @' in text
+        )
+
+    @classmethod
+    def from_twscrape(cls, tweet) -> "Tweet":
+        """Objet twscrape.Tweet"""
+        media = []
+        if tweet.media:
+            media.extend(Media('photo', photo.url) for photo in tweet.media.photos)
+            for video in tweet.media.videos:
+                # Prendre la meilleure qualité
+                best_variant = max(video.variants, key=lambda v: v.bitrate or 0, default=None)
+                if best_variant:
+                    media.append(Media('video', best_variant.url))
+            media.extend(Media('gif', animated.videoUrl) for animated in tweet.media.animated)
+
+        reply_to_user = tweet.inReplyToUser.username if tweet.inReplyToUser else None
+
+        return cls(
+            id=str(tweet.id),
+            text=tweet.rawContent,
+            created_at=tweet.date,
+            author=tweet.user.username,
+            author_name=tweet.user.displayname,
+            url=f"https://twitter.com/{tweet.user.username}/status/{tweet.id}",
+            media=media,
+            likes=tweet.likeCount,
+            retweets=tweet.retweetCount,
+            replies=tweet.replyCount,
+            is_retweet=bool(tweet.retweetedTweet),
+            is_quote=bool(tweet.quotedTweet),
+            reply_to=tweet.inReplyToTweetId,
+            reply_to_user=reply_to_user
+        )
+
+def serialize_tweet(tweet: Any) -> str:
+    """JSON pour la colonne tweet_data: Tweet ou ancien dict"""
+    if isinstance(tweet, Tweet):
+        return tweet.to_json()
+    return dumps(tweet)
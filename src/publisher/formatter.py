@@ -0,0 +1,304 @@
+"""Mise en forme HTML des tweets pour Telegram, en une seule passe
+
+Le texte est échappé puis ses entités (URL, mention, hashtag) deviennent des
+liens en un seul re.sub sur une expression précompilée. S'il dépasse la
+limite, il est d'abord coupé sur le texte brut, jamais au milieu d'une
+entité (ni donc d'une balise ou d'une entité HTML); l'en-tête et le pied
+(auteur, statistiques, date, lien) sont toujours conservés.
+
+Les limites de Telegram portent sur le texte visible (après interprétation
+du HTML), en unités UTF-16: 4096 pour un message, 1024 pour une légende.
+Les liens affichant le texte d'origine, la longueur visible du texte mis en
+forme est celle du texte brut.
+
+Le message suit un gabarit (par défaut ou propre au canal), compilé une
+fois; les rendus sont gardés dans un petit LRU (RenderCache).
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from html import unescape
+from string import Formatter
+from typing import Any, Dict, List, Tuple
+from telegram.constants import MessageLimit
+try:
+    from ..utils.logger import get_logger
+except ImportError:
+    from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TEXT_LIMIT = MessageLimit.MAX_TEXT_LENGTH
+CAPTION_LIMIT = MessageLimit.CAPTION_LENGTH
+
+ELLIPSIS = "…"
+
+# Entités du texte brut (pour placer la coupe) et du texte échappé (pour les liens);
+# les deux reconnaissent exactement les mêmes entités. Le lookahead initial permet
+# au moteur de sauter directement aux candidats (h, @, #).
+RAW_ENTITY_PATTERN = re.compile(
+    r'(?=[h@#])(?:https?://[^\s<>"]+'
+    r'|(?<![\w@])@\w+'
+    r'|(?<![\w&#])#\w+)'
+)
+ENTITY_PATTERN = re.compile(
+    r'(?=[h@#])(?:(?P<url>https?://(?:[^\s<>"&]|&amp;)+)'
+    r'|(?<![\w@])@(?P<mention>\w+)'
+    r'|(?<![\w#])(?<!&amp;)#(?P<hashtag>\w+))'
+)
+
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+def escape(text: str) -> str:
+    # Trois replace restent plus rapides qu'un str.translate (C contre table Python)
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+def utf16_len(text: str) -> int:
+    """Longueur comptée par Telegram (les emojis hors BMP comptent double)"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+def visible_len(html: str) -> int:
+    """Longueur visible d'un fragment HTML (balises retirées, entités décodées)"""
+    return utf16_len(unescape(TAG_PATTERN.sub('', html)))
+
+def _link(match: re.Match) -> str:
+    kind = match.lastgroup
+    value = match.group(kind)
+    if kind == 'url':
+        href = value.replace('"', '&quot;')
+        return f'<a href="{href}">{value}</a>'
+    if kind == 'mention':
+        return f'<a href="https://twitter.com/{value}">@{value}</a>'
+    return f'<a href="https://twitter.com/hashtag/{value}">#{value}</a>'
+
+def _cut(text: str, budget: int) -> str:
+    """Début de text tenant dans budget unités UTF-16, sans couper d'entité"""
+    if budget <= 0:
+        return ''
+    prefix = text[:budget]
+    # Un caractère hors BMP compte double: retirer au moins la moitié de l'excédent
+    # (jamais plus que l'excédent, à une unité près) jusqu'à tenir
+    excess = utf16_len(prefix) - budget
+    while excess > 0:
+        prefix = prefix[:len(prefix) - (excess + 1) // 2]
+        excess = utf16_len(prefix) - budget
+    cut = len(prefix)
+
+    # Les entités ne contiennent pas d'espace: seul le mot coupé peut en contenir une
+    word_start = cut
+    while word_start > 0 and not text[word_start - 1].isspace():
+        word_start -= 1
+    for match in RAW_ENTITY_PATTERN.finditer(text, word_start):
+        if match.start() >= cut:
+            break
+        if match.end() > cut:
+            # Entité à cheval sur la coupe: elle est retirée en entier
+            cut = match.start()
+            break
+    return text[:cut]
+
+def link_text(text: str) -> str:
+    """Texte échappé, entités liées (sans limite de longueur)"""
+    return ENTITY_PATTERN.sub(_link, escape(text))
+
+def format_date(created_at) -> str:
+    """Date affichée (%d/%m/%Y %H:%M), sans passer par strftime (plus lent)"""
+    return '%02d/%02d/%04d %02d:%02d' % (
+        created_at.day, created_at.month, created_at.year, created_at.hour, created_at.minute
+    )
+
+def render_text(text: str, budget: int = TEXT_LIMIT) -> Tuple[str, int]:
+    """Texte du tweet en HTML (échappé, entités liées), limité à budget caractères visibles
+
+    Retourne le HTML et sa longueur visible.
+    """
+    size = utf16_len(text)
+    if size > budget:
+        if budget <= 0:
+            return '', 0
+        # Place réservée pour l'ellipse
+        text = _cut(text, budget - 1).rstrip()
+        return link_text(text) + ELLIPSIS, utf16_len(text) + 1
+    return link_text(text), size
+
+TEMPLATE_FIELDS = ('author_name', 'author', 'text', 'stats', 'date', 'url', 'link')
+DEFAULT_TEMPLATE = "🐦 <b>{author_name}</b> (@{author})\n\n{text}{stats}\n\n📅 {date}\n🔗 {link}"
+LINK_LABEL = "Tweet original"
+STATS_SEPARATOR = " • "
+# (clé, libellé, unités UTF-16 en plus de len(): les emojis hors BMP comptent double)
+STATS_LABELS = tuple(
+    (key, label, utf16_len(label) - len(label))
+    for key, label in (('likes', "❤️"), ('retweets', "🔄"), ('replies', "💬"))
+)
+
+class MessageTemplate:
+    """Gabarit de message (HTML Telegram) compilé une fois
+
+    Champs: {author_name}, {author}, {text} (texte lié, seul raccourci pour
+    tenir dans la limite), {stats} (ligne vide puis statistiques, vide s'il
+    n'y en a pas), {date}, {url} et {link} (lien « Tweet original »). Les
+    accolades littérales s'écrivent {{ et }}.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        # Change avec le gabarit: invalide les rendus en cache
+        self.version = hashlib.sha1(source.encode()).hexdigest()[:12]
+        self.segments: List[Tuple[str, bool]] = []
+        literals = []
+
+        for literal, field_name, spec, conversion in Formatter().parse(source):
+            if literal:
+                self.segments.append((literal, False))
+                literals.append(literal)
+            if field_name is None:
+                continue
+            if field_name not in TEMPLATE_FIELDS or spec or conversion:
+                raise ValueError(f"champ inconnu ou formaté: {{{field_name}}}")
+            self.segments.append((field_name, True))
+
+        self.fields = {value for value, is_field in self.segments if is_field}
+        self.text_count = sum(1 for value, is_field in self.segments if is_field and value == 'text')
+        # Longueur visible des parties fixes (balises retirées, entités décodées)
+        self.fixed_size = visible_len(''.join(literals))
+
+    def render(self, tweet: Dict[str, Any], limit: int = CAPTION_LIMIT) -> str:
+        """Message d'un tweet, tenant dans `limit` (TEXT_LIMIT ou CAPTION_LIMIT)"""
+        fields = self.fields
+        values = {}
+        size = self.fixed_size
+
+        if 'author_name' in fields:
+            values['author_name'] = escape(tweet['author_name'])
+            size += utf16_len(tweet['author_name'])
+        if 'author' in fields:
+            values['author'] = escape(tweet['author'])
+            size += utf16_len(tweet['author'])
+        if 'stats' in fields:
+            stats = []
+            extra = 0
+            for key, label, label_extra in STATS_LABELS:
+                count = tweet.get(key)
+                if count:
+                    stats.append(f"{label} {count}")
+                    extra += label_extra
+            values['stats'] = f"\n\n{STATS_SEPARATOR.join(stats)}" if stats else ''
+            # Chiffres et séparateur sont dans le BMP: pas d'encodage UTF-16 à faire
+            size += len(values['stats']) + extra
+        if 'date' in fields:
+            values['date'] = format_date(tweet['created_at'])
+            size += len(values['date'])
+        if 'url' in fields or 'link' in fields:
+            href = escape(tweet['url']).replace('"', '&quot;')
+            if 'url' in fields:
+                # Compté comme visible, même s'il ne sert que dans un attribut
+                values['url'] = href
+                size += utf16_len(tweet['url'])
+            if 'link' in fields:
+                values['link'] = f'<a href="{href}">{LINK_LABEL}</a>'
+                size += len(LINK_LABEL)
+        if self.text_count:
+            text = tweet['text']
+            budget = (limit - size) // self.text_count
+            if len(text) * 2 <= budget:
+                # Tient forcément (au plus deux unités UTF-16 par caractère): ni mesure ni coupe
+                values['text'] = link_text(text)
+            else:
+                values['text'], _ = render_text(text, budget)
+
+        return ''.join([values[value] if is_field else value for value, is_field in self.segments])
+
+DEFAULT_MESSAGE_TEMPLATE = MessageTemplate(DEFAULT_TEMPLATE)
+
+def format_tweet(tweet: Dict[str, Any], limit: int = CAPTION_LIMIT) -> str:
+    """Message Telegram d'un tweet avec le gabarit par défaut
+
+    `limit` est la limite du type de message (TEXT_LIMIT ou CAPTION_LIMIT);
+    seul le texte du tweet est raccourci pour la respecter.
+    """
+    return DEFAULT_MESSAGE_TEMPLATE.render(tweet, limit)
+
+def format_thread(tweets: List[Dict[str, Any]], limit: int = TEXT_LIMIT) -> List[Tuple[str, List[str]]]:
+    """Messages Telegram d'un thread, chacun tenant dans `limit`
+
+    Les tweets sont numérotés et regroupés dans le moins de messages possible;
+    un tweet trop long pour un message seul est raccourci. L'en-tête ouvre le
+    premier message, la date et le lien vers le thread ferment le dernier.
+    Retourne (texte, IDs des tweets qu'il contient) pour chaque message.
+    """
+    first = tweets[0]
+    header = f"🧵 <b>Thread</b> de <b>{escape(first['author_name'])}</b> (@{escape(first['author'])})\n\n"
+    href = escape(first['url']).replace('"', '&quot;')
+    footer = (f"\n\n📅 {format_date(first['created_at'])}"
+              f'\n🔗 <a href="{href}">Thread original</a>')
+    # Place du pied réservée dans chaque message (on ne sait pas d'avance lequel sera le dernier)
+    budget = limit - visible_len(footer)
+
+    messages = []
+    parts = [header]
+    tweet_ids = []
+    size = visible_len(header)
+    for number, tweet in enumerate(tweets, 1):
+        prefix = f"{number}. "
+        separator = "\n\n" if tweet_ids else ""
+        if tweet_ids and size + len(separator) + len(prefix) + utf16_len(tweet['text']) > budget:
+            # Message plein: ce tweet ouvre le message suivant
+            messages.append((''.join(parts), tweet_ids))
+            parts, tweet_ids, size, separator = [], [], 0, ""
+        text, text_size = render_text(tweet['text'], budget - size - len(separator) - len(prefix))
+        parts.append(f"{separator}{prefix}{text}")
+        tweet_ids.append(tweet['id'])
+        size += len(separator) + len(prefix) + text_size
+
+    parts.append(footer)
+    messages.append((''.join(parts), tweet_ids))
+    return messages
+
+def compile_templates(sources: Dict[str, str]) -> Dict[str, MessageTemplate]:
+    """Gabarits par canal (TELEGRAM_TEMPLATES); un gabarit invalide est ignoré"""
+    templates = {}
+    for channel_id, source in sources.items():
+        try:
+            templates[str(channel_id)] = MessageTemplate(source)
+        except ValueError as e:
+            logger.error(f"Gabarit de {channel_id} ignoré (gabarit par défaut utilisé): {e}")
+    return templates
+
+class RenderCache:
+    """LRU des messages rendus, clé (ID du tweet, hash du contenu, version du gabarit, limite)
+
+    La diffusion vers plusieurs canaux, les republications et les threads
+    réutilisent le rendu au lieu de reformater le tweet. Le hash du contenu
+    change si le texte ou les statistiques du tweet changent.
+    """
+
+    def __init__(self, size: int = 512):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, str]" = OrderedDict()
+
+    @staticmethod
+    def content_hash(tweet: Dict[str, Any]) -> int:
+        return hash((
+            tweet['text'], tweet['author_name'], tweet['author'], tweet['url'], tweet['created_at'],
+            tweet.get('likes'), tweet.get('retweets'), tweet.get('replies')
+        ))
+
+    def render(self, tweet: Dict[str, Any], template: MessageTemplate, limit: int) -> str:
+        key = (tweet['id'], self.content_hash(tweet), template.version, limit)
+        message = self._entries.get(key)
+        if message is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return message
+
+        self.misses += 1
+        message = template.render(tweet, limit)
+        if self.size > 0:
+            self._entries[key] = message
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return message
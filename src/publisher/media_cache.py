@@ -0,0 +1,259 @@
+"""Cache des médias: téléchargement unique, upload unique vers Telegram
+
+Les médias sont téléchargés par morceaux dans data/cache, sous le sha256 de
+leur contenu, puis envoyés à Telegram comme fichiers (Telegram n'a plus à
+les récupérer lui-même sur le CDN de Twitter). Le file_id renvoyé après le
+premier upload est conservé: republications et diffusion vers d'autres
+canaux le réutilisent sans renvoyer d'octets.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import weakref
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+import aiohttp
+try:
+    from ..utils.logger import get_logger
+    from ..utils.http_client import http_client
+except ImportError:
+    from utils.logger import get_logger
+    from utils.http_client import http_client
+
+logger = get_logger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+INDEX_FILE = 'file_ids.json'
+EXTENSIONS = {'photo': '.jpg', 'video': '.mp4', 'gif': '.mp4'}
+
+def message_file_id(message: Any, media_type: str) -> Optional[str]:
+    """file_id du média d'un message Telegram envoyé"""
+    if media_type == 'photo':
+        # Plusieurs tailles, la plus grande en dernier
+        return message.photo[-1].file_id if message.photo else None
+    if media_type == 'video' and message.video:
+        return message.video.file_id
+    if media_type == 'gif' and message.animation:
+        return message.animation.file_id
+    return None
+
+class MediaCache:
+    """Médias adressés par contenu sur disque + file_id Telegram par URL et par contenu
+
+    - urls: URL du média → clé ("photo:<sha256>", ou "photo:url:<URL>" si le
+      média a été envoyé à Telegram par son URL, sans téléchargement)
+    - file_ids: clé → file_id Telegram (valable pour tous les canaux du bot)
+
+    Les deux tables sont persistées dans data/cache/file_ids.json. Les fichiers
+    les plus anciens sont supprimés au-delà de max_bytes.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], max_bytes: int, max_file_bytes: int,
+                 max_entries: int = 20000):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.max_entries = max_entries
+        self.urls: "OrderedDict[str, str]" = OrderedDict()
+        self.file_ids: "OrderedDict[str, str]" = OrderedDict()
+        self.size = 0
+        self.reused = 0
+        self.uploaded = 0
+        self._loaded = False
+        self._dirty = False
+        self._downloads: Dict[str, asyncio.Task] = {}
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _load(self):
+        """Lire l'index et mesurer le cache (au premier usage)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        index_path = self.cache_dir / INDEX_FILE
+        if index_path.exists():
+            try:
+                index = json.loads(index_path.read_text())
+                self.urls.update(index.get('urls', {}))
+                self.file_ids.update(index.get('file_ids', {}))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Index du cache média illisible, ignoré: {e}")
+
+        self.size = sum(path.stat().st_size for path in self._files())
+        logger.debug(f"Cache média: {len(self.file_ids)} file_id, {self.size / 1024 / 1024:.1f} Mo")
+
+    def _files(self) -> Iterable[Path]:
+        return self.cache_dir.glob('*/*')
+
+    def _path(self, key: str) -> Optional[Path]:
+        """Fichier d'une clé de contenu (None pour une clé d'URL)"""
+        media_type, _, digest = key.partition(':')
+        if len(digest) != 64:
+            return None
+        return self.cache_dir / digest[:2] / f"{digest}{EXTENSIONS.get(media_type, '')}"
+
+    @staticmethod
+    def _trim(table: "OrderedDict[str, str]", limit: int):
+        while len(table) > limit:
+            table.popitem(last=False)
+
+    def file_id(self, media: Dict[str, str]) -> Optional[str]:
+        """file_id Telegram déjà obtenu pour ce média"""
+        self._load()
+        key = self.urls.get(media['url'])
+        return self.file_ids.get(key) if key else None
+
+    def remember(self, media: Dict[str, str], file_id: Optional[str]):
+        """Conserver le file_id renvoyé par Telegram pour ce média"""
+        if not file_id:
+            return
+        self._load()
+        url = media['url']
+        key = self.urls.get(url) or f"{media['type']}:url:{url}"
+        self.urls[url] = key
+        self.urls.move_to_end(url)
+        if self.file_ids.get(key) != file_id:
+            self.file_ids[key] = file_id
+            self.file_ids.move_to_end(key)
+            self.uploaded += 1
+        self._trim(self.urls, self.max_entries)
+        self._trim(self.file_ids, self.max_entries)
+        self._dirty = True
+
+    def forget(self, media: Dict[str, str]):
+        """Oublier le file_id d'un média (refusé par Telegram)"""
+        self._load()
+        key = self.urls.get(media['url'])
+        if key and self.file_ids.pop(key, None):
+            self._dirty = True
+
+    async def input_for(self, media: Dict[str, str]) -> Union[str, Path]:
+        """Ce qu'il faut passer à Telegram: file_id connu, fichier en cache ou, à défaut, l'URL"""
+        file_id = self.file_id(media)
+        if file_id:
+            self.reused += 1
+            return file_id
+
+        path = await self.download(media)
+        return path or media['url']
+
+    @asynccontextmanager
+    async def lock(self, media_items: Iterable[Dict[str, str]]):
+        """Un seul upload à la fois par média: les autres canaux attendent son file_id"""
+        urls = sorted({media['url'] for media in media_items})
+        async with AsyncExitStack() as stack:
+            # Toujours dans le même ordre (pas d'interblocage entre albums)
+            for url in urls:
+                lock = self._locks.get(url)
+                if lock is None:
+                    lock = self._locks[url] = asyncio.Lock()
+                await stack.enter_async_context(lock)
+            yield
+
+    async def download(self, media: Dict[str, str]) -> Optional[Path]:
+        """Fichier local du média, téléchargé une seule fois même si demandé en parallèle"""
+        self._load()
+        key = self.urls.get(media['url'])
+        path = self._path(key) if key else None
+        if path and path.exists():
+            return path
+
+        url = media['url']
+        if url not in self._downloads:
+            self._downloads[url] = asyncio.create_task(self._download(media))
+            self._downloads[url].add_done_callback(lambda _: self._downloads.pop(url, None))
+        return await asyncio.shield(self._downloads[url])
+
+    async def _download(self, media: Dict[str, str]) -> Optional[Path]:
+        url = media['url']
+        partial = self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.part"
+        digest = hashlib.sha256()
+        size = 0
+
+        try:
+            session = await http_client.get_session()
+            # Pas de limite totale: seule une lecture bloquée interrompt une grosse vidéo
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=30)
+            async with session.get(url, timeout=timeout) as response:
+                if response.status != 200:
+                    logger.warning(f"Média {url} indisponible (HTTP {response.status})")
+                    return None
+                if (response.content_length or 0) > self.max_file_bytes:
+                    logger.info(f"Média {url} trop volumineux pour un upload, envoi par URL")
+                    return None
+
+                with open(partial, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_file_bytes:
+                            logger.info(f"Média {url} trop volumineux pour un upload, envoi par URL")
+                            return None
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            key = f"{media['type']}:{digest.hexdigest()}"
+            path = self._path(key)
+            if path.exists():
+                # Même contenu sous une autre URL
+                os.utime(path)
+            else:
+                path.parent.mkdir(exist_ok=True)
+                os.replace(partial, path)
+                self.size += size
+                if self.size > self.max_bytes:
+                    await asyncio.to_thread(self._evict)
+
+            self.urls[url] = key
+            self.urls.move_to_end(url)
+            self._trim(self.urls, self.max_entries)
+            self._dirty = True
+            return path
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+            logger.warning(f"Téléchargement du média {url} échoué: {e}")
+            return None
+        finally:
+            partial.unlink(missing_ok=True)
+
+    def _evict(self):
+        """Supprimer les fichiers les plus anciens jusqu'à repasser sous 90 % de max_bytes"""
+        files = sorted(
+            ((path.stat().st_mtime, path.stat().st_size, path) for path in self._files()),
+            key=lambda item: item[0]
+        )
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if self.size <= target:
+                break
+            path.unlink(missing_ok=True)
+            self.size -= size
+        logger.debug(f"Cache média réduit à {self.size / 1024 / 1024:.1f} Mo")
+
+    def _write_index(self, index: Dict[str, Dict[str, str]]):
+        path = self.cache_dir / INDEX_FILE
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, path)
+
+    async def save(self):
+        """Écrire l'index des file_id s'il a changé"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        index = {'urls': dict(self.urls), 'file_ids': dict(self.file_ids)}
+        try:
+            await asyncio.to_thread(self._write_index, index)
+        except OSError as e:
+            logger.warning(f"Écriture de l'index du cache média échouée: {e}")
+
+    async def close(self):
+        """Attendre les téléchargements en cours et sauvegarder l'index"""
+        if self._downloads:
+            await asyncio.gather(*self._downloads.values(), return_exceptions=True)
+        await self.save()
+        if self.reused or self.uploaded:
+            logger.info(f"Cache média: {self.uploaded} upload(s), {self.reused} file_id réutilisé(s)")
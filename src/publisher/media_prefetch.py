@@ -0,0 +1,80 @@
+"""Préchargement des médias: téléchargements en avance sur la publication
+
+Pendant que le publisher envoie un tweet, les médias des tweets suivants se
+téléchargent en arrière-plan dans le cache disque (par morceaux, jamais en
+entier en mémoire). Le publisher retrouve alors ses médias déjà sur disque,
+ou rejoint le téléchargement en cours au lieu de le relancer.
+"""
+import asyncio
+from typing import Any, Dict, List, Set
+try:
+    from ..utils.logger import get_logger
+    from .media_cache import MediaCache
+except ImportError:
+    from utils.logger import get_logger
+    from publisher.media_cache import MediaCache
+
+logger = get_logger(__name__)
+
+class PrefetchRun:
+    """Préchargement d'une liste de tweets, au plus `lookahead` tweets en avance"""
+
+    def __init__(self, prefetcher: "MediaPrefetcher", tweets: List[Dict[str, Any]], lookahead: int):
+        self.prefetcher = prefetcher
+        self.tweets = tweets
+        self.lookahead = lookahead
+        self.published = 0
+        self._progress = asyncio.Event()
+        self._downloads: Set[asyncio.Task] = set()
+        self._task = asyncio.create_task(self._run())
+
+    def done(self, index: int):
+        """Le tweet n° index vient d'être publié (par le canal le plus avancé)"""
+        if index + 1 > self.published:
+            self.published = index + 1
+            self._progress.set()
+
+    async def _run(self):
+        cache = self.prefetcher.cache
+        for index, tweet in enumerate(self.tweets):
+            # Fenêtre bornée: pas plus de lookahead tweets d'avance sur la publication
+            while index >= self.published + self.lookahead:
+                self._progress.clear()
+                await self._progress.wait()
+
+            for media in tweet.get('media') or []:
+                if cache.file_id(media):
+                    # Déjà uploadé: Telegram réutilisera le file_id
+                    continue
+                task = asyncio.create_task(self.prefetcher.fetch(media))
+                self._downloads.add(task)
+                task.add_done_callback(self._downloads.discard)
+
+    async def close(self):
+        """Arrêter le préchargement (les téléchargements démarrés finissent dans le cache)"""
+        self._task.cancel()
+        for task in self._downloads:
+            task.cancel()
+        await asyncio.gather(self._task, *self._downloads, return_exceptions=True)
+
+class MediaPrefetcher:
+    """Téléchargements anticipés, partagés par tous les comptes traités en parallèle
+
+    `concurrency` borne les téléchargements anticipés simultanés (tous comptes
+    confondus); les médias du tweet en cours de publication ne l'attendent pas.
+    """
+
+    def __init__(self, cache: MediaCache, concurrency: int = 4, lookahead: int = 3):
+        self.cache = cache
+        self.lookahead = max(1, lookahead)
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.prefetched = 0
+
+    def start(self, tweets: List[Dict[str, Any]]) -> PrefetchRun:
+        """Précharger les médias de ces tweets, dans l'ordre de publication"""
+        return PrefetchRun(self, tweets, self.lookahead)
+
+    async def fetch(self, media: Dict[str, str]):
+        async with self._semaphore:
+            if await self.cache.download(media):
+                self.prefetched += 1
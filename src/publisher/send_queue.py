@@ -0,0 +1,143 @@
+"""File d'envoi Telegram: limites globale et par chat, chats servis en parallèle"""
+import asyncio
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from telegram.error import RetryAfter
+try:
+    from ..utils.logger import get_logger
+    from ..utils.rate_limiter import TokenBucket
+except ImportError:
+    from utils.logger import get_logger
+    from utils.rate_limiter import TokenBucket
+
+logger = get_logger(__name__)
+
+# (fonction d'envoi, nombre de messages, futur du résultat)
+SendJob = Tuple[Callable[[], Awaitable[Any]], int, asyncio.Future]
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Délai d'un RetryAfter (entier ou timedelta selon la version de python-telegram-bot)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+class SendQueue:
+    """Envois Telegram ordonnés par chat, au rythme autorisé par Telegram
+
+    Chaque chat a sa file FIFO et son worker: les messages d'un canal partent
+    dans l'ordre, au plus chat_rate par minute, tandis que les autres canaux
+    sont servis en parallèle. Tous les workers partagent le seau global
+    (global_rate messages/seconde). Un RetryAfter ne bloque que le chat
+    concerné, puis l'envoi est retenté (au plus max_retries fois).
+    """
+
+    def __init__(self, global_rate: float = 30, chat_rate: float = 20, chat_burst: int = 3,
+                 max_retries: int = 3, idle_timeout: float = 300):
+        self.global_bucket = TokenBucket(global_rate, burst=max(1, int(global_rate)))
+        self.chat_rate = chat_rate / 60
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.workers: Dict[str, asyncio.Task] = {}
+
+    def chat_bucket(self, chat_id: str) -> TokenBucket:
+        if chat_id not in self.chat_buckets:
+            self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, burst=self.chat_burst)
+        return self.chat_buckets[chat_id]
+
+    async def submit(self, chat_id: str, send: Callable[[], Awaitable[Any]], messages: int = 1) -> Any:
+        """Mettre un envoi en file et attendre son résultat
+
+        `messages` est le nombre de messages produits (taille d'un album): tous
+        sont décomptés des limites, même au-delà de la rafale du chat.
+        """
+        chat_id = str(chat_id)
+        future = asyncio.get_running_loop().create_future()
+        if chat_id not in self.queues:
+            self.queues[chat_id] = asyncio.Queue()
+        self.queues[chat_id].put_nowait((send, messages, future))
+
+        worker = self.workers.get(chat_id)
+        if worker is None or worker.done():
+            self.workers[chat_id] = asyncio.create_task(self._worker(chat_id))
+
+        return await future
+
+    async def _worker(self, chat_id: str):
+        queue = self.queues[chat_id]
+        bucket = self.chat_bucket(chat_id)
+
+        while True:
+            try:
+                job = await asyncio.wait_for(queue.get(), timeout=self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Chat inactif: libérer le worker (recréé au prochain envoi)
+                if queue.empty():
+                    self.workers.pop(chat_id, None)
+                    self.queues.pop(chat_id, None)
+                    return
+                continue
+
+            try:
+                await self._send(chat_id, bucket, job)
+            except asyncio.CancelledError:
+                job[2].cancel()
+                raise
+
+    async def _send(self, chat_id: str, bucket: TokenBucket, job: SendJob):
+        send, messages, future = job
+
+        for attempt in range(self.max_retries + 1):
+            # Appelant annulé: ne pas envoyer
+            if future.done():
+                return
+
+            await bucket.acquire(messages)
+            await self.global_bucket.acquire(messages)
+            if future.done():
+                return
+
+            try:
+                result = await send()
+            except RetryAfter as e:
+                delay = retry_after_seconds(e)
+                if attempt >= self.max_retries:
+                    logger.error(f"Rate limit Telegram persistant sur {chat_id}, envoi abandonné")
+                    if not future.done():
+                        future.set_exception(e)
+                    return
+                logger.warning(f"Rate limit Telegram sur {chat_id}, pause de {delay:.0f}s "
+                               f"(tentative {attempt + 1}/{self.max_retries})")
+                bucket.penalize(delay)
+                continue
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+
+            if not future.done():
+                future.set_result(result)
+            return
+
+    def pending(self) -> int:
+        """Envois en attente, tous chats confondus"""
+        return sum(queue.qsize() for queue in self.queues.values())
+
+    async def close(self):
+        """Arrêter les workers (les envois en attente sont annulés)"""
+        workers = list(self.workers.values())
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        for queue in self.queues.values():
+            while not queue.empty():
+                _, _, future = queue.get_nowait()
+                future.cancel()
+
+        self.workers.clear()
+        self.queues.clear()
@@ -1,23 +1,61 @@
 import asyncio
 import aiohttp
-from typing import List, Dict, Any, Optional
+from contextlib import nullcontext
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from telegram import Bot, InputMediaPhoto, InputMediaVideo, InputMediaAnimation
 from telegram.error import TelegramError, RetryAfter
-from telegram.constants import MessageLimit
 try:
     from ..utils.logger import get_logger
     from ..config import settings
+    from .send_queue import SendQueue
+    from .media_cache import MediaCache, message_file_id
+    from .media_prefetch import MediaPrefetcher
+    from .formatter import (
+        DEFAULT_MESSAGE_TEMPLATE, RenderCache, compile_templates, format_thread, CAPTION_LIMIT, TEXT_LIMIT
+    )
 except ImportError:
     from utils.logger import get_logger
     from config import settings
+    from publisher.send_queue import SendQueue
+    from publisher.media_cache import MediaCache, message_file_id
+    from publisher.media_prefetch import MediaPrefetcher
+    from publisher.formatter import (
+        DEFAULT_MESSAGE_TEMPLATE, RenderCache, compile_templates, format_thread, CAPTION_LIMIT, TEXT_LIMIT
+    )
 
 logger = get_logger(__name__)
 
 class TelegramPublisher:
     def __init__(self, bot_token: str):
-        self.bot = Bot(token=bot_token)
+        self.bot = Bot(token=bot_token, base_url=settings.telegram_api_url)
         self.session = None
+        # Tous les envois passent par la file (limites Telegram globale et par canal)
+        self.queue = SendQueue(
+            global_rate=settings.telegram_global_rate,
+            chat_rate=settings.telegram_chat_rate,
+            chat_burst=settings.telegram_chat_burst,
+            max_retries=settings.telegram_max_retries
+        )
+        # Médias téléchargés une fois, uploadés une fois (file_id réutilisé ensuite)
+        self.media_cache = MediaCache(
+            settings.media_cache_dir,
+            max_bytes=settings.media_cache_max_mb * 1024 * 1024,
+            max_file_bytes=settings.media_upload_max_mb * 1024 * 1024
+        ) if settings.media_cache else None
+        # Médias des tweets suivants téléchargés pendant la publication du tweet en cours
+        self.prefetcher = MediaPrefetcher(
+            self.media_cache,
+            concurrency=settings.media_prefetch_concurrency,
+            lookahead=settings.media_prefetch_lookahead
+        ) if self.media_cache and settings.media_prefetch else None
+        # Fichiers du cache lus en mémoire pour l'upload: uploads simultanés et octets par album bornés
+        self.upload_slots = asyncio.Semaphore(max(1, settings.media_upload_concurrency))
+        self.album_max_bytes = settings.media_album_max_mb * 1024 * 1024
+        # Gabarits par canal compilés une fois; rendus réutilisés entre canaux et republications
+        self.templates = compile_templates(settings.telegram_templates)
+        self.render_cache = RenderCache(settings.render_cache_size)
         
     async def __aenter__(self):
         self.session = aiohttp.ClientSession()
@@ -26,37 +64,98 @@ class TelegramPublisher:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        await self.close()
+    
+    async def close(self):
+        """Arrêter la file d'envoi et sauvegarder les file_id des médias"""
+        await self.queue.close()
+        if self.media_cache:
+            await self.media_cache.close()
+    
+    async def _send(self, channel_id: str, send, messages: int = 1):
+        """Envoyer via la file du canal (attend son tour, RetryAfter géré par la file)"""
+        return await self.queue.submit(channel_id, send, messages)
+    
+    def _media_lock(self, media_items: List[Dict[str, str]]):
+        """Verrou du premier upload d'un média (les autres canaux attendent son file_id)"""
+        return self.media_cache.lock(media_items) if self.media_cache else nullcontext()
+    
+    def _cached_file_ids(self, media_items: List[Dict[str, str]]) -> Optional[List[str]]:
+        """file_id de tous les médias, ou None s'il faut encore en uploader un"""
+        if not self.media_cache:
+            return None
+        file_ids = [self.media_cache.file_id(media) for media in media_items]
+        if not all(file_ids):
+            return None
+        self.media_cache.reused += len(file_ids)
+        return file_ids
+    
+    async def _media_input(self, media: Dict[str, str]):
+        """file_id connu, fichier en cache ou URL du média"""
+        if not self.media_cache:
+            return media['url']
+        return await self.media_cache.input_for(media)
+    
+    async def _remember_file_ids(self, media_items: List[Dict[str, str]], messages: List[Any]):
+        """Conserver les file_id des médias qui viennent d'être envoyés"""
+        if not self.media_cache:
+            return
+        for media, message in zip(media_items, messages):
+            self.media_cache.remember(media, message_file_id(message, media['type']))
+        await self.media_cache.save()
+    
+    def _upload_slot(self, media_inputs: List[Any]):
+        """Place d'upload si des fichiers du cache vont être envoyés (et donc lus en mémoire)"""
+        if any(isinstance(media_input, Path) for media_input in media_inputs):
+            return self.upload_slots
+        return nullcontext()
+    
+    def _cap_album_bytes(self, media_items: List[Dict[str, str]], media_inputs: List[Any]) -> List[Any]:
+        """Borner les octets d'un album lus en mémoire: au-delà, le média part par son URL"""
+        budget = self.album_max_bytes
+        capped = []
+        for media, media_input in zip(media_items, media_inputs):
+            if isinstance(media_input, Path):
+                size = media_input.stat().st_size
+                if size > budget:
+                    logger.debug(f"Album: {media_input.name} ({size} octets) envoyé par URL")
+                    media_input = media['url']
+                else:
+                    budget -= size
+            capped.append(media_input)
+        return capped
+    
+    def _forget_file_ids(self, media_items: List[Dict[str, str]]):
+        # Un file_id refusé (bot changé, fichier expiré) sera remplacé au prochain upload
+        if self.media_cache:
+            for media in media_items:
+                self.media_cache.forget(media)
     
     async def publish_tweet(self, tweet: Dict[str, Any], channel_id: str) -> Optional[int]:
         """Publier un tweet dans un canal Telegram"""
         try:
-            # Formater le texte du tweet
-            text = self._format_tweet_text(tweet)
-            
             # Si pas de médias ou médias désactivés
-            if not tweet.get('media') or not settings.enable_media:
-                message = await self.bot.send_message(
+            with_media = bool(tweet.get('media')) and settings.enable_media
+            
+            # Formater le texte du tweet (légende limitée à 1024 caractères, message à 4096)
+            text = self._format_tweet_text(tweet, CAPTION_LIMIT if with_media else TEXT_LIMIT, channel_id)
+            
+            if not with_media:
+                message = await self._send(channel_id, lambda: self.bot.send_message(
                     chat_id=channel_id,
                     text=text,
                     parse_mode='HTML',
                     disable_web_page_preview=False
-                )
+                ))
                 return message.message_id
             
             # Gérer les médias
-            media_items = tweet['media']
-            
-            if len(media_items) == 1:
-                # Un seul média
-                return await self._send_single_media(channel_id, media_items[0], text)
-            else:
-                # Plusieurs médias (media group)
-                return await self._send_media_group(channel_id, media_items, text)
+            return await self._send_media(channel_id, tweet['media'], text)
                 
-        except RetryAfter as e:
-            logger.warning(f"Rate limit Telegram, attente de {e.retry_after}s")
-            await asyncio.sleep(e.retry_after)
-            return await self.publish_tweet(tweet, channel_id)  # Retry
+        except RetryAfter:
+            # Nouvelles tentatives épuisées par la file d'envoi
+            logger.error(f"Rate limit Telegram persistant, tweet {tweet['id']} non publié")
+            return None
             
         except TelegramError as e:
             logger.error(f"Erreur Telegram: {e}")
@@ -66,190 +165,297 @@ class TelegramPublisher:
             logger.error(f"Erreur publication tweet: {e}")
             return None
     
-    def _format_tweet_text(self, tweet: Dict[str, Any]) -> str:
-        """Formater le texte du tweet pour Telegram"""
-        # Échapper les caractères HTML
-        text = tweet['text']
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
+    async def publish_to_channels(self, posts: List[List[Dict[str, Any]]], channel_ids: List[str],
+                                  deliveries: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, Dict[str, int]]:
+        """Publier les mêmes publications dans plusieurs canaux
         
-        # Convertir les mentions Twitter en liens
-        import re
-        text = re.sub(
-            r'@(\w+)',
-            r'<a href="https://twitter.com/\1">@\1</a>',
-            text
-        )
+        Une publication est un tweet seul ([tweet]) ou un thread (plusieurs
+        tweets, publiés via publish_thread). Chaque canal reçoit les
+        publications dans l'ordre donné; les canaux sont servis en parallèle
+        (la file d'envoi applique les limites de chacun). Retourne
+        {tweet_id: {channel_id: message_id}} pour les envois réussis (un tweet
+        de thread pointe sur le message qui le contient); `deliveries` est
+        rempli au fur et à mesure, et reste donc exploitable si l'appel est
+        interrompu.
+        """
+        if deliveries is None:
+            deliveries = {}
         
-        # Convertir les hashtags en liens
-        text = re.sub(
-            r'#(\w+)',
-            r'<a href="https://twitter.com/hashtag/\1">#\1</a>',
-            text
-        )
+        prefetch = None
+        # Médias de chaque publication (ceux d'un thread suivent ses messages texte)
+        post_media = [{'media': [media for tweet in post for media in tweet.get('media') or []]} for post in posts]
+        if self.prefetcher and settings.enable_media and any(post['media'] for post in post_media):
+            prefetch = self.prefetcher.start(post_media)
         
-        # Ajouter les métadonnées
-        formatted = f"""🐦 <b>{tweet['author_name']}</b> (@{tweet['author']})
-
-{text}"""
+        async def publish_channel(channel_id: str):
+            for index, post in enumerate(posts):
+                if len(post) == 1:
+                    message_id = await self.publish_tweet(post[0], channel_id)
+                    published = {post[0]['id']: message_id} if message_id else {}
+                else:
+                    published = await self.publish_thread(post, channel_id)
+                for tweet_id, message_id in published.items():
+                    deliveries.setdefault(tweet_id, {})[channel_id] = message_id
+                missing = [tweet['id'] for tweet in post if tweet['id'] not in published]
+                if missing:
+                    logger.warning(f"Tweets {', '.join(missing)} non publiés dans {channel_id}")
+                if prefetch:
+                    prefetch.done(index)
         
-        # Ajouter les statistiques si disponibles
-        if any([tweet.get('likes'), tweet.get('retweets'), tweet.get('replies')]):
-            stats = []
-            if tweet.get('likes'):
-                stats.append(f"❤️ {tweet['likes']}")
-            if tweet.get('retweets'):
-                stats.append(f"🔄 {tweet['retweets']}")
-            if tweet.get('replies'):
-                stats.append(f"💬 {tweet['replies']}")
-            
-            formatted += f"\n\n{' • '.join(stats)}"
+        try:
+            await asyncio.gather(*(publish_channel(channel_id) for channel_id in channel_ids))
+        finally:
+            if prefetch:
+                await prefetch.close()
+        return deliveries
+    
+    async def publish_pending(self, pending: List[Tuple[Dict[str, Any], str]],
+                              deliveries: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, Dict[str, int]]:
+        """Renvoyer des tweets aux seuls canaux qui ne les ont pas reçus
         
-        # Ajouter la date et le lien
-        date_str = tweet['created_at'].strftime('%d/%m/%Y %H:%M')
-        formatted += f"""
-
-📅 {date_str}
-🔗 <a href="{tweet['url']}">Tweet original</a>"""
+        `pending` liste des (tweet, canal), du plus ancien au plus récent; les
+        auto-réponses qui se suivent dans un canal repartent ensemble (thread).
+        Même retour que publish_to_channels.
+        """
+        if deliveries is None:
+            deliveries = {}
         
-        # Tronquer si trop long
-        if len(formatted) > MessageLimit.CAPTION_LENGTH:
-            formatted = formatted[:MessageLimit.CAPTION_LENGTH - 3] + "..."
+        posts_by_channel: Dict[str, List[List[Dict[str, Any]]]] = {}
+        for tweet, channel_id in pending:
+            posts = posts_by_channel.setdefault(channel_id, [])
+            if settings.enable_threads and posts and tweet.get('reply_to') == posts[-1][-1]['id']:
+                posts[-1].append(tweet)
+            else:
+                posts.append([tweet])
         
-        return formatted
+        await asyncio.gather(*(
+            self.publish_to_channels(posts, [channel_id], deliveries)
+            for channel_id, posts in posts_by_channel.items()
+        ))
+        return deliveries
+    
+    def _format_tweet_text(self, tweet: Dict[str, Any], limit: int = CAPTION_LIMIT,
+                           channel_id: Optional[str] = None) -> str:
+        """Formater le texte du tweet pour Telegram (gabarit du canal, limite du type de message)"""
+        template = self.templates.get(str(channel_id), DEFAULT_MESSAGE_TEMPLATE)
+        return self.render_cache.render(tweet, template, limit)
+    
+    async def _send_media(self, channel_id: str, media_items: List[Dict[str, str]], caption: str,
+                          reply_to: Optional[int] = None) -> Optional[int]:
+        """Envoyer les médias d'un tweet (un seul média ou media group)"""
+        if len(media_items) == 1:
+            return await self._send_single_media(channel_id, media_items[0], caption, reply_to)
+        return await self._send_media_group(channel_id, media_items, caption, reply_to)
     
-    async def _send_single_media(self, channel_id: str, media: Dict[str, str], caption: str) -> Optional[int]:
+    async def _send_single_media(self, channel_id: str, media: Dict[str, str], caption: str,
+                                 reply_to: Optional[int] = None) -> Optional[int]:
         """Envoyer un seul média"""
         media_type = media['type']
-        media_url = media['url']
         
         try:
-            if media_type == 'photo':
-                message = await self.bot.send_photo(
-                    chat_id=channel_id,
-                    photo=media_url,
-                    caption=caption,
-                    parse_mode='HTML'
-                )
-            elif media_type == 'video':
-                message = await self.bot.send_video(
-                    chat_id=channel_id,
-                    video=media_url,
-                    caption=caption,
-                    parse_mode='HTML'
-                )
-            elif media_type == 'gif':
-                message = await self.bot.send_animation(
-                    chat_id=channel_id,
-                    animation=media_url,
-                    caption=caption,
-                    parse_mode='HTML'
-                )
-            else:
-                logger.warning(f"Type de média non supporté: {media_type}")
-                return None
-                
-            return message.message_id
+            file_ids = self._cached_file_ids([media])
+            if file_ids is None:
+                async with self._media_lock([media]):
+                    # Un autre canal a pu obtenir le file_id pendant l'attente du verrou
+                    file_ids = self._cached_file_ids([media])
+                    if file_ids is None:
+                        media_input = await self._media_input(media)
+                        async with self._upload_slot([media_input]):
+                            message = await self._send_media_message(channel_id, media_type, media_input,
+                                                                     caption, reply_to)
+                        if message is None:
+                            return None
+                        await self._remember_file_ids([media], [message])
+                        return message.message_id
+            
+            # file_id connu: envoi sans verrou (les canaux sont servis en parallèle)
+            message = await self._send_media_message(channel_id, media_type, file_ids[0], caption, reply_to)
+            return message.message_id if message else None
             
+        except RetryAfter:
+            raise
         except Exception as e:
             logger.error(f"Erreur envoi média {media_type}: {e}")
+            self._forget_file_ids([media])
             # Fallback: envoyer juste le texte
-            message = await self.bot.send_message(
+            message = await self._send(channel_id, lambda: self.bot.send_message(
                 chat_id=channel_id,
                 text=caption,
-                parse_mode='HTML'
-            )
+                parse_mode='HTML',
+                reply_to_message_id=reply_to
+            ))
             return message.message_id
     
-    async def _send_media_group(self, channel_id: str, media_items: List[Dict[str, str]], caption: str) -> Optional[int]:
+    async def _send_media_message(self, channel_id: str, media_type: str, media_input, caption: str,
+                                  reply_to: Optional[int] = None):
+        """Envoyer un message à un seul média (None si le type n'est pas supporté)"""
+        if media_type == 'photo':
+            return await self._send(channel_id, lambda: self.bot.send_photo(
+                chat_id=channel_id,
+                photo=media_input,
+                caption=caption,
+                parse_mode='HTML',
+                reply_to_message_id=reply_to
+            ))
+        elif media_type == 'video':
+            return await self._send(channel_id, lambda: self.bot.send_video(
+                chat_id=channel_id,
+                video=media_input,
+                caption=caption,
+                parse_mode='HTML',
+                reply_to_message_id=reply_to
+            ))
+        elif media_type == 'gif':
+            return await self._send(channel_id, lambda: self.bot.send_animation(
+                chat_id=channel_id,
+                animation=media_input,
+                caption=caption,
+                parse_mode='HTML',
+                reply_to_message_id=reply_to
+            ))
+        logger.warning(f"Type de média non supporté: {media_type}")
+        return None
+    
+    async def _send_media_group(self, channel_id: str, media_items: List[Dict[str, str]], caption: str,
+                                reply_to: Optional[int] = None) -> Optional[int]:
         """Envoyer un groupe de médias"""
-        media_group = []
+        # Telegram limite à 10 médias
+        sent = [media for media in media_items[:10] if media['type'] in ('photo', 'video', 'gif')]
+        if not sent:
+            return None
         
-        for i, media in enumerate(media_items[:10]):  # Telegram limite à 10 médias
+        try:
+            file_ids = self._cached_file_ids(sent)
+            if file_ids is None:
+                async with self._media_lock(sent):
+                    # Un autre canal a pu obtenir les file_id pendant l'attente du verrou
+                    file_ids = self._cached_file_ids(sent)
+                    if file_ids is None:
+                        # Téléchargements en parallèle (file_id connus: aucun)
+                        inputs = await asyncio.gather(*(self._media_input(media) for media in sent))
+                        inputs = self._cap_album_bytes(sent, inputs)
+                        
+                        # Contenus lus en mémoire jusqu'à l'envoi: place d'upload tenue pendant ce temps
+                        async with self._upload_slot(inputs):
+                            media_group = await self._build_media_group(sent, inputs, caption)
+                            messages = await self._send_album(channel_id, media_group, reply_to)
+                        await self._remember_file_ids(sent, messages)
+                        return messages[0].message_id if messages else None
+            
+            # file_id connus: envoi sans verrou (les canaux sont servis en parallèle)
+            media_group = await self._build_media_group(sent, file_ids, caption)
+            messages = await self._send_album(channel_id, media_group, reply_to)
+            return messages[0].message_id if messages else None
+            
+        except RetryAfter:
+            raise
+        except Exception as e:
+            logger.error(f"Erreur envoi media group: {e}")
+            self._forget_file_ids(sent)
+            # Fallback: envoyer juste le texte
+            message = await self._send(channel_id, lambda: self.bot.send_message(
+                chat_id=channel_id,
+                text=caption,
+                parse_mode='HTML',
+                reply_to_message_id=reply_to
+            ))
+            return message.message_id
+    
+    async def _build_media_group(self, media_items: List[Dict[str, str]], media_inputs: List[Any],
+                                 caption: str) -> List[Any]:
+        """InputMedia* de l'album (la légende va sur le premier média)"""
+        media_group = []
+        for i, (media, media_input) in enumerate(zip(media_items, media_inputs)):
             media_type = media['type']
-            media_url = media['url']
+            filename = None
+            if isinstance(media_input, Path):
+                # InputMedia* traite les chemins comme en mode local: passer le contenu
+                filename = media_input.name
+                media_input = await asyncio.to_thread(media_input.read_bytes)
             
             # Ajouter la caption seulement au premier média
             media_caption = caption if i == 0 else None
             
             if media_type == 'photo':
                 media_group.append(InputMediaPhoto(
-                    media=media_url,
+                    media=media_input,
                     caption=media_caption,
-                    parse_mode='HTML' if media_caption else None
+                    parse_mode='HTML' if media_caption else None,
+                    filename=filename
                 ))
             elif media_type == 'video':
                 media_group.append(InputMediaVideo(
-                    media=media_url,
+                    media=media_input,
                     caption=media_caption,
-                    parse_mode='HTML' if media_caption else None
+                    parse_mode='HTML' if media_caption else None,
+                    filename=filename
                 ))
             elif media_type == 'gif':
                 media_group.append(InputMediaAnimation(
-                    media=media_url,
+                    media=media_input,
                     caption=media_caption,
-                    parse_mode='HTML' if media_caption else None
+                    parse_mode='HTML' if media_caption else None,
+                    filename=filename
                 ))
-        
-        if not media_group:
-            return None
-        
-        try:
-            messages = await self.bot.send_media_group(
-                chat_id=channel_id,
-                media=media_group
-            )
-            return messages[0].message_id if messages else None
-            
-        except Exception as e:
-            logger.error(f"Erreur envoi media group: {e}")
-            # Fallback: envoyer juste le texte
-            message = await self.bot.send_message(
-                chat_id=channel_id,
-                text=caption,
-                parse_mode='HTML'
-            )
-            return message.message_id
+        return media_group
+    
+    async def _send_album(self, channel_id: str, media_group: List[Any], reply_to: Optional[int] = None):
+        # Chaque média de l'album compte comme un message pour les limites Telegram
+        return await self._send(channel_id, lambda: self.bot.send_media_group(
+            chat_id=channel_id,
+            media=media_group,
+            reply_to_message_id=reply_to
+        ), messages=len(media_group))
     
-    async def publish_thread(self, thread_tweets: List[Dict[str, Any]], channel_id: str) -> List[int]:
-        """Publier un thread Twitter complet"""
-        message_ids = []
+    async def publish_thread(self, thread_tweets: List[Dict[str, Any]], channel_id: str) -> Dict[str, int]:
+        """Publier un thread Twitter complet (le moins de messages possible)
+        
+        Retourne {tweet_id: message_id} pour les seuls tweets dont le message
+        a été envoyé: après un échec, la suite du thread n'y figure pas. Les
+        médias d'un tweet suivent, en réponse, le message qui contient son texte.
+        """
+        published = {}
         
         if not settings.enable_threads:
-            # Si threads désactivés, publier seulement le premier tweet
+            # Si threads désactivés, publier seulement le premier tweet (il représente le thread)
             if thread_tweets:
                 msg_id = await self.publish_tweet(thread_tweets[0], channel_id)
                 if msg_id:
-                    message_ids.append(msg_id)
-            return message_ids
-        
-        # Créer un message consolidé pour le thread
-        thread_text = "🧵 <b>Thread</b>\n\n"
+                    published = {tweet['id']: msg_id for tweet in thread_tweets}
+            return published
         
-        for i, tweet in enumerate(thread_tweets, 1):
-            tweet_text = tweet['text']
-            thread_text += f"{i}. {tweet_text}\n\n"
+        numbers = {tweet['id']: number for number, tweet in enumerate(thread_tweets, 1)}
+        by_id = {tweet['id']: tweet for tweet in thread_tweets}
         
-        # Ajouter les infos du premier tweet
-        first_tweet = thread_tweets[0]
-        thread_text += f"""
-📅 {first_tweet['created_at'].strftime('%d/%m/%Y %H:%M')}
-🔗 <a href="{first_tweet['url']}">Thread original</a>"""
-        
-        # Envoyer le thread consolidé
-        try:
-            message = await self.bot.send_message(
-                chat_id=channel_id,
-                text=thread_text,
-                parse_mode='HTML',
-                disable_web_page_preview=False
-            )
-            message_ids.append(message.message_id)
-        except Exception as e:
-            logger.error(f"Erreur publication thread: {e}")
+        # Texte échappé, entités liées, messages limités à 4096 caractères visibles
+        for text, tweet_ids in format_thread(thread_tweets, TEXT_LIMIT):
+            try:
+                message = await self._send(channel_id, lambda text=text: self.bot.send_message(
+                    chat_id=channel_id,
+                    text=text,
+                    parse_mode='HTML',
+                    disable_web_page_preview=False
+                ))
+                for tweet_id in tweet_ids:
+                    published[tweet_id] = message.message_id
+            except Exception as e:
+                # Ne pas publier la suite d'un thread dont une partie manque
+                logger.error(f"Erreur publication thread: {e}")
+                break
+            
+            if settings.enable_media:
+                for tweet_id in tweet_ids:
+                    media_items = by_id[tweet_id].get('media')
+                    if not media_items:
+                        continue
+                    try:
+                        # Le texte est publié: un média en échec ne retire pas le tweet du thread
+                        await self._send_media(channel_id, media_items, f"🧵 {numbers[tweet_id]}/{len(thread_tweets)}",
+                                               reply_to=message.message_id)
+                    except Exception as e:
+                        logger.error(f"Erreur envoi des médias du tweet {tweet_id} (thread): {e}")
         
-        return message_ids
+        return published
     
     async def delete_message(self, channel_id: str, message_id: int):
         """Supprimer un message (utile pour les tests)"""
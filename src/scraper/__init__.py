@@ -1,3 +1,4 @@
 from .twitter_scraper import TwitterScraper
+from .thread_assembler import ThreadAssembler
 
-__all__ = ['TwitterScraper']
\ No newline at end of file
+__all__ = ['TwitterScraper', 'ThreadAssembler']
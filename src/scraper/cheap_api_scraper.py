@@ -1,22 +1,33 @@
 """Scraper utilisant des APIs tierces très peu chères ou gratuites"""
 import asyncio
-import aiohttp
-import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 import os
 try:
     from ..utils.logger import get_logger
+    from ..utils.http_client import http_client
+    from ..utils.json_codec import read_json
+    from ..utils.provider_health import provider_health
+    from ..models.tweet import Tweet
     from ..config import settings
 except ImportError:
     from utils.logger import get_logger
+    from utils.http_client import http_client
+    from utils.json_codec import read_json
+    from utils.provider_health import provider_health
+    from models.tweet import Tweet
     from config import settings
 
 logger = get_logger(__name__)
 
+# Fournisseur: (nom, clé du registre de santé, fonction lançant la récupération)
+Provider = Tuple[str, Optional[str], Callable[[], Awaitable[List[Tweet]]]]
+
 class CheapAPIScraper:
     """Scraper utilisant des APIs tierces peu chères"""
     
+    # Mesures de latence nécessaires avant d'utiliser le percentile comme délai de couverture
+    MIN_LATENCY_SAMPLES = 10
+    
     def __init__(self):
         self.session = None
         # APIs disponibles (à configurer dans .env)
@@ -24,14 +35,20 @@ class CheapAPIScraper:
         self.twitterapi_io_key = os.getenv('TWITTERAPI_IO_KEY', '')
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Session partagée par tout le processus (fermée par http_client.close())
+        self.session = await http_client.get_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.session = None
     
-    async def fetch_via_rapidapi_free(self, username: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def fetch_via_twitter241(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Tweet]:
+        """Twitter241 (RapidAPI), fournisseur prioritaire"""
+        from .twitter241_scraper import Twitter241Scraper
+        async with Twitter241Scraper() as scraper:
+            return await scraper.fetch_tweets(username, since_id, limit)
+    
+    async def fetch_via_rapidapi_free(self, username: str, limit: int = 10) -> List[Tweet]:
         """
         Utiliser une API gratuite sur RapidAPI
         Plusieurs APIs offrent 100-500 requêtes gratuites/mois
@@ -41,7 +58,7 @@ class CheapAPIScraper:
             return []
         
         # Twitter135 API - Gratuite avec limite
-        url = f"https://twitter135.p.rapidapi.com/v2/UserTweets/"
+        url = f"{settings.twitter135_base_url.rstrip('/')}/v2/UserTweets/"
         
         headers = {
             "X-RapidAPI-Key": self.rapidapi_key,
@@ -54,10 +71,10 @@ class CheapAPIScraper:
         }
         
         try:
-            async with self.session.get(url, headers=headers, params=params) as response:
+            async with http_client.request('twitter135', 'GET', url, headers=headers, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
-                    return self._parse_rapidapi_tweets(data)
+                    data = await read_json(response)
+                    return self._parse_rapidapi_tweets(data, username)
                 else:
                     logger.error(f"Erreur RapidAPI: {response.status}")
                     return []
@@ -65,7 +82,7 @@ class CheapAPIScraper:
             logger.error(f"Erreur fetch RapidAPI: {e}")
             return []
     
-    async def fetch_via_twitterapi_io(self, username: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def fetch_via_twitterapi_io(self, username: str, limit: int = 10) -> List[Tweet]:
         """
         TwitterAPI.io - 0.15$ pour 1000 tweets (très peu cher)
         Offre souvent un essai gratuit
@@ -87,9 +104,9 @@ class CheapAPIScraper:
         }
         
         try:
-            async with self.session.get(url, headers=headers, params=params) as response:
+            async with http_client.request('twitterapi_io', 'GET', url, headers=headers, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await read_json(response)
                     return self._parse_twitterapi_io_tweets(data)
                 else:
                     logger.error(f"Erreur TwitterAPI.io: {response.status}")
@@ -98,7 +115,7 @@ class CheapAPIScraper:
             logger.error(f"Erreur fetch TwitterAPI.io: {e}")
             return []
     
-    async def fetch_via_free_proxy(self, username: str, limit: int = 10) -> List[Dict[str, Any]]:
+    async def fetch_via_free_proxy(self, username: str, limit: int = 10) -> List[Tweet]:
         """
         Utiliser des proxies gratuits pour Twitter
         """
@@ -117,13 +134,13 @@ class CheapAPIScraper:
         ]
         
         for service in proxy_services:
-            if not service['active']:
+            if not service['active'] or not provider_health.available(f"proxy:{service['name']}"):
                 continue
                 
             try:
-                async with self.session.get(service['url']) as response:
+                async with http_client.request(f"proxy:{service['name']}", 'GET', service['url']) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = await read_json(response)
                         logger.info(f"Succès avec {service['name']}")
                         return self._parse_generic_tweets(data)
             except Exception as e:
@@ -132,8 +149,8 @@ class CheapAPIScraper:
         
         return []
     
-    def _parse_rapidapi_tweets(self, data: Dict) -> List[Dict[str, Any]]:
-        """Parser les tweets de RapidAPI"""
+    def _parse_rapidapi_tweets(self, data: Dict, username: str) -> List[Tweet]:
+        """Parser les tweets de RapidAPI (Twitter135, format GraphQL)"""
         tweets = []
         
         try:
@@ -144,39 +161,37 @@ class CheapAPIScraper:
                     for entry in instruction.get('entries', []):
                         tweet_data = entry.get('content', {}).get('tweet_results', {}).get('result', {})
                         if tweet_data:
-                            tweets.append(self._format_tweet(tweet_data))
+                            tweet = self._build_tweet(Tweet.from_twitter241, tweet_data, username)
+                            if tweet:
+                                tweets.append(tweet)
         except Exception as e:
             logger.error(f"Erreur parsing RapidAPI: {e}")
         
         return tweets
     
-    def _parse_twitterapi_io_tweets(self, data: Dict) -> List[Dict[str, Any]]:
+    def _parse_twitterapi_io_tweets(self, data: Dict) -> List[Tweet]:
         """Parser les tweets de TwitterAPI.io"""
         tweets = []
         
         try:
-            for tweet in data.get('data', []):
-                tweets.append({
-                    'id': tweet.get('id'),
-                    'text': tweet.get('text'),
-                    'created_at': datetime.fromisoformat(tweet.get('created_at', '').replace('Z', '+00:00')),
-                    'author': tweet.get('author', {}).get('username'),
-                    'author_name': tweet.get('author', {}).get('name'),
-                    'url': f"https://twitter.com/{tweet.get('author', {}).get('username')}/status/{tweet.get('id')}",
-                    'media': self._extract_media(tweet.get('attachments', {})),
-                    'likes': tweet.get('public_metrics', {}).get('like_count', 0),
-                    'retweets': tweet.get('public_metrics', {}).get('retweet_count', 0),
-                    'replies': tweet.get('public_metrics', {}).get('reply_count', 0),
-                    'is_retweet': False,
-                    'is_quote': False,
-                    'reply_to': tweet.get('in_reply_to_user_id')
-                })
+            for raw_tweet in data.get('data', []):
+                tweet = self._build_tweet(Tweet.from_twitterapi_io, raw_tweet)
+                if tweet:
+                    tweets.append(tweet)
         except Exception as e:
             logger.error(f"Erreur parsing TwitterAPI.io: {e}")
         
         return tweets
     
-    def _parse_generic_tweets(self, data: Any) -> List[Dict[str, Any]]:
+    def _build_tweet(self, constructor: Callable[..., Tweet], *args) -> Optional[Tweet]:
+        """Construire un Tweet; une entrée malformée est ignorée sans perdre le reste du lot"""
+        try:
+            return constructor(*args)
+        except Exception as e:
+            logger.warning(f"Entrée ignorée ({constructor.__name__}): {e}")
+            return None
+    
+    def _parse_generic_tweets(self, data: Any) -> List[Tweet]:
         """Parser générique pour différents formats"""
         tweets = []
         
@@ -184,7 +199,9 @@ class CheapAPIScraper:
         if isinstance(data, list):
             for item in data:
                 if isinstance(item, dict) and 'text' in item:
-                    tweets.append(self._format_tweet(item))
+                    tweet = self._build_tweet(self._format_tweet, item)
+                    if tweet:
+                        tweets.append(tweet)
         elif isinstance(data, dict):
             if 'tweets' in data:
                 return self._parse_generic_tweets(data['tweets'])
@@ -193,107 +210,123 @@ class CheapAPIScraper:
         
         return tweets
     
-    def _format_tweet(self, raw_tweet: Dict) -> Dict[str, Any]:
-        """Formater un tweet brut en format standard"""
-        return {
-            'id': raw_tweet.get('id_str') or raw_tweet.get('id'),
-            'text': raw_tweet.get('full_text') or raw_tweet.get('text', ''),
-            'created_at': self._parse_date(raw_tweet.get('created_at')),
-            'author': raw_tweet.get('user', {}).get('screen_name', 'unknown'),
-            'author_name': raw_tweet.get('user', {}).get('name', 'Unknown'),
-            'url': f"https://twitter.com/{raw_tweet.get('user', {}).get('screen_name')}/status/{raw_tweet.get('id_str')}",
-            'media': self._extract_media(raw_tweet.get('entities', {})),
-            'likes': raw_tweet.get('favorite_count', 0),
-            'retweets': raw_tweet.get('retweet_count', 0),
-            'replies': raw_tweet.get('reply_count', 0),
-            'is_retweet': raw_tweet.get('retweeted', False),
-            'is_quote': raw_tweet.get('is_quote_status', False),
-            'reply_to': raw_tweet.get('in_reply_to_status_id_str')
-        }
+    def _format_tweet(self, raw_tweet: Dict) -> Tweet:
+        """Formater un tweet brut (format API v1.1) en Tweet"""
+        return Tweet.from_twitter_v1(raw_tweet)
     
-    def _extract_media(self, entities: Dict) -> List[Dict[str, str]]:
-        """Extraire les médias"""
-        media_list = []
-        
-        if 'media' in entities:
-            for media in entities['media']:
-                media_type = media.get('type', 'photo')
-                media_url = media.get('media_url_https') or media.get('media_url', '')
-                
-                if media_type == 'video':
-                    # Chercher la meilleure qualité vidéo
-                    variants = media.get('video_info', {}).get('variants', [])
-                    best_variant = max(
-                        (v for v in variants if v.get('bitrate')),
-                        key=lambda x: x.get('bitrate', 0),
-                        default={}
-                    )
-                    if best_variant:
-                        media_url = best_variant.get('url', media_url)
-                
-                media_list.append({
-                    'type': media_type,
-                    'url': media_url
-                })
-        
-        return media_list
+    def hedge_delay(self, key: Optional[str]) -> float:
+        """Délai avant de lancer le fournisseur suivant: percentile de latence de `key`"""
+        delay = None
+        if key:
+            delay = provider_health.latency_percentile(key, settings.hedge_percentile, self.MIN_LATENCY_SAMPLES)
+        return settings.hedge_delay if delay is None else delay
     
-    def _parse_date(self, date_str: str) -> datetime:
-        """Parser une date Twitter"""
-        if not date_str:
-            return datetime.now()
-        
+    async def _safe_fetch(self, name: str, fetch: Callable[[], Awaitable[List[Tweet]]]) -> List[Tweet]:
+        """Appeler un fournisseur (erreurs → liste vide)"""
         try:
-            # Format Twitter classique
-            return datetime.strptime(date_str, "%a %b %d %H:%M:%S +0000 %Y")
-        except:
-            try:
-                # Format ISO
-                return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            except:
-                return datetime.now()
+            return await fetch()
+        except Exception as e:
+            logger.warning(f"{name} échoué: {e}")
+            return []
     
-    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
-        """Méthode principale qui essaie plusieurs APIs"""
-        tweets = []
+    def _providers(self, username: str, since_id: Optional[str], limit: int) -> List[Provider]:
+        """Fournisseurs configurés, dans l'ordre de préférence"""
+        providers: List[Provider] = []
         
-        # Essayer les APIs dans l'ordre de préférence
-        
-        # 0. Twitter241 (si disponible) - PRIORITAIRE
         if self.rapidapi_key:
-            logger.info(f"Tentative via Twitter241 pour @{username}")
-            try:
-                from .twitter241_scraper import Twitter241Scraper
-                async with Twitter241Scraper() as scraper:
-                    tweets = await scraper.fetch_tweets(username, since_id, limit)
-                    if tweets:
-                        logger.info(f"✅ Succès Twitter241: {len(tweets)} tweets")
-                        return tweets
-            except Exception as e:
-                logger.warning(f"Twitter241 échoué: {e}")
-        
-        # 1. RapidAPI autres APIs (gratuit jusqu'à 100-500 requêtes/mois)
-        if self.rapidapi_key:
-            logger.info(f"Tentative via RapidAPI générique pour @{username}")
-            tweets = await self.fetch_via_rapidapi_free(username, limit)
-            if tweets:
-                logger.info(f"✅ Succès RapidAPI: {len(tweets)} tweets")
-                return tweets
+            # 0. Twitter241 - PRIORITAIRE
+            providers.append(('Twitter241', 'twitter241', lambda: self.fetch_via_twitter241(username, since_id, limit)))
+            # 1. RapidAPI autres APIs (gratuit jusqu'à 100-500 requêtes/mois)
+            providers.append(('RapidAPI', 'twitter135', lambda: self.fetch_via_rapidapi_free(username, limit)))
         
         # 2. TwitterAPI.io (très peu cher, 0.15$/1000 tweets)
         if self.twitterapi_io_key:
-            logger.info(f"Tentative via TwitterAPI.io pour @{username}")
-            tweets = await self.fetch_via_twitterapi_io(username, limit)
+            providers.append(('TwitterAPI.io', 'twitterapi_io', lambda: self.fetch_via_twitterapi_io(username, limit)))
+        
+        # 3. Services proxy gratuits (disjoncteur vérifié par service)
+        providers.append(('proxy', None, lambda: self.fetch_via_free_proxy(username, limit)))
+        
+        return providers
+    
+    def _available(self, name: str, key: Optional[str]) -> bool:
+        """Disjoncteur vérifié juste avant l'appel: available() réserve la requête de test
+        d'un fournisseur semi-ouvert, qui doit donc être réellement appelé ensuite"""
+        if key and not provider_health.available(key):
+            logger.debug(f"{name} ignoré (disjoncteur {provider_health.state(key)})")
+            return False
+        return True
+    
+    async def _fetch_hedged(self, username: str, providers: List[Provider]) -> Tuple[Optional[str], List[Tweet]]:
+        """Requêtes couvertes: si le fournisseur en cours n'a pas répondu après son
+        délai de couverture, lancer le suivant en parallèle; le premier résultat
+        non vide l'emporte et les requêtes restantes sont annulées.
+        """
+        remaining = list(providers)
+        pending: Dict[asyncio.Task, str] = {}
+        last_launched = None
+        
+        def launch() -> bool:
+            """Lancer le prochain fournisseur disponible (False s'il n'y en a plus)"""
+            nonlocal last_launched
+            while remaining:
+                name, key, fetch = remaining.pop(0)
+                if not self._available(name, key):
+                    continue
+                logger.info(f"Tentative via {name} pour @{username}")
+                pending[asyncio.create_task(self._safe_fetch(name, fetch))] = name
+                last_launched = (name, key)
+                return True
+            return False
+        
+        if not launch():
+            return None, []
+        
+        try:
+            while pending:
+                timeout = self.hedge_delay(last_launched[1]) if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    logger.info(f"{last_launched[0]} lent (> {timeout:.1f}s), requête couverte")
+                    launch()
+                    continue
+                
+                for task in done:
+                    name = pending.pop(task)
+                    tweets = task.result()
+                    if tweets:
+                        return name, tweets
+                
+                # Réponses vides: passer au fournisseur suivant sans attendre
+                if not pending and remaining:
+                    launch()
+            
+            return None, []
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Tweet]:
+        """Méthode principale qui essaie plusieurs APIs"""
+        providers = self._providers(username, since_id, limit)
+        
+        if settings.hedged_requests:
+            name, tweets = await self._fetch_hedged(username, providers)
             if tweets:
-                logger.info(f"✅ Succès TwitterAPI.io: {len(tweets)} tweets")
+                logger.info(f"✅ Succès {name}: {len(tweets)} tweets")
                 return tweets
-        
-        # 3. Services proxy gratuits
-        logger.info(f"Tentative via proxies gratuits pour @{username}")
-        tweets = await self.fetch_via_free_proxy(username, limit)
-        if tweets:
-            logger.info(f"✅ Succès proxy: {len(tweets)} tweets")
-            return tweets
+        else:
+            # Essayer les APIs dans l'ordre de préférence
+            for name, key, fetch in providers:
+                if not self._available(name, key):
+                    continue
+                logger.info(f"Tentative via {name} pour @{username}")
+                tweets = await self._safe_fetch(name, fetch)
+                if tweets:
+                    logger.info(f"✅ Succès {name}: {len(tweets)} tweets")
+                    return tweets
         
         logger.warning(f"Aucune API disponible pour récupérer les tweets de @{username}")
-        return []
\ No newline at end of file
+        return []
@@ -1,17 +1,19 @@
 """Scraper utilisant les instances Nitter (gratuit et sans authentification)"""
-import asyncio
-import aiohttp
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Optional
 from datetime import datetime
 import re
 from bs4 import BeautifulSoup
 import random
 try:
     from ..utils.logger import get_logger
-    from ..config import settings
+    from ..utils.http_client import http_client
+    from ..utils.provider_health import provider_health
+    from ..models.tweet import Tweet, Media
 except ImportError:
     from utils.logger import get_logger
-    from config import settings
+    from utils.http_client import http_client
+    from utils.provider_health import provider_health
+    from models.tweet import Tweet, Media
 
 logger = get_logger(__name__)
 
@@ -35,21 +37,31 @@ class NitterScraper:
         }
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        # Session partagée par tout le processus (fermée par http_client.close())
+        self.session = await http_client.get_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.session = None
+    
+    def _select_instance(self, exclude: Optional[set] = None) -> Optional[str]:
+        """Sélectionner une instance Nitter aléatoire parmi celles dont le disjoncteur est fermé"""
+        candidates = [instance for instance in self.NITTER_INSTANCES if not exclude or instance not in exclude]
+        random.shuffle(candidates)
+        for instance in candidates:
+            if provider_health.available(f"nitter:{instance}"):
+                return instance
+        return None
     
-    def _select_instance(self) -> str:
-        """Sélectionner une instance Nitter aléatoire"""
-        return random.choice(self.NITTER_INSTANCES)
+    @staticmethod
+    def _instance_url(instance: str) -> str:
+        """URL de base d'une instance (https par défaut)"""
+        return instance.rstrip('/') if '://' in instance else f"https://{instance}"
     
-    async def _fetch_page(self, url: str) -> Optional[str]:
+    async def _fetch_page(self, url: str, provider: str = "nitter") -> Optional[str]:
         """Récupérer le contenu HTML d'une page"""
         try:
-            async with self.session.get(url, timeout=10) as response:
+            async with http_client.request(provider, 'GET', url, headers=self.headers, timeout=10) as response:
                 if response.status == 200:
                     return await response.text()
                 else:
@@ -59,7 +71,7 @@ class NitterScraper:
             logger.error(f"Erreur fetch {url}: {e}")
             return None
     
-    def _parse_tweet_card(self, tweet_element) -> Optional[Dict[str, Any]]:
+    def _parse_tweet_card(self, tweet_element, username: str) -> Optional[Tweet]:
         """Parser un élément tweet HTML de Nitter"""
         try:
             # ID du tweet
@@ -116,34 +128,25 @@ class NitterScraper:
                         # Extraire l'ID de l'image
                         media_id = src.split('/pic/')[-1].split('?')[0]
                         twitter_url = f"https://pbs.twimg.com/media/{media_id}"
-                        media.append({
-                            'type': 'photo',
-                            'url': twitter_url
-                        })
+                        media.append(Media('photo', twitter_url))
             
             # Vidéos
             video_elem = tweet_element.find('video')
             if video_elem:
                 video_src = video_elem.find('source')
                 if video_src:
-                    media.append({
-                        'type': 'video',
-                        'url': video_src.get('src', '')
-                    })
-            
-            return {
-                'id': tweet_id,
-                'text': text,
-                'created_at': self._parse_date(date_str),
-                'url': f"https://twitter.com/{tweet_element.get('data-username', 'user')}/status/{tweet_id}",
-                'media': media,
-                'likes': likes,
-                'retweets': retweets,
-                'replies': replies,
-                'is_retweet': 'RT @' in text,
-                'is_quote': False,  # Plus difficile à détecter
-                'reply_to': None
-            }
+                    media.append(Media('video', video_src.get('src', '')))
+            
+            return Tweet.from_nitter(
+                tweet_id=tweet_id,
+                text=text,
+                created_at=self._parse_date(date_str),
+                username=username,
+                media=media,
+                likes=likes,
+                retweets=retweets,
+                replies=replies
+            )
             
         except Exception as e:
             logger.error(f"Erreur parsing tweet: {e}")
@@ -165,18 +168,23 @@ class NitterScraper:
         except:
             return datetime.now()
     
-    async def fetch_tweets(self, username: str, limit: int = 20) -> List[Dict[str, Any]]:
+    async def fetch_tweets(self, username: str, limit: int = 20) -> List[Tweet]:
         """Récupérer les tweets d'un utilisateur via Nitter"""
         tweets = []
         
         # Essayer plusieurs instances si nécessaire
+        tried = set()
         for _ in range(3):
-            instance = self._select_instance()
-            url = f"https://{instance}/{username}"
+            instance = self._select_instance(exclude=tried)
+            if not instance:
+                logger.warning("Aucune instance Nitter disponible")
+                break
+            tried.add(instance)
+            url = f"{self._instance_url(instance)}/{username}"
             
             logger.info(f"Scraping {username} via {instance}")
             
-            html = await self._fetch_page(url)
+            html = await self._fetch_page(url, provider=f"nitter:{instance}")
             if not html:
                 logger.warning(f"Échec avec {instance}, essai suivant...")
                 continue
@@ -199,10 +207,8 @@ class NitterScraper:
             tweet_elements = timeline.find_all('div', class_='timeline-item')
             
             for tweet_elem in tweet_elements[:limit]:
-                tweet_data = self._parse_tweet_card(tweet_elem)
+                tweet_data = self._parse_tweet_card(tweet_elem, username)
                 if tweet_data:
-                    tweet_data['author'] = username
-                    tweet_data['author_name'] = username.title()
                     tweets.append(tweet_data)
             
             if tweets:
@@ -215,13 +221,12 @@ class NitterScraper:
         """Tester quelles instances Nitter sont actives"""
         results = {}
         
-        async with aiohttp.ClientSession(headers=self.headers) as session:
-            for instance in self.NITTER_INSTANCES:
-                try:
-                    url = f"https://{instance}/Twitter"
-                    async with session.get(url, timeout=5) as response:
-                        results[instance] = response.status == 200
-                except:
-                    results[instance] = False
+        for instance in self.NITTER_INSTANCES:
+            try:
+                url = f"{self._instance_url(instance)}/Twitter"
+                async with http_client.request(f"nitter:{instance}", 'GET', url, headers=self.headers, timeout=5) as response:
+                    results[instance] = response.status == 200
+            except:
+                results[instance] = False
                     
         return results
\ No newline at end of file
@@ -1,60 +1,111 @@
 """Scraper utilisant les flux RSS alternatifs pour Twitter"""
-import asyncio
-import aiohttp
 import feedparser
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
-import re
+from collections import OrderedDict
 try:
     from ..utils.logger import get_logger
+    from ..utils.http_client import http_client
+    from ..utils.provider_health import provider_health
+    from ..models.tweet import Tweet
     from ..config import settings
 except ImportError:
     from utils.logger import get_logger
+    from utils.http_client import http_client
+    from utils.provider_health import provider_health
+    from models.tweet import Tweet
     from config import settings
 
 logger = get_logger(__name__)
 
+# Réponse 304: le flux n'a pas changé depuis la dernière lecture
+NOT_MODIFIED = object()
+
+class FeedValidators:
+    """Validateurs HTTP (ETag / Last-Modified) par URL de flux, en LRU borné"""
+    
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+    
+    def get(self, url: str) -> Dict[str, str]:
+        known = self._entries.get(url)
+        if known is None:
+            return {}
+        self._entries.move_to_end(url)
+        return known
+    
+    def set(self, url: str, validators: Dict[str, str]):
+        self._entries[url] = validators
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class RSSTwitterScraper:
     """Scraper utilisant des services RSS pour Twitter"""
     
-    # Services RSS pour Twitter
+    # Services RSS pour Twitter, par ordre de préférence
+    # (les services en panne sont ignorés par le disjoncteur puis retestés)
     RSS_SERVICES = [
         {
             'name': 'RSSHub',
-            'url': 'https://rsshub.app/twitter/user/{username}',
-            'active': True
+            'url': 'https://rsshub.app/twitter/user/{username}'
         },
         {
             'name': 'Nitter RSS',
-            'url': 'https://nitter.net/{username}/rss',
-            'active': False  # Actuellement down
+            'url': 'https://nitter.net/{username}/rss'
         },
         {
             'name': 'TwitRSS',
-            'url': 'https://twitrss.me/twitter_user_to_rss/?user={username}',
-            'active': False
+            'url': 'https://twitrss.me/twitter_user_to_rss/?user={username}'
         }
     ]
     
-    def __init__(self):
+    def __init__(self, validators: Optional[FeedValidators] = None):
         self.session = None
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (compatible; TwitterBot/1.0)'
         }
+        # Validateurs connus (fournis par HybridScraper pour durer entre les appels)
+        self.validators = validators if validators is not None else FeedValidators(settings.rss_validators_size)
+        # Vrai si le dernier fetch_tweets s'est arrêté sur un 304
+        self.not_modified = False
+        # (URL, validateurs) du flux lu, à enregistrer par l'appelant une fois les tweets publiés
+        self.received: Optional[Tuple[str, Dict[str, str]]] = None
+        self._received_validators: Dict[str, str] = {}
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        # Session partagée par tout le processus (fermée par http_client.close())
+        self.session = await http_client.get_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.session = None
     
-    async def _fetch_rss(self, url: str) -> Optional[str]:
-        """Récupérer le flux RSS"""
+    async def _fetch_rss(self, url: str, provider: str = "rss") -> Any:
+        """Récupérer le flux RSS (requête conditionnelle, NOT_MODIFIED sur un 304)"""
+        headers = dict(self.headers)
+        known = self.validators.get(url)
+        if 'etag' in known:
+            headers['If-None-Match'] = known['etag']
+        if 'last_modified' in known:
+            headers['If-Modified-Since'] = known['last_modified']
+        
         try:
-            async with self.session.get(url, timeout=10) as response:
-                if response.status == 200:
+            async with http_client.request(provider, 'GET', url, headers=headers, timeout=10) as response:
+                if response.status == 304:
+                    return NOT_MODIFIED
+                elif response.status == 200:
+                    # Conservés seulement si le flux est parsé avec succès
+                    self._received_validators = {
+                        key: value for key, value in (
+                            ('etag', response.headers.get('ETag')),
+                            ('last_modified', response.headers.get('Last-Modified'))
+                        ) if value
+                    }
                     return await response.text()
                 else:
                     logger.warning(f"Erreur HTTP {response.status} pour {url}")
@@ -63,75 +114,30 @@ class RSSTwitterScraper:
             logger.error(f"Erreur fetch RSS {url}: {e}")
             return None
     
-    def _parse_rss_entry(self, entry, username: str) -> Dict[str, Any]:
-        """Parser une entrée RSS en format tweet"""
-        # Extraire l'ID du tweet depuis le lien
-        tweet_id = None
-        if hasattr(entry, 'link'):
-            match = re.search(r'/status/(\d+)', entry.link)
-            if match:
-                tweet_id = match.group(1)
-        
-        if not tweet_id and hasattr(entry, 'id'):
-            # Certains flux utilisent l'ID directement
-            tweet_id = entry.id.split('/')[-1]
-        
-        # Texte du tweet
-        text = ""
-        if hasattr(entry, 'summary'):
-            text = entry.summary
-        elif hasattr(entry, 'description'):
-            text = entry.description
-        elif hasattr(entry, 'title'):
-            text = entry.title
-        
-        # Nettoyer le HTML
-        text = re.sub(r'<[^>]+>', '', text)
-        text = text.strip()
-        
-        # Date
-        published_date = datetime.now()
-        if hasattr(entry, 'published_parsed'):
-            published_date = datetime(*entry.published_parsed[:6])
-        
-        # Extraire les médias si présents
-        media = []
-        if hasattr(entry, 'links'):
-            for link in entry.links:
-                if link.get('type', '').startswith('image/'):
-                    media.append({
-                        'type': 'photo',
-                        'url': link.get('href', '')
-                    })
-        
-        return {
-            'id': tweet_id or f"rss_{hash(text)}",
-            'text': text,
-            'created_at': published_date,
-            'author': username,
-            'author_name': username.title(),
-            'url': entry.link if hasattr(entry, 'link') else f"https://twitter.com/{username}",
-            'media': media,
-            'is_retweet': text.startswith('RT @'),
-            'is_quote': False,
-            'reply_to': None,
-            'likes': 0,
-            'retweets': 0,
-            'replies': 0
-        }
+    def _parse_rss_entry(self, entry, username: str) -> Tweet:
+        """Parser une entrée RSS en Tweet"""
+        return Tweet.from_rss_entry(entry, username)
     
-    async def fetch_tweets(self, username: str, limit: int = 20) -> List[Dict[str, Any]]:
+    async def fetch_tweets(self, username: str, limit: int = 20) -> List[Tweet]:
         """Récupérer les tweets via RSS"""
         tweets = []
+        self.not_modified = False
+        self.received = None
         
         for service in self.RSS_SERVICES:
-            if not service['active']:
+            if not provider_health.available(f"rss:{service['name']}"):
+                logger.debug(f"{service['name']} ignoré (disjoncteur ouvert)")
                 continue
                 
             url = service['url'].format(username=username)
             logger.info(f"Tentative RSS via {service['name']} pour @{username}")
             
-            rss_content = await self._fetch_rss(url)
+            rss_content = await self._fetch_rss(url, provider=f"rss:{service['name']}")
+            if rss_content is NOT_MODIFIED:
+                # Flux inchangé: ni téléchargement ni parsing
+                logger.debug(f"Flux {service['name']} inchangé pour @{username} (304)")
+                self.not_modified = True
+                break
             if not rss_content:
                 continue
             
@@ -148,6 +154,10 @@ class RSSTwitterScraper:
                     tweet = self._parse_rss_entry(entry, username)
                     tweets.append(tweet)
                 
+                if self._received_validators:
+                    # Pas encore enregistrés: un 304 ne doit pas masquer des tweets non publiés
+                    self.received = (url, self._received_validators)
+                
                 logger.info(f"Récupéré {len(tweets)} tweets via {service['name']}")
                 break
                 
@@ -162,17 +172,44 @@ class HybridScraper:
     """Scraper hybride qui essaie plusieurs méthodes"""
     
     def __init__(self):
-        self.rss_scraper = RSSTwitterScraper()
         self.last_method = None
+        self.validators = FeedValidators(settings.rss_validators_size)
+        # Validateurs reçus par compte, en attente de confirm_feed
+        self._unconfirmed: Dict[str, Tuple[str, Dict[str, str]]] = {}
     
-    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
-        """Récupérer les tweets en essayant plusieurs méthodes"""
+    def confirm_feed(self, username: str):
+        """Enregistrer les validateurs du dernier flux lu (tweets publiés ou déjà connus)"""
+        received = self._unconfirmed.pop(username, None)
+        if received:
+            self.validators.set(*received)
+    
+    def discard_feed(self, username: str):
+        """Oublier les validateurs reçus: le flux sera relu en entier"""
+        self._unconfirmed.pop(username, None)
+    
+    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Tweet]:
+        """Récupérer les tweets en essayant plusieurs méthodes
+        
+        Les validateurs du flux lu ne servent aux requêtes suivantes qu'après
+        confirm_feed(username).
+        """
         
         # Méthode 1: RSS
         logger.info(f"Tentative de récupération via RSS pour @{username}")
-        async with self.rss_scraper as scraper:
+        # Une instance par appel: les comptes peuvent être traités en parallèle
+        async with RSSTwitterScraper(self.validators) as scraper:
             tweets = await scraper.fetch_tweets(username, limit)
         
+        if scraper.received:
+            self._unconfirmed[username] = scraper.received
+        else:
+            self._unconfirmed.pop(username, None)
+        
+        # Flux inchangé depuis la dernière vérification: rien de nouveau
+        if scraper.not_modified:
+            self.last_method = "RSS"
+            return []
+        
         if tweets:
             self.last_method = "RSS"
             logger.info(f"✅ Succès avec RSS: {len(tweets)} tweets")
@@ -188,19 +225,12 @@ class HybridScraper:
         self.last_method = "DEMO"
         
         return [
-            {
-                'id': f'demo_{username}_1',
-                'text': f'🤖 Tweet de démo pour @{username}\n\nLe scraping Twitter est temporairement indisponible.',
-                'created_at': datetime.now(),
-                'author': username,
-                'author_name': username.title(),
-                'url': f'https://twitter.com/{username}',
-                'media': [],
-                'is_retweet': False,
-                'is_quote': False,
-                'reply_to': None,
-                'likes': 0,
-                'retweets': 0,
-                'replies': 0
-            }
+            Tweet(
+                id=f'demo_{username}_1',
+                text=f'🤖 Tweet de démo pour @{username}\n\nLe scraping Twitter est temporairement indisponible.',
+                created_at=datetime.now(),
+                author=username,
+                author_name=username.title(),
+                url=f'https://twitter.com/{username}'
+            )
         ]
\ No newline at end of file
@@ -1,14 +1,12 @@
 """Scraper Twitter simplifié pour tester sans authentification"""
-import asyncio
-import aiohttp
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import re
-import json
 try:
     from ..utils.logger import get_logger
+    from ..utils.http_client import http_client
 except ImportError:
     from utils.logger import get_logger
+    from utils.http_client import http_client
 
 logger = get_logger(__name__)
 
@@ -22,12 +20,12 @@ class SimpleTwitterScraper:
         }
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Session partagée par tout le processus (fermée par http_client.close())
+        self.session = await http_client.get_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        self.session = None
     
     async def get_demo_tweets(self, username: str) -> List[Dict[str, Any]]:
         """Récupérer des tweets de démonstration pour tester"""
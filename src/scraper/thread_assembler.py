@@ -0,0 +1,170 @@
+"""Reconstitution des threads (auto-réponses) avec le moins d'appels possible
+
+Au lieu de remonter un thread tweet par tweet (un appel réseau par niveau),
+les threads sont reconstitués à partir de ce qui est déjà connu:
+
+1. les auto-réponses dont le parent est dans le lot récupéré sont reliées
+   sans aucun appel;
+2. les parents restants sont cherchés dans le cache des cycles précédents
+   (le parent d'une suite de thread est en général le dernier tweet publié,
+   que since_id exclut du lot);
+3. seuls les ancêtres encore manquants sont récupérés, tous les IDs connus
+   d'un même niveau en parallèle, au plus max_depth niveaux.
+
+Un thread incomplet (ancêtre supprimé, erreur, profondeur atteinte) est
+gardé tel quel dans le cache: les cycles suivants s'y rattachent sans
+redemander ses ancêtres.
+
+Les ancêtres hors du lot ne servent que de contexte (relier les tweets du
+lot entre eux): ils ne sont jamais rendus à l'appelant, qui ne doit publier
+que des tweets récupérés (un ancêtre peut être trop ancien, antérieur à
+l'ajout du compte ou déjà purgé de published_tweets).
+"""
+import asyncio
+from collections import ChainMap, OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional
+try:
+    from ..utils.logger import get_logger
+    from ..models.tweet import Tweet
+    from ..models.database import tweet_id_sort_key
+except ImportError:
+    from utils.logger import get_logger
+    from models.tweet import Tweet
+    from models.database import tweet_id_sort_key
+
+logger = get_logger(__name__)
+
+TweetFetcher = Callable[[str], Awaitable[Optional[Tweet]]]
+
+class ThreadAssembler:
+    """Regroupe les tweets d'un lot en threads, ancêtres manquants compris
+
+    `fetch_tweet` récupère un tweet par son ID (None si le backend ne le
+    permet pas: seuls le lot et le cache servent alors). Le cache, partagé
+    par tous les comptes, garde les derniers tweets vus (LRU) ainsi que les
+    IDs introuvables, pour ne pas les redemander à chaque cycle.
+    """
+
+    def __init__(self, fetch_tweet: Optional[TweetFetcher] = None, concurrency: int = 4,
+                 max_depth: int = 20, cache_size: int = 5000):
+        self.fetch_tweet = fetch_tweet
+        self.max_depth = max_depth
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[str, Tweet]" = OrderedDict()
+        self.unavailable: "OrderedDict[str, None]" = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.fetched = 0
+
+    def _remember(self, tweets: Iterable[Tweet]):
+        for tweet in tweets:
+            self.cache[tweet['id']] = tweet
+            self.cache.move_to_end(tweet['id'])
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def _mark_unavailable(self, tweet_id: str):
+        self.unavailable[tweet_id] = None
+        while len(self.unavailable) > self.cache_size:
+            self.unavailable.popitem(last=False)
+
+    @staticmethod
+    def _parent_id(tweet: Tweet, username: str, known: Mapping[str, Tweet]) -> Optional[str]:
+        """ID du parent si le tweet répond à son propre auteur (parent connu ou non)"""
+        parent_id = tweet.get('reply_to')
+        if not parent_id:
+            return None
+        parent = known.get(parent_id)
+        if parent is not None:
+            return parent_id if parent['author'].lower() == username else None
+        # Parent inconnu: l'auteur visé est indiqué par la plupart des backends
+        reply_to_user = tweet.get('reply_to_user')
+        return parent_id if reply_to_user and reply_to_user.lower() == username else None
+
+    def _top(self, tweet: Tweet, username: str, known: Mapping[str, Tweet]) -> Tweet:
+        """Plus ancien ancêtre connu du tweet dans son thread"""
+        seen = {tweet['id']}
+        while True:
+            parent_id = self._parent_id(tweet, username, known)
+            if parent_id not in known or parent_id in seen:
+                return tweet
+            tweet = known[parent_id]
+            seen.add(parent_id)
+
+    async def _fetch(self, tweet_id: str) -> Optional[Tweet]:
+        async with self._semaphore:
+            try:
+                tweet = await self.fetch_tweet(tweet_id)
+            except Exception as e:
+                # Erreur passagère: l'ID sera redemandé au prochain cycle
+                logger.warning(f"Récupération du tweet {tweet_id} (thread) échouée: {e}")
+                return None
+        self.fetched += 1
+        if tweet is None:
+            self._mark_unavailable(tweet_id)
+        return tweet
+
+    async def assemble(self, username: str, tweets: List[Tweet],
+                       with_ancestors: bool = False) -> List[List[Tweet]]:
+        """Threads du lot (tweets du plus ancien au plus récent), dans le même ordre
+
+        Les tweets du lot qui ont un ancêtre commun connu forment un thread
+        (un tweet isolé forme un thread d'un seul tweet); chaque tweet du lot
+        apparaît dans exactement un thread. Les ancêtres hors du lot ne
+        figurent dans le résultat qu'avec `with_ancestors` (affichage d'un
+        thread complet, jamais pour choisir les tweets à publier).
+        """
+        username = username.lower()
+        batch = list(tweets)
+        # Tweets de ce cycle (lot, ancêtres récupérés), puis cache (sans copie)
+        current: Dict[str, Tweet] = {tweet['id']: tweet for tweet in batch}
+        known = ChainMap(current, self.cache)
+
+        # Ancêtres manquants, niveau par niveau (tous les IDs d'un niveau en parallèle)
+        for _ in range(self.max_depth if self.fetch_tweet else 0):
+            missing = set()
+            for tweet in batch:
+                top = self._top(tweet, username, known)
+                if top['id'] not in current:
+                    # Thread d'un cycle précédent: déjà remonté, rien à récupérer au-dessus
+                    continue
+                parent_id = self._parent_id(top, username, known)
+                if parent_id and parent_id not in known and parent_id not in self.unavailable:
+                    missing.add(parent_id)
+            if not missing:
+                break
+
+            fetched = await asyncio.gather(*(self._fetch(tweet_id) for tweet_id in missing))
+            found = [tweet for tweet in fetched if tweet is not None]
+            if not found:
+                break
+            current.update((tweet['id'], tweet) for tweet in found)
+            self._remember(found)
+
+        # Regrouper par ancêtre commun (ancêtres hors du lot gardés seulement sur demande)
+        threads: Dict[str, Dict[str, Tweet]] = {}
+        for tweet in batch:
+            chain = {tweet['id']: tweet}
+            current = tweet
+            while True:
+                parent_id = self._parent_id(current, username, known)
+                if parent_id not in known or parent_id in chain:
+                    break
+                current = known[parent_id]
+                chain[parent_id] = current
+            thread = threads.setdefault(current['id'], {})
+            if with_ancestors:
+                thread.update(chain)
+            else:
+                thread[tweet['id']] = tweet
+
+        self._remember(batch)
+
+        # Dans un thread (IDs Twitter numériques), l'ordre des IDs est l'ordre chronologique
+        result = [
+            sorted(thread.values(), key=lambda tweet: tweet_id_sort_key(tweet['id']))
+            for thread in threads.values()
+        ]
+        assembled = sum(1 for thread in result if len(thread) > 1)
+        if assembled:
+            logger.debug(f"@{username}: {assembled} thread(s) reconstitué(s), {self.fetched} tweet(s) récupéré(s) au total")
+        return result
@@ -1,16 +1,18 @@
 """Scraper utilisant Twitter241 API de RapidAPI"""
-import asyncio
-import aiohttp
 import json
-from typing import List, Dict, Any, Optional
-import time
-from datetime import datetime
+from typing import Dict, Iterator, List, Optional
 import os
 try:
     from ..utils.logger import get_logger
+    from ..utils.http_client import http_client
+    from ..utils.json_codec import read_json, decode_timeline, materialize
+    from ..models.tweet import Tweet
     from ..config import settings
 except ImportError:
     from utils.logger import get_logger
+    from utils.http_client import http_client
+    from utils.json_codec import read_json, decode_timeline, materialize
+    from models.tweet import Tweet
     from config import settings
 
 logger = get_logger(__name__)
@@ -18,43 +20,50 @@ logger = get_logger(__name__)
 class Twitter241Scraper:
     """Scraper utilisant Twitter241 API"""
     
-    # Cache des IDs utilisateurs connus
+    # Cache des IDs utilisateurs connus (complété au démarrage depuis twitter_accounts.twitter_id)
     USER_ID_CACHE = {
         'swarek_': '2794288012',
         'elonmusk': '44196397',
         'mrbeast': '2455740283'
     }
     
+    @classmethod
+    def load_user_ids(cls, user_ids: Dict[str, str]):
+        """Charger des IDs déjà résolus (username -> rest_id)"""
+        cls.USER_ID_CACHE.update({username.lower(): user_id for username, user_id in user_ids.items()})
+        logger.info(f"{len(cls.USER_ID_CACHE)} IDs utilisateurs en cache")
+    
+    async def _persist_user_id(self, username: str, user_id: str):
+        """Enregistrer l'ID en base pour éviter la requête /user aux prochains démarrages"""
+        try:
+            from ..models import db
+        except ImportError:
+            from models import db
+        
+        if not db.pool:
+            return
+        
+        try:
+            await db.set_twitter_id(username, user_id)
+        except Exception as e:
+            logger.warning(f"Impossible d'enregistrer l'ID de @{username}: {e}")
+    
     def __init__(self):
         self.session = None
         self.rapidapi_key = os.getenv('RAPIDAPI_KEY', '')
         self.host = 'twitter241.p.rapidapi.com'
-        self.base_url = f'https://{self.host}'
-        self.last_request_time = 0
-        self.min_delay = 2.0  # Délai minimum entre requêtes (2 secondes)
+        self.base_url = settings.twitter241_base_url.rstrip('/')
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # Session partagée par tout le processus (fermée par http_client.close())
+        self.session = await http_client.get_session()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
-    
-    async def _rate_limit(self):
-        """Gérer le rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_delay:
-            delay = self.min_delay - time_since_last
-            logger.debug(f"Rate limit: attente de {delay:.1f}s")
-            await asyncio.sleep(delay)
-        self.last_request_time = time.time()
+        self.session = None
     
     async def get_user_info(self, username: str) -> Optional[Dict]:
         """Récupérer les infos d'un utilisateur"""
-        await self._rate_limit()
-        
         url = f"{self.base_url}/user"
         headers = {
             'x-rapidapi-host': self.host,
@@ -63,9 +72,10 @@ class Twitter241Scraper:
         params = {'username': username}
         
         try:
-            async with self.session.get(url, headers=headers, params=params) as response:
+            # Débit et quota gérés par le limiteur partagé (settings.provider_rate_limits)
+            async with http_client.request('twitter241', 'GET', url, headers=headers, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = await read_json(response)
                     logger.info(f"✅ Infos utilisateur récupérées pour @{username}")
                     
                     # Mettre en cache l'ID
@@ -74,6 +84,7 @@ class Twitter241Scraper:
                         user_id = user_data.get('rest_id')
                         if user_id:
                             self.USER_ID_CACHE[username.lower()] = user_id
+                            await self._persist_user_id(username, user_id)
                     
                     return data
                 elif response.status == 429:
@@ -86,7 +97,7 @@ class Twitter241Scraper:
             logger.error(f"Exception get_user_info: {e}")
             return None
     
-    async def get_user_tweets(self, username: str, limit: int = 20) -> List[Dict[str, Any]]:
+    async def get_user_tweets(self, username: str, limit: int = 20, since_id: Optional[str] = None) -> List[Tweet]:
         """Récupérer les tweets d'un utilisateur"""
         # Vérifier le cache d'abord
         user_id = self.USER_ID_CACHE.get(username.lower())
@@ -105,9 +116,6 @@ class Twitter241Scraper:
         
         logger.info(f"ID utilisateur pour @{username}: {user_id}")
         
-        # Rate limiting
-        await self._rate_limit()
-        
         # Récupérer les tweets
         url = f"{self.base_url}/user-tweets"
         headers = {
@@ -120,11 +128,13 @@ class Twitter241Scraper:
         }
         
         try:
-            async with self.session.get(url, headers=headers, params=params) as response:
+            # Débit et quota gérés par le limiteur partagé (settings.provider_rate_limits)
+            async with http_client.request('twitter241', 'GET', url, headers=headers, params=params) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    # Décodage partiel: les tweets restent bruts jusqu'au parsing
+                    data = decode_timeline(await response.read())
                     logger.info(f"✅ Tweets récupérés pour @{username}")
-                    return self._parse_tweets(data, username)
+                    return self._parse_tweets(data, username, since_id)
                 elif response.status == 429:
                     logger.warning(f"Rate limit atteint (429) pour les tweets")
                     return []
@@ -137,34 +147,55 @@ class Twitter241Scraper:
             logger.error(f"Exception get_user_tweets: {e}")
             return []
     
-    def _parse_tweets(self, data: Dict, username: str) -> List[Dict[str, Any]]:
-        """Parser les tweets de Twitter241"""
+    def _iter_tweet_results(self, data: Dict) -> Iterator[Dict]:
+        """Tweets bruts de la réponse, dans l'ordre de la timeline (du plus récent au plus ancien)"""
+        # Navigation dans la structure de l'API - Structure corrigée
+        timeline = data.get('result', {}).get('timeline', {})
+        instructions = timeline.get('instructions', [])
+        
+        logger.debug(f"Nombre d'instructions: {len(instructions)}")
+        
+        for instruction in instructions:
+            if instruction.get('type') != 'TimelineAddEntries':
+                continue
+            
+            for entry in instruction.get('entries', []):
+                # Extraire le tweet
+                content = entry.get('content', {})
+                if content.get('entryType') == 'TimelineTimelineItem':
+                    tweet_result = materialize(content.get('itemContent', {}).get('tweet_results', {}).get('result', {}))
+                    
+                    if tweet_result and tweet_result.get('__typename') == 'Tweet':
+                        yield tweet_result
+    
+    @staticmethod
+    def _reached_cursor(tweet_id: str, since_id: str) -> bool:
+        """Le tweet est-il le curseur ou plus ancien que lui ?"""
+        if tweet_id == since_id:
+            return True
+        if tweet_id.isdigit() and since_id.isdigit():
+            return int(tweet_id) <= int(since_id)
+        return False
+    
+    def _parse_tweets(self, data: Dict, username: str, since_id: Optional[str] = None) -> List[Tweet]:
+        """Parser les tweets de Twitter241, en s'arrêtant au curseur since_id
+        
+        Seuls les tweets plus récents que since_id sont formatés: lors d'une
+        vérification sans nouveauté, le parsing s'arrête dès la première entrée.
+        """
         tweets = []
         
         try:
             # Debug: voir la structure de la réponse
             logger.debug(f"Clés principales de la réponse: {list(data.keys())}")
             
-            # Navigation dans la structure de l'API - Structure corrigée
-            timeline = data.get('result', {}).get('timeline', {})
-            instructions = timeline.get('instructions', [])
-            
-            logger.debug(f"Nombre d'instructions: {len(instructions)}")
-            
-            for instruction in instructions:
-                if instruction.get('type') == 'TimelineAddEntries':
-                    entries = instruction.get('entries', [])
-                    
-                    for entry in entries:
-                        # Extraire le tweet
-                        content = entry.get('content', {})
-                        if content.get('entryType') == 'TimelineTimelineItem':
-                            tweet_result = content.get('itemContent', {}).get('tweet_results', {}).get('result', {})
-                            
-                            if tweet_result and tweet_result.get('__typename') == 'Tweet':
-                                tweet = self._format_tweet(tweet_result, username)
-                                if tweet:
-                                    tweets.append(tweet)
+            for tweet_result in self._iter_tweet_results(data):
+                if since_id and self._reached_cursor(tweet_result.get('rest_id', ''), since_id):
+                    break
+                
+                tweet = self._format_tweet(tweet_result, username)
+                if tweet:
+                    tweets.append(tweet)
                         
         except Exception as e:
             logger.error(f"Erreur parsing tweets: {e}")
@@ -175,107 +206,15 @@ class Twitter241Scraper:
         
         return tweets
     
-    def _format_tweet(self, tweet_data: Dict, username: str) -> Optional[Dict[str, Any]]:
+    def _format_tweet(self, tweet_data: Dict, username: str) -> Optional[Tweet]:
         """Formater un tweet Twitter241"""
         try:
-            # Extraire les données du tweet
-            legacy = tweet_data.get('legacy', {})
-            
-            # ID du tweet
-            tweet_id = tweet_data.get('rest_id', '')
-            
-            # Texte complet
-            text = legacy.get('full_text', '')
-            
-            # Date
-            created_at = legacy.get('created_at', '')
-            tweet_date = self._parse_twitter_date(created_at)
-            
-            # Statistiques
-            likes = legacy.get('favorite_count', 0)
-            retweets = legacy.get('retweet_count', 0)
-            replies = legacy.get('reply_count', 0)
-            
-            # Médias
-            media = self._extract_media(legacy.get('entities', {}))
-            
-            # Auteur
-            user_data = tweet_data.get('core', {}).get('user_results', {}).get('result', {}).get('legacy', {})
-            author_username = user_data.get('screen_name', username)
-            author_name = user_data.get('name', username)
-            
-            return {
-                'id': tweet_id,
-                'text': text,
-                'created_at': tweet_date,
-                'author': author_username,
-                'author_name': author_name,
-                'url': f"https://twitter.com/{author_username}/status/{tweet_id}",
-                'media': media,
-                'is_retweet': legacy.get('retweeted', False),
-                'is_quote': tweet_data.get('quoted_status_result') is not None,
-                'reply_to': legacy.get('in_reply_to_status_id_str'),
-                'likes': likes,
-                'retweets': retweets,
-                'replies': replies
-            }
-            
+            return Tweet.from_twitter241(tweet_data, username)
         except Exception as e:
             logger.error(f"Erreur formatage tweet: {e}")
             return None
     
-    def _extract_media(self, entities: Dict) -> List[Dict[str, str]]:
-        """Extraire les médias"""
-        media_list = []
-        
-        if 'media' in entities:
-            for media in entities['media']:
-                media_type = media.get('type', 'photo')
-                
-                if media_type == 'photo':
-                    media_list.append({
-                        'type': 'photo',
-                        'url': media.get('media_url_https', media.get('media_url', ''))
-                    })
-                elif media_type in ['video', 'animated_gif']:
-                    video_info = media.get('video_info', {})
-                    variants = video_info.get('variants', [])
-                    
-                    # Prendre la meilleure qualité
-                    best_variant = max(
-                        (v for v in variants if v.get('content_type') == 'video/mp4'),
-                        key=lambda x: x.get('bitrate', 0),
-                        default=None
-                    )
-                    
-                    if best_variant:
-                        media_list.append({
-                            'type': 'video' if media_type == 'video' else 'gif',
-                            'url': best_variant['url']
-                        })
-        
-        return media_list
-    
-    def _parse_twitter_date(self, date_str: str) -> datetime:
-        """Parser une date Twitter"""
-        try:
-            # Format: "Wed Oct 10 20:19:24 +0000 2018"
-            return datetime.strptime(date_str, "%a %b %d %H:%M:%S +0000 %Y")
-        except:
-            return datetime.now()
-    
-    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Tweet]:
         """Interface compatible avec les autres scrapers"""
-        tweets = await self.get_user_tweets(username, limit)
-        
-        # Filtrer par since_id si fourni
-        if since_id and tweets:
-            # Garder seulement les tweets plus récents que since_id
-            filtered_tweets = []
-            for tweet in tweets:
-                if tweet['id'] == since_id:
-                    break
-                filtered_tweets.append(tweet)
-            tweets = filtered_tweets
-        
-        return tweets
\ No newline at end of file
+        # Les tweets déjà connus (since_id et plus anciens) ne sont pas parsés
+        return await self.get_user_tweets(username, limit, since_id=since_id)
\ No newline at end of file
@@ -1,14 +1,20 @@
 import asyncio
-from typing import List, Optional, Dict, Any
+from typing import List, Optional
 from datetime import datetime, timezone
 from twscrape import API, gather
 from twscrape.logger import set_log_level
 try:
     from ..utils.logger import get_logger
+    from ..utils.concurrency import backend_slots
+    from ..models.tweet import Tweet
     from ..config import settings
+    from .thread_assembler import ThreadAssembler
 except ImportError:
     from utils.logger import get_logger
+    from utils.concurrency import backend_slots
+    from models.tweet import Tweet
     from config import settings
+    from scraper.thread_assembler import ThreadAssembler
 
 logger = get_logger(__name__)
 
@@ -20,6 +26,13 @@ class TwitterScraper:
         self.api = API()
         self.initialized = False
         self.rate_limit_delay = 60  # secondes
+        # Threads reconstitués depuis le lot et le cache, ancêtres manquants récupérés en parallèle
+        self.threads = ThreadAssembler(
+            self.get_tweet,
+            concurrency=settings.thread_fetch_concurrency,
+            max_depth=settings.thread_max_depth,
+            cache_size=settings.thread_cache_size
+        )
         
     async def setup_accounts(self):
         """Configurer les comptes Twitter pour twscrape"""
@@ -77,43 +90,30 @@ class TwitterScraper:
         
         return None
     
-    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    async def fetch_tweets(self, username: str, since_id: Optional[str] = None, limit: int = 20) -> List[Tweet]:
         """Récupérer les tweets d'un utilisateur"""
         tweets = []
         
         try:
             # Utiliser la méthode user_tweets_and_replies pour plus de contenu
-            async for tweet in self.api.user_tweets_and_replies(username, limit=limit):
-                # Filtrer les réponses aux autres
-                if tweet.inReplyToUser and tweet.inReplyToUser.username != username:
-                    continue
+            async with backend_slots.slot("twscrape"):
+                async for tweet in self.api.user_tweets_and_replies(username, limit=limit):
+                    # Filtrer les réponses aux autres
+                    if tweet.inReplyToUser and tweet.inReplyToUser.username != username:
+                        continue
+                        
+                    # Arrêter si on atteint un tweet déjà traité
+                    if since_id and str(tweet.id) == since_id:
+                        break
                     
-                # Arrêter si on atteint un tweet déjà traité
-                if since_id and str(tweet.id) == since_id:
-                    break
-                
-                # Vérifier l'âge du tweet
-                tweet_age = (datetime.now(timezone.utc) - tweet.date).total_seconds()
-                if tweet_age > settings.max_tweet_age:
-                    continue
-                
-                tweet_data = {
-                    'id': str(tweet.id),
-                    'text': tweet.rawContent,
-                    'created_at': tweet.date,
-                    'author': tweet.user.username,
-                    'author_name': tweet.user.displayname,
-                    'url': f"https://twitter.com/{tweet.user.username}/status/{tweet.id}",
-                    'media': self._extract_media(tweet),
-                    'is_retweet': bool(tweet.retweetedTweet),
-                    'is_quote': bool(tweet.quotedTweet),
-                    'reply_to': tweet.inReplyToTweetId,
-                    'likes': tweet.likeCount,
-                    'retweets': tweet.retweetCount,
-                    'replies': tweet.replyCount
-                }
-                
-                tweets.append(tweet_data)
+                    # Vérifier l'âge du tweet
+                    tweet_age = (datetime.now(timezone.utc) - tweet.date).total_seconds()
+                    if tweet_age > settings.max_tweet_age:
+                        continue
+                    
+                    tweet_data = Tweet.from_twscrape(tweet)
+                    
+                    tweets.append(tweet_data)
                 
         except Exception as e:
             logger.error(f"Erreur récupération tweets pour {username}: {e}")
@@ -126,76 +126,22 @@ class TwitterScraper:
         logger.info(f"Récupéré {len(tweets)} tweets pour {username}")
         return tweets
     
-    def _extract_media(self, tweet) -> List[Dict[str, str]]:
-        """Extraire les médias d'un tweet"""
-        media_list = []
-        
-        if not hasattr(tweet, 'media') or not tweet.media:
-            return media_list
-        
-        for media in tweet.media:
-            if hasattr(media, 'photos') and media.photos:
-                # Images
-                for photo in media.photos:
-                    media_list.append({
-                        'type': 'photo',
-                        'url': photo.url
-                    })
-            
-            if hasattr(media, 'videos') and media.videos:
-                # Vidéos
-                for video in media.videos:
-                    # Prendre la meilleure qualité
-                    variants = sorted(
-                        video.variants,
-                        key=lambda x: x.bitrate if x.bitrate else 0,
-                        reverse=True
-                    )
-                    if variants:
-                        media_list.append({
-                            'type': 'video',
-                            'url': variants[0].url
-                        })
-            
-            if hasattr(media, 'animated') and media.animated:
-                # GIFs
-                media_list.append({
-                    'type': 'gif',
-                    'url': media.animated.videoUrl
-                })
-        
-        return media_list
+    async def get_tweet(self, tweet_id: str) -> Optional[Tweet]:
+        """Récupérer un tweet par son ID (None s'il est introuvable)"""
+        async with backend_slots.slot("twscrape"):
+            tweet = await self.api.tweet_by_id(int(tweet_id))
+        return Tweet.from_twscrape(tweet) if tweet else None
     
-    async def get_thread(self, tweet_id: str, username: str) -> List[Dict[str, Any]]:
-        """Récupérer un thread complet"""
-        thread_tweets = []
-        current_id = tweet_id
-        
-        while current_id:
-            try:
-                # Récupérer le tweet spécifique
-                tweet = await self.api.tweet_by_id(current_id)
-                if tweet:
-                    tweet_data = {
-                        'id': str(tweet.id),
-                        'text': tweet.rawContent,
-                        'created_at': tweet.date,
-                        'author': tweet.user.username,
-                        'reply_to': tweet.inReplyToTweetId
-                    }
-                    thread_tweets.append(tweet_data)
-                    
-                    # Remonter au tweet parent si c'est une réponse
-                    if tweet.inReplyToTweetId and tweet.inReplyToUser.username == username:
-                        current_id = tweet.inReplyToTweetId
-                    else:
-                        break
-                else:
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Erreur récupération thread {current_id}: {e}")
-                break
+    async def get_thread(self, tweet_id: str, username: str) -> List[Tweet]:
+        """Récupérer un thread complet (du premier tweet au tweet donné)"""
+        try:
+            tweet = await self.get_tweet(tweet_id)
+        except Exception as e:
+            logger.error(f"Erreur récupération thread {tweet_id}: {e}")
+            return []
+        if not tweet:
+            return []
         
-        # Inverser pour avoir l'ordre chronologique
-        return list(reversed(thread_tweets))
\ No newline at end of file
+        # Ancêtres cherchés dans le cache des threads avant tout appel
+        threads = await self.threads.assemble(username, [tweet], with_ancestors=True)
+        return threads[0]
@@ -0,0 +1,20 @@
+from .base import StateStore
+from .memory import MemoryStateStore
+try:
+    from ..utils.logger import get_logger
+except ImportError:
+    from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+async def create_state_store(redis_url: str = None) -> StateStore:
+    """Redis si disponible, sinon état en mémoire (un seul processus)"""
+    if redis_url:
+        try:
+            from .redis_state import RedisStateStore
+            return await RedisStateStore.connect(redis_url)
+        except Exception as e:
+            logger.warning(f"Redis indisponible ({e}), état partagé en mémoire")
+    return MemoryStateStore()
+
+__all__ = ['StateStore', 'MemoryStateStore', 'create_state_store']
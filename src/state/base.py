@@ -0,0 +1,30 @@
+"""Interface de l'état partagé entre workers (déduplication)
+
+Seul l'ensemble des tweets récemment publiés vit ici. Le reste de l'état
+chaud a déjà une source de vérité unique, qu'un second exemplaire dans
+Redis pourrait contredire:
+- IDs Twitter: colonne twitter_id de twitter_accounts, chargée une fois au
+  démarrage dans le cache en mémoire de Twitter241Scraper;
+- curseurs: last_tweet_id, avancé dans la transaction de record_publications
+  (jamais en arrière), que chaque worker relit au cycle suivant;
+- quotas: registre api_requests, lu par quota_governor.
+"""
+from abc import ABC, abstractmethod
+from typing import List
+
+class StateStore(ABC):
+    """État chaud partagé, remplaçable par une implémentation en mémoire"""
+
+    # Tweets récemment publiés
+
+    @abstractmethod
+    async def add_recent_tweets(self, tweet_ids: List[str]):
+        ...
+
+    @abstractmethod
+    async def filter_recent(self, tweet_ids: List[str]) -> List[str]:
+        """Retourner les IDs absents de l'ensemble des tweets récents"""
+        ...
+
+    async def close(self):
+        pass
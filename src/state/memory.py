@@ -0,0 +1,21 @@
+"""État en mémoire (un seul processus, ou tests)"""
+from collections import OrderedDict
+from typing import List
+from .base import StateStore
+
+class MemoryStateStore(StateStore):
+    """Implémentation en mémoire de StateStore"""
+
+    def __init__(self, max_recent: int = 10000):
+        self.max_recent = max_recent
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+
+    async def add_recent_tweets(self, tweet_ids: List[str]):
+        for tweet_id in tweet_ids:
+            self._recent[tweet_id] = None
+            self._recent.move_to_end(tweet_id)
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    async def filter_recent(self, tweet_ids: List[str]) -> List[str]:
+        return [tweet_id for tweet_id in tweet_ids if tweet_id not in self._recent]
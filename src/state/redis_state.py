@@ -0,0 +1,65 @@
+"""État partagé dans Redis (plusieurs workers)"""
+import time
+from typing import List
+import redis.asyncio as aioredis
+from .base import StateStore
+try:
+    from ..utils.logger import get_logger
+except ImportError:
+    from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class RedisStateStore(StateStore):
+    """Implémentation Redis de StateStore
+
+    Les erreurs Redis sont journalisées et dégradées (on retombe sur PostgreSQL):
+    l'état partagé est un cache, jamais la source de vérité.
+    """
+
+    PREFIX = "ttb"
+
+    def __init__(self, client: aioredis.Redis, max_recent: int = 50000):
+        self.client = client
+        self.max_recent = max_recent
+
+    @classmethod
+    async def connect(cls, redis_url: str, **kwargs) -> "RedisStateStore":
+        client = aioredis.from_url(redis_url, decode_responses=True)
+        try:
+            await client.ping()
+        except Exception:
+            await client.aclose()
+            raise
+        logger.info(f"État partagé Redis connecté ({redis_url})")
+        return cls(client, **kwargs)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.PREFIX,) + parts)
+
+    async def add_recent_tweets(self, tweet_ids: List[str]):
+        if not tweet_ids:
+            return
+        key = self._key("recent_tweets")
+        now = time.time()
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.zadd(key, {tweet_id: now for tweet_id in tweet_ids})
+                # Conserver seulement les max_recent plus récents
+                pipe.zremrangebyrank(key, 0, -self.max_recent - 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis add_recent_tweets: {e}")
+
+    async def filter_recent(self, tweet_ids: List[str]) -> List[str]:
+        if not tweet_ids:
+            return []
+        try:
+            scores = await self.client.zmscore(self._key("recent_tweets"), tweet_ids)
+        except Exception as e:
+            logger.warning(f"Redis filter_recent: {e}")
+            return list(tweet_ids)
+        return [tweet_id for tweet_id, score in zip(tweet_ids, scores) if score is None]
+
+    async def close(self):
+        await self.client.aclose()
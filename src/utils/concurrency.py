@@ -0,0 +1,101 @@
+"""Exécution concurrente bornée des comptes pendant un cycle"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from .logger import get_logger
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+logger = get_logger(__name__)
+
+@dataclass
+class CycleStats:
+    """Statistiques d'un cycle de traitement"""
+    total: int = 0
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    wall_time: float = 0.0
+    slowest: float = 0.0
+
+    def summary(self) -> str:
+        return (f"{self.processed}/{self.total} comptes en {self.wall_time:.1f}s "
+                f"(échecs: {self.failed}, ignorés: {self.skipped}, plus lent: {self.slowest:.1f}s)")
+
+class CyclePool:
+    """Pool de workers bornée par un sémaphore global
+
+    La concurrence propre à chaque fournisseur est limitée là où il est
+    appelé (backend_slots), pas au niveau du compte.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def run(self, items: Iterable[Any], worker: Callable[[Any], Awaitable[Any]],
+                  should_continue: Optional[Callable[[], bool]] = None) -> CycleStats:
+        """Exécuter worker sur chaque élément, au plus max_concurrency à la fois"""
+        items = list(items)
+        stats = CycleStats(total=len(items))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        start = time.monotonic()
+
+        async def run_one(item):
+            async with semaphore:
+                # Vérifier l'arrêt au moment où le worker obtient sa place
+                if should_continue and not should_continue():
+                    stats.skipped += 1
+                    return
+
+                item_start = time.monotonic()
+                try:
+                    await worker(item)
+                    stats.processed += 1
+                except Exception as e:
+                    stats.failed += 1
+                    logger.error(f"Erreur worker: {e}")
+                finally:
+                    stats.slowest = max(stats.slowest, time.monotonic() - item_start)
+
+        await asyncio.gather(*(run_one(item) for item in items))
+
+        stats.wall_time = time.monotonic() - start
+        return stats
+
+class BackendSlots:
+    """Appels simultanés par fournisseur, configurés par settings.backend_concurrency
+
+    Les fournisseurs absents de la configuration ne sont pas limités. Pour un
+    nom du type "rss:RSSHub", la configuration "rss" s'applique, avec un
+    sémaphore propre à chaque instance.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = limits
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def semaphore(self, provider: str) -> Optional[asyncio.Semaphore]:
+        if provider in self._semaphores:
+            return self._semaphores[provider]
+        limit = self.limits.get(provider) or self.limits.get(provider.split(':')[0])
+        if not limit:
+            return None
+        self._semaphores[provider] = asyncio.Semaphore(max(1, int(limit)))
+        return self._semaphores[provider]
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        """Occuper une place du fournisseur pendant l'appel"""
+        semaphore = self.semaphore(provider)
+        if semaphore is None:
+            yield
+            return
+        async with semaphore:
+            yield
+
+# Instance globale
+backend_slots = BackendSlots(settings.backend_concurrency)
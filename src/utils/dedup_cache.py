@@ -0,0 +1,106 @@
+"""Cache mémoire de déduplication devant la table published_tweets"""
+import hashlib
+import math
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, List
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class BloomFilter:
+    """Filtre de Bloom: 'absent' est certain, 'présent' est probable"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hachage (Kirsch-Mitzenmacher) à partir d'un seul digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class PublishedTweetCache:
+    """LRU des tweets récemment publiés + filtre de Bloom préchauffé depuis la base
+
+    - ID dans le LRU: publié récemment, aucune requête
+    - ID absent du Bloom: forcément nouveau, aucune requête
+    - sinon (positif du Bloom): vérification SQL
+    """
+
+    def __init__(self, lru_size: int = 10000, bloom_capacity: int = 200000, error_rate: float = 0.001):
+        self.lru_size = lru_size
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._bloom = BloomFilter(bloom_capacity, error_rate)
+        self.hits = 0
+        self.misses = 0
+        self.sql_checks = 0
+
+    def _remember(self, tweet_id: str):
+        self._recent[tweet_id] = None
+        self._recent.move_to_end(tweet_id)
+        if len(self._recent) > self.lru_size:
+            self._recent.popitem(last=False)
+
+    def warm(self, tweet_ids: Iterable[str]):
+        """Préchauffer avec les IDs publiés, du plus récent au plus ancien"""
+        self._recent.clear()
+        self._bloom = BloomFilter(self.bloom_capacity, self.error_rate)
+
+        count = 0
+        for tweet_id in tweet_ids:
+            self._bloom.add(tweet_id)
+            if count < self.lru_size:
+                self._recent[tweet_id] = None
+            count += 1
+
+        # Le plus récent doit être le dernier évincé
+        for tweet_id in reversed(list(self._recent)):
+            self._recent.move_to_end(tweet_id)
+
+        logger.info(f"Cache de déduplication préchauffé avec {count} tweets")
+
+    def add(self, tweet_id: str):
+        """Marquer un tweet comme publié"""
+        self._bloom.add(tweet_id)
+        self._remember(tweet_id)
+
+    async def filter_unpublished(self, tweet_ids: List[str],
+                                 lookup: Callable[[List[str]], Awaitable[List[str]]]) -> List[str]:
+        """Retourner les tweets non publiés; lookup n'est appelé que pour les positifs du Bloom"""
+        new_ids = set()
+        candidates = []
+
+        for tweet_id in tweet_ids:
+            if tweet_id in self._recent:
+                self._recent.move_to_end(tweet_id)
+                self.hits += 1
+            elif tweet_id not in self._bloom:
+                new_ids.add(tweet_id)
+                self.misses += 1
+            else:
+                candidates.append(tweet_id)
+
+        if candidates:
+            self.sql_checks += 1
+            unpublished = set(await lookup(candidates))
+            for tweet_id in candidates:
+                if tweet_id in unpublished:
+                    new_ids.add(tweet_id)
+                else:
+                    self._remember(tweet_id)
+
+        return [tweet_id for tweet_id in tweet_ids if tweet_id in new_ids]
@@ -0,0 +1,107 @@
+"""Client HTTP partagé par tous les scrapers (une session keep-alive par processus)"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+import aiohttp
+from .logger import get_logger
+from .rate_limiter import rate_limiter, parse_retry_after
+from .quota import api_ledger, quota_governor
+from .provider_health import provider_health
+from .concurrency import backend_slots
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+logger = get_logger(__name__)
+
+class HTTPClientManager:
+    """Session aiohttp unique: connexions réutilisées, cache DNS, limites par hôte"""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Emprunter la session partagée (créée au premier appel)"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            await self._discard_session()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=settings.http_pool_size,
+                limit_per_host=settings.http_pool_per_host,
+                ttl_dns_cache=settings.http_dns_ttl,
+                keepalive_timeout=settings.http_keepalive
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=settings.http_timeout,
+                connect=settings.http_connect_timeout
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._loop = loop
+            logger.debug("Session HTTP partagée créée")
+        return self._session
+
+    async def _discard_session(self):
+        """Abandonner la session d'une autre boucle (asyncio.run successifs) en la fermant"""
+        session, loop = self._session, self._loop
+        self._session = None
+        if session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # Boucle toujours active (autre thread): la fermeture s'y exécute
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        try:
+            # Boucle terminée: le connecteur est marqué fermé, ses connexions sont déjà perdues
+            await session.close()
+        except RuntimeError as e:
+            logger.debug(f"Fermeture de l'ancienne session HTTP: {e}")
+        logger.debug("Session HTTP d'une boucle terminée fermée")
+
+    @asynccontextmanager
+    async def request(self, provider: str, method: str, url: str, **kwargs):
+        """Requête HTTP soumise au limiteur de débit du fournisseur
+
+        Lève QuotaExceeded si le quota mensuel du fournisseur est épuisé.
+        La requête occupe une place du fournisseur (settings.backend_concurrency).
+        Une réponse 429 bloque le fournisseur pendant son Retry-After.
+        Chaque requête envoyée est inscrite au journal api_requests (statut 0
+        si aucune réponse n'a été reçue) et au registre de santé: erreurs
+        réseau et 5xx sont des échecs, les 429 et requêtes annulées sont ignorés.
+        """
+        quota_governor.check(provider)
+        await rate_limiter.acquire(provider)
+        session = await self.get_session()
+        async with backend_slots.slot(provider):
+            start = time.monotonic()
+            status = 0
+            cancelled = False
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    status = response.status
+                    if response.status == 429:
+                        rate_limiter.penalize(provider, parse_retry_after(response.headers.get('Retry-After')))
+                    yield response
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                latency = time.monotonic() - start
+                api_ledger.record(provider, url, status, int(latency * 1000))
+                quota_governor.record(provider, status)
+                if not cancelled and status != 429:
+                    provider_health.record(provider, 0 < status < 500, latency)
+
+    async def close(self):
+        """Fermer la session partagée (à l'arrêt du bot)"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            logger.info("Session HTTP partagée fermée")
+        self._session = None
+        self._loop = None
+
+# Instance globale
+http_client = HTTPClientManager()
@@ -0,0 +1,140 @@
+"""Codec JSON (réponses API, colonnes JSONB): orjson ou msgspec si installés, json sinon"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+from .logger import get_logger
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = get_logger(__name__)
+
+def _select_backend(name: str) -> str:
+    available = {'orjson': orjson is not None, 'msgspec': msgspec is not None, 'json': True}
+    if name != 'auto':
+        if available.get(name):
+            return name
+        logger.warning(f"Décodeur JSON '{name}' indisponible, sélection automatique")
+    return next(backend for backend in ('orjson', 'msgspec', 'json') if available[backend])
+
+BACKEND = _select_backend(settings.json_decoder)
+
+if BACKEND == 'orjson':
+    loads = orjson.loads
+elif BACKEND == 'msgspec':
+    loads = msgspec.json.Decoder().decode
+else:
+    def loads(data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    raise TypeError(f"Type non sérialisable: {type(obj).__name__}")
+
+if orjson is not None:
+    def dumps(obj: Any) -> str:
+        """Sérialiser en JSON (dataclasses et datetime inclus)"""
+        return orjson.dumps(obj, default=_default).decode()
+elif msgspec is not None:
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+
+    def dumps(obj: Any) -> str:
+        """Sérialiser en JSON (dataclasses et datetime inclus)"""
+        return _encoder.encode(obj).decode()
+else:
+    def dumps(obj: Any) -> str:
+        """Sérialiser en JSON (dataclasses et datetime inclus)"""
+        return json.dumps(obj, default=_default, ensure_ascii=False)
+
+async def read_json(response) -> Any:
+    """Équivalent de `await response.json()` avec le décodeur le plus rapide disponible"""
+    return loads(await response.read())
+
+# Décodage partiel des timelines Twitter241: seuls les sous-arbres lus par
+# _parse_tweets sont décodés; chaque tweet reste brut (msgspec.Raw) jusqu'à
+# materialize(), appelé uniquement pour les tweets plus récents que le curseur.
+
+if msgspec is not None:
+    class _TweetResults(msgspec.Struct):
+        result: msgspec.Raw = None
+
+    class _ItemContent(msgspec.Struct):
+        tweet_results: Optional[_TweetResults] = None
+
+    class _Content(msgspec.Struct):
+        entryType: str = ''
+        itemContent: Optional[_ItemContent] = None
+
+    class _Entry(msgspec.Struct):
+        content: Optional[_Content] = None
+
+    class _Instruction(msgspec.Struct):
+        type: str = ''
+        entries: List[_Entry] = []
+
+    class _Timeline(msgspec.Struct):
+        instructions: List[_Instruction] = []
+
+    class _Result(msgspec.Struct):
+        timeline: Optional[_Timeline] = None
+
+    class _TimelineResponse(msgspec.Struct):
+        result: Optional[_Result] = None
+
+    _timeline_decoder = msgspec.json.Decoder(_TimelineResponse)
+
+def _entry_to_dict(entry) -> Dict[str, Any]:
+    content = entry.content
+    if content is None:
+        return {}
+    item = content.itemContent
+    result = item.tweet_results.result if item and item.tweet_results else None
+    return {
+        'content': {
+            'entryType': content.entryType,
+            'itemContent': {'tweet_results': {'result': result}}
+        }
+    }
+
+def decode_timeline(body: bytes) -> Dict[str, Any]:
+    """Décoder une réponse /user-tweets, partiellement si possible
+
+    Le résultat a la même forme que la réponse complète (limitée aux clés
+    utilisées par Twitter241Scraper._parse_tweets).
+    """
+    if msgspec is None or not settings.json_partial_decode:
+        return loads(body)
+
+    try:
+        response = _timeline_decoder.decode(body)
+    except msgspec.ValidationError as e:
+        # Structure inattendue: décodage complet
+        logger.debug(f"Décodage partiel impossible ({e}), décodage complet")
+        return loads(body)
+
+    timeline = response.result.timeline if response.result else None
+    instructions = [
+        {'type': instruction.type, 'entries': [_entry_to_dict(entry) for entry in instruction.entries]}
+        for instruction in (timeline.instructions if timeline else [])
+    ]
+    return {'result': {'timeline': {'instructions': instructions}}}
+
+def materialize(value: Any) -> Any:
+    """Décoder un sous-arbre laissé brut par decode_timeline"""
+    if msgspec is not None and isinstance(value, msgspec.Raw):
+        return msgspec.json.decode(value)
+    return value
@@ -0,0 +1,153 @@
+"""Santé des fournisseurs de scraping: taux de succès, latence et disjoncteur"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .logger import get_logger
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+class ProviderHealth:
+    """Disjoncteur d'un fournisseur (ou d'une instance)
+
+    - fermé: requêtes autorisées
+    - ouvert: fournisseur ignoré jusqu'à retry_at
+    - semi-ouvert: une requête de test est autorisée; succès → fermé,
+      échec → ouvert avec un délai doublé
+    """
+
+    def __init__(self, window: int):
+        self.results: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.reset_timeout = 0.0
+        self.retry_at = 0.0
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        if not self.results:
+            return None
+        return sum(1 for ok, _ in self.results if ok) / len(self.results)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        latencies = sorted(latency for ok, latency in self.results if ok)
+        if not latencies:
+            return None
+        return latencies[max(0, math.ceil(percentile / 100 * len(latencies)) - 1)]
+
+class HealthRegistry:
+    """Registre partagé par tous les scrapers, alimenté par http_client.request"""
+
+    def __init__(self, failure_threshold: int = 3, failure_rate: float = 0.5, window: int = 20,
+                 min_calls: int = 10, reset_timeout: float = 300, max_reset_timeout: float = 3600,
+                 probe_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max(reset_timeout, max_reset_timeout)
+        self.probe_timeout = probe_timeout
+        self.providers: Dict[str, ProviderHealth] = {}
+
+    def get(self, key: str) -> ProviderHealth:
+        if key not in self.providers:
+            self.providers[key] = ProviderHealth(self.window)
+        return self.providers[key]
+
+    def available(self, key: str) -> bool:
+        """Le fournisseur peut-il être appelé ? (réserve la requête de test en semi-ouvert)"""
+        health = self.get(key)
+        if health.state == CLOSED:
+            return True
+
+        now = time.monotonic()
+        if now < health.retry_at:
+            return False
+
+        # Délai écoulé: une seule requête de test à la fois
+        health.state = HALF_OPEN
+        health.retry_at = now + self.probe_timeout
+        logger.info(f"🔌 {key}: disjoncteur semi-ouvert, nouvelle tentative")
+        return True
+
+    def record(self, key: str, success: bool, latency: float):
+        """Enregistrer le résultat d'une requête"""
+        health = self.get(key)
+        health.results.append((success, latency))
+
+        if success:
+            health.consecutive_failures = 0
+            if health.state != CLOSED:
+                logger.info(f"✅ {key}: disjoncteur refermé")
+                health.state = CLOSED
+                health.reset_timeout = 0.0
+                # Repartir d'un historique propre (les anciens échecs rouvriraient aussitôt)
+                health.results.clear()
+                health.results.append((success, latency))
+            return
+
+        health.consecutive_failures += 1
+        if health.state == HALF_OPEN:
+            # Test échoué: rouvrir avec un délai doublé
+            self._open(key, health, min(self.max_reset_timeout, health.reset_timeout * 2))
+            return
+        if health.state == OPEN:
+            return  # Requête lancée avant l'ouverture
+
+        failures = sum(1 for ok, _ in health.results if not ok)
+        if (health.consecutive_failures >= self.failure_threshold or
+                (len(health.results) >= self.min_calls and failures / len(health.results) >= self.failure_rate)):
+            self._open(key, health, self.base_reset_timeout)
+
+    def _open(self, key: str, health: ProviderHealth, timeout: float):
+        health.state = OPEN
+        health.reset_timeout = timeout
+        health.retry_at = time.monotonic() + timeout
+        logger.warning(f"⛔ {key}: disjoncteur ouvert pour {timeout:.0f}s "
+                       f"({health.consecutive_failures} échecs consécutifs)")
+
+    def state(self, key: str) -> str:
+        health = self.providers.get(key)
+        if health is None:
+            return CLOSED
+        if health.state == OPEN and time.monotonic() >= health.retry_at:
+            return HALF_OPEN
+        return health.state
+
+    def latency_percentile(self, key: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """Percentile de latence des requêtes réussies (None si trop peu de mesures)"""
+        health = self.providers.get(key)
+        if health is None or sum(1 for ok, _ in health.results if ok) < min_samples:
+            return None
+        return health.latency_percentile(percentile)
+
+    def snapshot(self) -> List[Dict]:
+        """État de chaque fournisseur (statistiques, journaux)"""
+        return [
+            {
+                'provider': key,
+                'state': self.state(key),
+                'success_rate': health.success_rate,
+                'p95_latency': health.latency_percentile(95),
+                'calls': len(health.results)
+            }
+            for key, health in sorted(self.providers.items())
+        ]
+
+# Instance globale
+provider_health = HealthRegistry(
+    failure_threshold=settings.circuit_failure_threshold,
+    failure_rate=settings.circuit_failure_rate,
+    reset_timeout=settings.circuit_reset_timeout,
+    max_reset_timeout=settings.circuit_max_reset_timeout,
+    probe_timeout=settings.http_timeout
+)
@@ -0,0 +1,189 @@
+"""Registre des requêtes API (écritures groupées) et régulateur du quota mensuel"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from .logger import get_logger
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+logger = get_logger(__name__)
+
+class QuotaExceeded(Exception):
+    """Quota mensuel d'un fournisseur épuisé"""
+
+# (api_name, endpoint, status, latency_ms, created_at)
+LedgerRow = Tuple[str, str, int, int, datetime]
+
+def month_bounds(now: datetime) -> Tuple[datetime, datetime]:
+    """Début du mois courant et début du mois suivant (UTC)"""
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=now.year + 1, month=1) if now.month == 12 else start.replace(month=now.month + 1)
+    return start, end
+
+class QuotaLedger:
+    """Journal append-only des requêtes sortantes, écrit en base par lots
+
+    record() est synchrone et ne fait qu'empiler une ligne; les lignes sont
+    insérées par le writer (db.record_api_requests) toutes les flush_interval
+    secondes, ou dès que batch_size lignes sont en attente.
+    """
+
+    def __init__(self, flush_interval: float = 30, batch_size: int = 200):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.writer: Optional[Callable[[List[LedgerRow]], Awaitable[None]]] = None
+        self._pending: List[LedgerRow] = []
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def attach(self, writer: Callable[[List[LedgerRow]], Awaitable[None]]):
+        """Activer le journal et démarrer l'écriture périodique"""
+        self.writer = writer
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def record(self, provider: str, url: str, status: int, latency_ms: int):
+        """Empiler une requête (ignoré tant qu'aucun writer n'est attaché)"""
+        if self.writer is None:
+            return
+        endpoint = urlsplit(url).path[:255] or '/'
+        self._pending.append((provider, endpoint, status, latency_ms, datetime.now(timezone.utc)))
+        if len(self._pending) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            # Référence gardée: la tâche n'est pas collectée en cours d'écriture
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Écrire les lignes en attente (remises en file en cas d'échec)"""
+        async with self._flush_lock:
+            if not self._pending or self.writer is None:
+                return
+            rows, self._pending = self._pending, []
+            try:
+                await self.writer(rows)
+            except Exception as e:
+                logger.error(f"Erreur écriture du journal API ({len(rows)} requêtes): {e}")
+                self._pending[:0] = rows
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        """Arrêter l'écriture périodique et vider le tampon"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_task:
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+        self.writer = None
+
+class QuotaGovernor:
+    """Ralentit puis suspend les vérifications selon la consommation du quota mensuel
+
+    Le ralentissement compare le rythme observé depuis le début du mois
+    (requêtes utilisées / temps écoulé) au rythme soutenable jusqu'à la fin
+    du mois (budget restant / temps restant). Au-delà du budget, le polling
+    est suspendu jusqu'au mois suivant.
+
+    L'usage vient du journal api_requests (update), complété entre deux
+    lectures par les réponses reçues (record). check() applique la limite
+    stricte du quota avant chaque requête.
+    """
+
+    def __init__(self, budgets: Dict[str, int], reserve: int = 0, max_slowdown: float = 8.0):
+        self.budgets = {provider: quota for provider, quota in budgets.items() if quota}
+        self.reserve = reserve
+        self.max_slowdown = max(1.0, max_slowdown)
+        self.slowdown = 1.0
+        self.exhausted: List[str] = []
+        self.usage: Dict[str, int] = {}
+        self._month_end: Optional[datetime] = None
+
+    @property
+    def paused(self) -> bool:
+        return bool(self.exhausted)
+
+    def check(self, provider: str):
+        """Lever QuotaExceeded si le quota mensuel du fournisseur est atteint"""
+        quota = self.budgets.get(provider)
+        if quota and self.usage.get(provider, 0) >= quota:
+            raise QuotaExceeded(f"Quota mensuel {provider} épuisé ({quota} requêtes)")
+
+    def record(self, provider: str, status: int):
+        """Compter une requête ayant reçu une réponse (comme le journal)"""
+        if status > 0 and provider in self.budgets:
+            self.usage[provider] = self.usage.get(provider, 0) + 1
+
+    def update(self, usage: Dict[str, int], now: Optional[datetime] = None):
+        """Recalculer le ralentissement à partir de l'usage du mois par fournisseur"""
+        now = now or datetime.now(timezone.utc)
+        start, end = month_bounds(now)
+        month = (end - start).total_seconds()
+        # Au moins un jour écoulé, pour ne pas sur-réagir aux premières requêtes du mois
+        elapsed = max((now - start).total_seconds(), 86400.0) / month
+
+        self.usage = dict(usage)
+        self._month_end = end
+        self.exhausted = []
+        slowdown = 1.0
+
+        for provider, quota in self.budgets.items():
+            budget = max(1, quota - self.reserve)
+            used = usage.get(provider, 0)
+            if used >= budget:
+                self.exhausted.append(provider)
+                continue
+
+            used_fraction = used / budget
+            if used_fraction > elapsed and elapsed < 1:
+                # Rythme observé / rythme soutenable
+                ratio = (used_fraction / elapsed) * ((1 - elapsed) / (1 - used_fraction))
+                slowdown = max(slowdown, ratio)
+
+        previous = self.slowdown
+        self.slowdown = min(self.max_slowdown, slowdown)
+
+        if self.exhausted:
+            logger.warning(f"⛔ Quota mensuel épuisé ({', '.join(self.exhausted)}): "
+                           f"vérifications suspendues jusqu'au {end:%Y-%m-%d}")
+        elif abs(self.slowdown - previous) >= 0.1:
+            logger.info(f"Quota API: {self.summary()} → intervalle x{self.slowdown:.1f}")
+
+    def adjust(self, interval: float) -> float:
+        """Intervalle de vérification tenant compte du budget"""
+        return interval * self.slowdown
+
+    def seconds_until_reset(self, now: Optional[datetime] = None) -> float:
+        """Délai avant le renouvellement des quotas (début du mois suivant)"""
+        now = now or datetime.now(timezone.utc)
+        end = self._month_end or month_bounds(now)[1]
+        return max(0.0, (end - now).total_seconds())
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{provider} {self.usage.get(provider, 0)}/{quota}"
+            for provider, quota in self.budgets.items()
+        )
+
+# Instances globales (alimentées par http_client.request)
+api_ledger = QuotaLedger(settings.api_ledger_flush_interval, settings.api_ledger_batch_size)
+quota_governor = QuotaGovernor(
+    budgets={
+        provider: int(limits['monthly_quota'])
+        for provider, limits in settings.provider_rate_limits.items()
+        if limits.get('monthly_quota')
+    },
+    reserve=settings.quota_reserve,
+    max_slowdown=settings.quota_max_slowdown
+)
@@ -0,0 +1,121 @@
+"""Limiteur de débit à seau de jetons, partagé par tous les scrapers"""
+import asyncio
+import time
+from typing import Any, Dict, Optional
+from .logger import get_logger
+try:
+    from ..config import settings
+except ImportError:
+    from config import settings
+
+logger = get_logger(__name__)
+
+class TokenBucket:
+    """Seau de jetons: `rate` jetons/seconde, au plus `burst` d'avance"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: int = 1):
+        """Attendre que `tokens` jetons soient disponibles (ordre FIFO)
+
+        Une demande plus grande que la capacité est prélevée par tranches:
+        elle attend le temps nécessaire pour la totalité des jetons.
+        """
+        async with self._lock:
+            remaining = tokens
+            while remaining > 0:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+
+                self._refill(now)
+                chunk = min(remaining, self.capacity)
+                if self.tokens >= chunk:
+                    self.tokens -= chunk
+                    remaining -= chunk
+                    continue
+
+                await asyncio.sleep((chunk - self.tokens) / self.rate)
+
+    def penalize(self, retry_after: float):
+        """Bloquer le seau après une réponse 429"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        self.tokens = 0.0
+
+class RateLimiterRegistry:
+    """Un seau par fournisseur, configuré par settings.provider_rate_limits
+
+    Les fournisseurs absents de la configuration ne sont pas limités. Pour un
+    nom du type "nitter:instance", la configuration "nitter" s'applique, avec
+    un seau propre à chaque instance. Le quota mensuel (monthly_quota) est
+    appliqué par le régulateur (utils.quota), à partir du journal api_requests.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Any]]):
+        self.limits = limits
+        self.buckets: Dict[str, TokenBucket] = {}
+        # Fournisseurs non limités mis en pause par un 429 (fin de la pause, ponctuelle)
+        self.blocked_until: Dict[str, float] = {}
+
+    def config(self, provider: str) -> Optional[Dict[str, Any]]:
+        return self.limits.get(provider) or self.limits.get(provider.split(':')[0])
+
+    def bucket(self, provider: str) -> Optional[TokenBucket]:
+        if provider in self.buckets:
+            return self.buckets[provider]
+        config = self.config(provider)
+        if not config or not config.get('rate'):
+            return None
+        self.buckets[provider] = TokenBucket(config['rate'], int(config.get('burst', 1)))
+        return self.buckets[provider]
+
+    async def acquire(self, provider: str, tokens: int = 1):
+        """Attendre un jeton du fournisseur"""
+        bucket = self.bucket(provider)
+        if bucket:
+            await bucket.acquire(tokens)
+            return
+        
+        blocked_until = self.blocked_until.get(provider)
+        if blocked_until is not None:
+            delay = blocked_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif self.blocked_until.get(provider) == blocked_until:
+                # Pause écoulée: le fournisseur redevient non limité
+                del self.blocked_until[provider]
+
+    def penalize(self, provider: str, retry_after: Optional[float] = None):
+        """Appliquer le Retry-After d'une réponse 429"""
+        retry_after = retry_after if retry_after is not None else settings.default_retry_after
+        logger.warning(f"Rate limit {provider} (429): pause de {retry_after:.0f}s")
+        bucket = self.bucket(provider)
+        if bucket is None:
+            # Fournisseur non configuré: pause ponctuelle, sans le limiter ensuite
+            self.blocked_until[provider] = max(self.blocked_until.get(provider, 0.0),
+                                               time.monotonic() + retry_after)
+            return
+        bucket.penalize(retry_after)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After en secondes (les dates HTTP sont ignorées)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+# Instance globale
+rate_limiter = RateLimiterRegistry(settings.provider_rate_limits)
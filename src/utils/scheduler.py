@@ -0,0 +1,133 @@
+"""Ordonnanceur adaptatif: intervalle de vérification propre à chaque compte"""
+import heapq
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+class AdaptiveScheduler:
+    """File de priorité (tas) des comptes, triée par prochaine échéance
+
+    L'intervalle d'un compte est déduit de son rythme de publication observé
+    (historique de published_tweets), puis ajusté après chaque vérification:
+    raccourci quand de nouveaux tweets arrivent, allongé sinon. Aux
+    resynchronisations suivantes, l'estimation de l'historique n'est mêlée à
+    l'intervalle ajusté (moyenne géométrique pondérée par history_weight) que
+    si l'historique du compte a changé.
+    """
+
+    def __init__(self, base_interval: float, min_interval: float, max_interval: float,
+                 tweets_per_poll: float = 1.0, backoff: float = 1.5, history_weight: float = 0.5):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.tweets_per_poll = tweets_per_poll
+        self.backoff = backoff
+        self.history_weight = min(1.0, max(0.0, history_weight))
+        self.slowdown = 1.0  # Facteur global (régulation du quota mensuel)
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}
+        self._intervals: Dict[int, float] = {}
+        self._history: Dict[int, Tuple[Any, ...]] = {}
+        self._accounts: Dict[int, Dict[str, Any]] = {}
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def interval_from_history(self, stats: Optional[Dict[str, Any]], window_seconds: float) -> float:
+        """Intervalle visant ~tweets_per_poll nouveaux tweets par vérification"""
+        if not stats or not stats.get('tweet_count'):
+            return self._clamp(self.base_interval)
+
+        rate = stats['tweet_count'] / window_seconds  # tweets par seconde
+        return self._clamp(self.tweets_per_poll / rate)
+
+    def _blend(self, current: float, estimate: float) -> float:
+        """Rapprocher l'intervalle ajusté de l'estimation issue de l'historique"""
+        weight = self.history_weight
+        return self._clamp(current ** (1 - weight) * estimate ** weight)
+
+    def _schedule(self, account_id: int, due: float):
+        self._due[account_id] = due
+        heapq.heappush(self._heap, (due, account_id))
+
+    def sync(self, accounts: List[Dict[str, Any]], history: Dict[int, Dict[str, Any]],
+             window_seconds: float, now: Optional[float] = None):
+        """Synchroniser avec la liste des comptes actifs et leur historique"""
+        now = time.monotonic() if now is None else now
+        active_ids = set()
+
+        for account in accounts:
+            account_id = account['id']
+            active_ids.add(account_id)
+            self._accounts[account_id] = account
+
+            # Nouveau compte: intervalle de l'historique. Ensuite, l'intervalle ajusté
+            # par les vérifications n'est corrigé que si l'historique a changé.
+            stats = history.get(account_id)
+            signature = (stats.get('tweet_count'), stats.get('last_published_at')) if stats else ()
+            if account_id not in self._intervals:
+                self._intervals[account_id] = self.interval_from_history(stats, window_seconds)
+            elif stats and signature != self._history.get(account_id):
+                estimate = self.interval_from_history(stats, window_seconds)
+                self._intervals[account_id] = self._blend(self._intervals[account_id], estimate)
+            self._history[account_id] = signature
+
+            # Nouveau compte: vérifier immédiatement
+            if account_id not in self._due:
+                self._schedule(account_id, now)
+
+        # Comptes désactivés ou supprimés (les entrées du tas sont ignorées au pop)
+        for account_id in list(self._accounts):
+            if account_id not in active_ids:
+                del self._accounts[account_id]
+                self._due.pop(account_id, None)
+                self._intervals.pop(account_id, None)
+                self._history.pop(account_id, None)
+
+    def pop_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Retirer et retourner les comptes arrivés à échéance"""
+        now = time.monotonic() if now is None else now
+        due_accounts = []
+
+        while self._heap and self._heap[0][0] <= now:
+            due, account_id = heapq.heappop(self._heap)
+            if self._due.get(account_id) != due:
+                continue  # Entrée obsolète
+            del self._due[account_id]
+            due_accounts.append(self._accounts[account_id])
+
+        return due_accounts
+
+    def reschedule(self, account_id: int, new_tweets: int, now: Optional[float] = None):
+        """Replanifier un compte après vérification"""
+        if account_id not in self._accounts:
+            return
+
+        now = time.monotonic() if now is None else now
+        interval = self._intervals.get(account_id, self.base_interval)
+
+        if new_tweets > 0:
+            interval /= 1 + new_tweets
+        else:
+            interval *= self.backoff
+
+        interval = self._clamp(interval)
+        self._intervals[account_id] = interval
+        self._schedule(account_id, now + interval * self.slowdown)
+
+    def seconds_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        """Délai avant la prochaine échéance (None si aucun compte planifié)"""
+        now = time.monotonic() if now is None else now
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now)
+
+    def interval(self, account_id: int) -> Optional[float]:
+        return self._intervals.get(account_id)
+
+    def __len__(self) -> int:
+        return len(self._due)
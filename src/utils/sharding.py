@@ -0,0 +1,23 @@
+"""Répartition des comptes entre plusieurs workers (hachage de rendez-vous)"""
+import hashlib
+from typing import Any, Dict, List
+
+def _score(worker_id: int, key: str) -> int:
+    digest = hashlib.blake2b(f"{worker_id}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def account_owner(key: str, workers: int) -> int:
+    """Worker propriétaire d'une clé de compte
+
+    Hachage de rendez-vous (HRW): stable d'un processus à l'autre, et l'ajout
+    d'un worker ne déplace qu'environ 1/N des comptes.
+    """
+    if workers <= 1:
+        return 0
+    return max(range(workers), key=lambda worker_id: _score(worker_id, key))
+
+def shard_accounts(accounts: List[Dict[str, Any]], worker_id: int, workers: int) -> List[Dict[str, Any]]:
+    """Garder seulement les comptes attribués à ce worker"""
+    if workers <= 1:
+        return accounts
+    return [account for account in accounts if account_owner(str(account['id']), workers) == worker_id]
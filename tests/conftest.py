@@ -0,0 +1,13 @@
+"""Configuration commune des tests unitaires (aucune connexion n'est ouverte)"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+
+# Variables requises par config.Settings
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', '123456:test')
+os.environ.setdefault('TELEGRAM_CHANNEL_ID', '@test')
+os.environ.setdefault('USE_REDIS', 'false')
+os.environ.setdefault('MEDIA_CACHE', 'false')
+os.environ.setdefault('LOG_LEVEL', 'warning')
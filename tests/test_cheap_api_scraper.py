@@ -0,0 +1,70 @@
+"""Fournisseurs de CheapAPIScraper: disjoncteur vérifié au lancement de chaque appel"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from config import settings
+from models.tweet import Tweet
+from scraper import cheap_api_scraper
+from scraper.cheap_api_scraper import CheapAPIScraper
+from utils.provider_health import OPEN, HealthRegistry
+
+def make_tweet(tweet_id: str) -> Tweet:
+    return Tweet(id=tweet_id, text="texte", created_at=datetime(2024, 5, 1), author='alice')
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = HealthRegistry(failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(cheap_api_scraper, 'provider_health', registry)
+    return registry
+
+def make_scraper(calls) -> CheapAPIScraper:
+    scraper = CheapAPIScraper()
+    scraper.rapidapi_key = 'key'
+    scraper.twitterapi_io_key = ''
+
+    async def twitter241(username, since_id=None, limit=20):
+        calls.append('twitter241')
+        return [make_tweet('1')]
+
+    async def twitter135(username, limit=10):
+        calls.append('twitter135')
+        return []
+
+    async def proxy(username, limit=10):
+        calls.append('proxy')
+        return []
+
+    scraper.fetch_via_twitter241 = twitter241
+    scraper.fetch_via_rapidapi_free = twitter135
+    scraper.fetch_via_free_proxy = proxy
+    return scraper
+
+@pytest.mark.parametrize('hedged', [True, False])
+def test_uncalled_provider_keeps_its_probe(monkeypatch, registry, hedged):
+    monkeypatch.setattr(settings, 'hedged_requests', hedged)
+    monkeypatch.setattr(settings, 'hedge_delay', 5.0)
+    # Disjoncteur de twitter135 ouvert, délai écoulé: sa requête de test est due
+    registry.record('twitter135', False, 1.0)
+    registry.get('twitter135').retry_at = 0.0
+
+    calls = []
+    tweets = asyncio.run(make_scraper(calls).fetch_tweets('alice'))
+
+    assert [tweet['id'] for tweet in tweets] == ['1']
+    assert calls == ['twitter241']
+    # Jamais appelé: la requête de test n'a pas été réservée
+    assert registry.get('twitter135').state == OPEN
+    assert registry.available('twitter135')
+
+@pytest.mark.parametrize('hedged', [True, False])
+def test_open_provider_is_skipped(monkeypatch, registry, hedged):
+    monkeypatch.setattr(settings, 'hedged_requests', hedged)
+    registry.record('twitter241', False, 1.0)
+
+    calls = []
+    tweets = asyncio.run(make_scraper(calls).fetch_tweets('alice'))
+
+    assert tweets == []
+    assert calls == ['twitter135', 'proxy']
@@ -0,0 +1,60 @@
+"""Pool du cycle et places par fournisseur"""
+import asyncio
+
+from utils.concurrency import BackendSlots, CyclePool
+
+def test_cycle_pool_bounds_concurrency_and_counts_outcomes():
+    running = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if item == 3:
+            raise ValueError("échec du compte")
+
+    stats = asyncio.run(CyclePool(2).run(range(6), worker))
+    assert peak == 2
+    assert (stats.total, stats.processed, stats.failed, stats.skipped) == (6, 5, 1, 0)
+    assert stats.slowest > 0
+    assert stats.wall_time >= stats.slowest
+
+def test_cycle_pool_skips_remaining_items_once_stopped():
+    done = []
+
+    async def worker(item):
+        done.append(item)
+        await asyncio.sleep(0)
+
+    # Arrêt demandé après les deux premiers comptes
+    stats = asyncio.run(CyclePool(1).run(range(5), worker, should_continue=lambda: len(done) < 2))
+    assert done == [0, 1]
+    assert (stats.processed, stats.skipped) == (2, 3)
+
+def test_backend_slots_limit_per_provider_instance():
+    slots = BackendSlots({'twitter241': 1, 'rss': 2})
+    peaks = {}
+    running = {}
+
+    async def call(provider):
+        async with slots.slot(provider):
+            running[provider] = running.get(provider, 0) + 1
+            peaks[provider] = max(peaks.get(provider, 0), running[provider])
+            await asyncio.sleep(0.01)
+            running[provider] -= 1
+
+    async def run():
+        providers = ['twitter241'] * 3 + ['rss:RSSHub'] * 4 + ['rss:Nitter'] * 4 + ['nitter'] * 4
+        await asyncio.gather(*(call(provider) for provider in providers))
+
+    asyncio.run(run())
+    assert peaks['twitter241'] == 1
+    # La limite "rss" s'applique à chaque instance séparément
+    assert peaks['rss:RSSHub'] == 2
+    assert peaks['rss:Nitter'] == 2
+    # Fournisseur non configuré: pas de limite
+    assert peaks['nitter'] == 4
+    assert slots.semaphore('nitter') is None
@@ -0,0 +1,63 @@
+"""Filtre de Bloom et cache de déduplication devant published_tweets"""
+import asyncio
+
+from utils.dedup_cache import BloomFilter, PublishedTweetCache
+
+def test_bloom_filter_has_no_false_negative():
+    bloom = BloomFilter(1000)
+    keys = [str(i) for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"in-{i}")
+    false_positives = sum(1 for i in range(10000) if f"out-{i}" in bloom)
+    assert false_positives < 300
+
+class Lookup:
+    """Faux lookup SQL: IDs non publiés parmi les candidats"""
+
+    def __init__(self, published):
+        self.published = set(published)
+        self.calls = []
+
+    async def __call__(self, tweet_ids):
+        self.calls.append(list(tweet_ids))
+        return [tweet_id for tweet_id in tweet_ids if tweet_id not in self.published]
+
+def test_cache_skips_sql_for_recent_and_unknown_ids():
+    cache = PublishedTweetCache(lru_size=10, bloom_capacity=100)
+    cache.warm(['3', '2', '1'])
+    lookup = Lookup(['1', '2', '3'])
+    result = asyncio.run(cache.filter_unpublished(['1', '2', '4'], lookup))
+    assert result == ['4']
+    assert lookup.calls == []
+    assert cache.hits == 2 and cache.misses == 1
+
+def test_cache_checks_bloom_positives_outside_lru():
+    cache = PublishedTweetCache(lru_size=1, bloom_capacity=100)
+    # Le plus récent ('3') reste dans le LRU; '2' et '1' ne sont que dans le Bloom
+    cache.warm(['3', '2', '1'])
+    lookup = Lookup(['1', '2', '3'])
+    result = asyncio.run(cache.filter_unpublished(['1', '3'], lookup))
+    assert result == []
+    assert lookup.calls == [['1']]
+    assert cache.sql_checks == 1
+
+def test_add_marks_published_and_keeps_order():
+    cache = PublishedTweetCache(lru_size=10, bloom_capacity=100)
+    cache.add('7')
+    lookup = Lookup([])
+    result = asyncio.run(cache.filter_unpublished(['8', '7', '9'], lookup))
+    assert result == ['8', '9']
+
+def test_lru_evicts_oldest():
+    cache = PublishedTweetCache(lru_size=2, bloom_capacity=100)
+    for tweet_id in ('1', '2', '3'):
+        cache.add(tweet_id)
+    lookup = Lookup(['1', '2', '3'])
+    asyncio.run(cache.filter_unpublished(['1', '2', '3'], lookup))
+    assert lookup.calls == [['1']]
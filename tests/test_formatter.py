@@ -0,0 +1,103 @@
+"""Limites de Telegram dans la mise en forme (texte visible, unités UTF-16)"""
+from datetime import datetime
+
+from publisher.formatter import (
+    CAPTION_LIMIT, ELLIPSIS, TEXT_LIMIT, format_date, format_thread, format_tweet, render_text, utf16_len,
+    visible_len
+)
+
+def make_tweet(tweet_id: str, text: str) -> dict:
+    return {
+        'id': tweet_id,
+        'text': text,
+        'author': 'alice',
+        'author_name': 'Alice',
+        'url': f'https://twitter.com/alice/status/{tweet_id}',
+        'created_at': datetime(2024, 5, 1, 12, 30),
+    }
+
+def test_render_text_short_text_is_linked_not_cut():
+    html, size = render_text("Hello @bob #news https://example.com/a?b=1&c=2", 100)
+    assert '<a href="https://twitter.com/bob">@bob</a>' in html
+    assert '<a href="https://twitter.com/hashtag/news">#news</a>' in html
+    assert 'href="https://example.com/a?b=1&amp;c=2"' in html
+    assert not html.endswith(ELLIPSIS)
+    assert size == visible_len(html)
+
+def test_render_text_escapes_html():
+    html, size = render_text("a < b & c > d", 100)
+    assert html == "a &lt; b &amp; c &gt; d"
+    assert size == len("a < b & c > d")
+
+def test_render_text_cut_fits_budget():
+    html, size = render_text("word " * 100, 50)
+    assert html.endswith(ELLIPSIS)
+    assert size <= 50
+    assert visible_len(html) == size
+
+def test_render_text_never_cuts_an_entity():
+    text = "x" * 20 + " https://example.com/very/long/path"
+    html, size = render_text(text, 30)
+    assert 'example' not in html
+    assert html == "x" * 20 + ELLIPSIS
+    assert size == 21
+
+def test_render_text_counts_astral_characters_twice():
+    text = "😀" * 10
+    assert utf16_len(text) == 20
+    html, size = render_text(text, 9)
+    assert size <= 9
+    assert utf16_len(html) == size
+
+def test_render_text_without_budget_is_empty():
+    assert render_text("text", 0) == ('', 0)
+
+def test_format_tweet_fits_caption_limit():
+    message = format_tweet(make_tweet('1', "long text " * 500), CAPTION_LIMIT)
+    assert visible_len(message) <= CAPTION_LIMIT
+    assert 'Tweet original' in message
+
+def test_format_date_matches_strftime():
+    for created_at in (datetime(2024, 5, 1, 12, 30), datetime(2025, 12, 31, 9, 5), datetime(2026, 1, 2, 0, 0)):
+        assert format_date(created_at) == created_at.strftime('%d/%m/%Y %H:%M')
+
+def test_format_tweet_with_stats_fits_exactly():
+    # Statistiques avec emojis hors BMP: la mesure sans encodage doit rester exacte
+    tweet = dict(make_tweet('1', "z" * 2000), likes=12, retweets=3, replies=1)
+    message = format_tweet(tweet, CAPTION_LIMIT)
+    assert "❤️ 12 • 🔄 3 • 💬 1" in message
+    assert visible_len(message) == CAPTION_LIMIT
+
+def test_format_tweet_short_text_same_as_render_text():
+    text = "Salut @bob 🚀 #news https://example.com/a?b=1&c=2 <3"
+    message = format_tweet(make_tweet('1', text), CAPTION_LIMIT)
+    assert render_text(text, CAPTION_LIMIT)[0] in message
+    assert ELLIPSIS not in message
+
+def test_format_thread_groups_short_tweets_in_one_message():
+    tweets = [make_tweet(str(i), f"part {i}") for i in range(1, 4)]
+    messages = format_thread(tweets, TEXT_LIMIT)
+    assert len(messages) == 1
+    text, tweet_ids = messages[0]
+    assert tweet_ids == ['1', '2', '3']
+    assert text.startswith("🧵 <b>Thread</b>")
+    assert "1. part 1" in text and "3. part 3" in text
+    assert 'Thread original' in text
+
+def test_format_thread_splits_and_respects_limit():
+    tweets = [make_tweet(str(i), "x" * 3000) for i in range(1, 4)]
+    messages = format_thread(tweets, TEXT_LIMIT)
+    assert [tweet_ids for _, tweet_ids in messages] == [['1'], ['2'], ['3']]
+    for text, _ in messages:
+        assert visible_len(text) <= TEXT_LIMIT
+    # En-tête dans le premier message, lien dans le dernier
+    assert 'Thread</b>' in messages[0][0] and 'Thread</b>' not in messages[1][0]
+    assert 'Thread original' in messages[-1][0] and 'Thread original' not in messages[0][0]
+
+def test_format_thread_shortens_oversized_tweet():
+    messages = format_thread([make_tweet('1', "y" * 10000)], TEXT_LIMIT)
+    assert len(messages) == 1
+    text, tweet_ids = messages[0]
+    assert tweet_ids == ['1']
+    assert ELLIPSIS in text
+    assert visible_len(text) <= TEXT_LIMIT
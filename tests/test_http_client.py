@@ -0,0 +1,31 @@
+"""Session HTTP partagée: réutilisée dans une boucle, fermée quand la boucle change"""
+import asyncio
+
+from utils.http_client import HTTPClientManager
+
+def test_session_is_shared_within_a_loop():
+    manager = HTTPClientManager()
+
+    async def run():
+        first = await manager.get_session()
+        second = await manager.get_session()
+        await manager.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is second
+
+def test_session_of_a_finished_loop_is_closed():
+    manager = HTTPClientManager()
+
+    async def get():
+        return await manager.get_session()
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())
+    assert second is not first
+    # Plus de connecteur ouvert: pas d'avertissement « Unclosed client session »
+    assert first.closed
+    assert not second.closed
+    asyncio.run(manager.close())
+    assert second.closed
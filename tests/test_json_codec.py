@@ -0,0 +1,72 @@
+"""Codec JSON: sérialisation, choix du décodeur, décodage partiel des timelines"""
+import json
+from datetime import datetime
+
+import pytest
+
+from utils import json_codec
+from utils.json_codec import decode_timeline, dumps, loads, materialize
+
+def timeline(*results) -> dict:
+    entries = [
+        {'entryId': f'tweet-{i}', 'sortIndex': str(i), 'content': {
+            'entryType': 'TimelineTimelineItem', '__typename': 'TimelineTimelineItem',
+            'itemContent': {'itemType': 'TimelineTweet', 'tweet_results': {'result': result}}
+        }}
+        for i, result in enumerate(results)
+    ]
+    entries.append({'entryId': 'cursor-bottom', 'content': {'entryType': 'TimelineTimelineCursor', 'value': 'abc'}})
+    return {'result': {'timeline': {'instructions': [
+        {'type': 'TimelineClearCache'},
+        {'type': 'TimelineAddEntries', 'entries': entries},
+    ]}}, 'cursor': {'bottom': 'abc'}}
+
+TWEET = {'rest_id': '101', 'legacy': {'full_text': 'Bonjour 🚀', 'favorite_count': 3}}
+
+class WithToDict:
+    def to_dict(self):
+        return {'id': '1'}
+
+def test_dumps_handles_datetime_and_to_dict():
+    encoded = dumps({'at': datetime(2026, 1, 2, 3, 4, 5), 'tweet': WithToDict(), 'text': 'été'})
+    assert json.loads(encoded) == {'at': '2026-01-02T03:04:05', 'tweet': {'id': '1'}, 'text': 'été'}
+    assert loads(encoded.encode()) == loads(encoded)
+
+def test_dumps_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+def test_unavailable_backend_falls_back_to_auto(monkeypatch):
+    monkeypatch.setattr(json_codec, 'orjson', None)
+    monkeypatch.setattr(json_codec, 'msgspec', None)
+    assert json_codec._select_backend('orjson') == 'json'
+    assert json_codec._select_backend('json') == 'json'
+
+@pytest.mark.skipif(json_codec.msgspec is None, reason="msgspec non installé")
+def test_partial_decode_keeps_only_parsed_keys_and_defers_tweets():
+    body = json.dumps(timeline(TWEET, {'rest_id': '102'})).encode()
+    decoded = decode_timeline(body)
+
+    instructions = decoded['result']['timeline']['instructions']
+    assert [instruction['type'] for instruction in instructions] == ['TimelineClearCache', 'TimelineAddEntries']
+    entries = instructions[1]['entries']
+    assert [entry['content']['entryType'] for entry in entries] == [
+        'TimelineTimelineItem', 'TimelineTimelineItem', 'TimelineTimelineCursor'
+    ]
+    raw = entries[0]['content']['itemContent']['tweet_results']['result']
+    # Tweet gardé brut jusqu'à materialize()
+    assert isinstance(raw, json_codec.msgspec.Raw)
+    assert materialize(raw) == TWEET
+    assert entries[2]['content']['itemContent']['tweet_results']['result'] is None
+
+@pytest.mark.skipif(json_codec.msgspec is None, reason="msgspec non installé")
+def test_unexpected_structure_is_fully_decoded():
+    body = json.dumps({'result': {'timeline': {'instructions': 'inattendu'}}}).encode()
+    assert decode_timeline(body) == {'result': {'timeline': {'instructions': 'inattendu'}}}
+
+def test_partial_decode_disabled_returns_full_response(monkeypatch):
+    monkeypatch.setattr(json_codec.settings, 'json_partial_decode', False)
+    response = timeline(TWEET)
+    assert decode_timeline(json.dumps(response).encode()) == response
+    # Valeur déjà décodée: inchangée
+    assert materialize(TWEET) is TWEET
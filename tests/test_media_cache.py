@@ -0,0 +1,125 @@
+"""Cache des médias: téléchargement unique, adressage par contenu, file_id persistés"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from publisher import media_cache as cache_module
+from publisher.media_cache import MediaCache
+
+class FakeContent:
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def iter_chunked(self, size: int):
+        for start in range(0, len(self.body), size):
+            await asyncio.sleep(0)
+            yield self.body[start:start + size]
+
+class FakeResponse:
+    def __init__(self, status: int, body: bytes, announce_length: bool):
+        self.status = status
+        self.content = FakeContent(body)
+        self.content_length = len(body) if announce_length else None
+
+class FakeSession:
+    """CDN de médias: URL → (status, contenu)"""
+
+    def __init__(self, files: dict, announce_length: bool = True):
+        self.files = files
+        self.announce_length = announce_length
+        self.requests = []
+
+    @asynccontextmanager
+    async def get(self, url, **kwargs):
+        self.requests.append(url)
+        status, body = self.files.get(url, (404, b''))
+        yield FakeResponse(status, body, self.announce_length)
+
+def install(monkeypatch, session: FakeSession):
+    async def get_session():
+        return session
+    monkeypatch.setattr(cache_module.http_client, 'get_session', get_session)
+
+def photo(name: str) -> dict:
+    return {'type': 'photo', 'url': f'https://pbs.example/{name}.jpg'}
+
+def make_cache(tmp_path, **kwargs) -> MediaCache:
+    options = dict(max_bytes=10 ** 6, max_file_bytes=10 ** 5)
+    options.update(kwargs)
+    return MediaCache(tmp_path, **options)
+
+def test_parallel_requests_download_once(monkeypatch, tmp_path):
+    session = FakeSession({photo('a')['url']: (200, b'x' * 1000)})
+    install(monkeypatch, session)
+    cache = make_cache(tmp_path)
+
+    async def run():
+        return await asyncio.gather(*(cache.download(photo('a')) for _ in range(5)))
+
+    paths = asyncio.run(run())
+    assert session.requests == [photo('a')['url']]
+    assert len(set(paths)) == 1
+    assert paths[0].read_bytes() == b'x' * 1000
+    # Déjà sur disque: pas de nouvelle requête
+    assert asyncio.run(cache.download(photo('a'))) == paths[0]
+    assert len(session.requests) == 1
+
+def test_same_content_under_two_urls_is_stored_once(monkeypatch, tmp_path):
+    install(monkeypatch, FakeSession({photo('a')['url']: (200, b'same'), photo('b')['url']: (200, b'same')}))
+    cache = make_cache(tmp_path)
+
+    async def run():
+        return await cache.download(photo('a')), await cache.download(photo('b'))
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert cache.size == 4
+    # Un file_id obtenu par une URL sert aussi à l'autre
+    cache.remember(photo('a'), 'file-1')
+    assert cache.file_id(photo('b')) == 'file-1'
+
+def test_unavailable_or_oversized_media_falls_back_to_url(monkeypatch, tmp_path):
+    big = photo('big')
+    install(monkeypatch, FakeSession({big['url']: (200, b'x' * 200)}, announce_length=False))
+    cache = make_cache(tmp_path, max_file_bytes=100)
+
+    async def run():
+        return await cache.input_for(photo('missing')), await cache.input_for(big)
+
+    assert asyncio.run(run()) == (photo('missing')['url'], big['url'])
+    # Fichier partiel supprimé, rien de compté
+    assert list(tmp_path.rglob('*.part')) == []
+    assert cache.size == 0
+
+def test_file_ids_survive_restart_and_can_be_forgotten(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.remember(photo('a'), 'file-a')
+
+    async def run():
+        assert await cache.input_for(photo('a')) == 'file-a'
+        await cache.close()
+
+    asyncio.run(run())
+    assert cache.reused == 1
+
+    restarted = make_cache(tmp_path)
+    assert restarted.file_id(photo('a')) == 'file-a'
+    restarted.forget(photo('a'))
+    assert restarted.file_id(photo('a')) is None
+
+def test_oldest_files_are_evicted_over_max_bytes(monkeypatch, tmp_path):
+    files = {photo(str(i))['url']: (200, bytes([i]) * 400) for i in range(4)}
+    install(monkeypatch, FakeSession(files))
+    cache = make_cache(tmp_path, max_bytes=1000)
+
+    async def run():
+        paths = []
+        for i in range(4):
+            paths.append(await cache.download(photo(str(i))))
+            # Dates de modification distinctes
+            await asyncio.sleep(0.01)
+        return paths
+
+    paths = asyncio.run(run())
+    assert cache.size <= 900
+    assert not paths[0].exists()
+    assert paths[-1].exists()
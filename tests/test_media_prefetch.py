@@ -0,0 +1,97 @@
+"""Préchargement des médias: fenêtre d'avance, médias déjà uploadés, concurrence"""
+import asyncio
+
+from publisher.media_prefetch import MediaPrefetcher
+
+class FakeCache:
+    """Téléchargements bloqués jusqu'à release, file_id connus par URL"""
+
+    def __init__(self, known=()):
+        self.known = set(known)
+        self.started = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    def file_id(self, media):
+        return 'file-id' if media['url'] in self.known else None
+
+    async def download(self, media):
+        self.started.append(media['url'])
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+        return media['url']
+
+def tweet(index: int, count: int = 1) -> dict:
+    return {'id': str(index), 'media': [{'type': 'photo', 'url': f'{index}-{n}'} for n in range(count)]}
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_prefetch_stays_within_lookahead():
+    async def run():
+        cache = FakeCache()
+        prefetcher = MediaPrefetcher(cache, concurrency=10, lookahead=2)
+        prefetch = prefetcher.start([tweet(i) for i in range(5)])
+        await settle()
+        first = list(cache.started)
+        # Tweet 0 publié: la fenêtre avance d'un tweet
+        prefetch.done(0)
+        await settle()
+        second = list(cache.started)
+        cache.release.set()
+        prefetch.done(4)
+        await settle()
+        await prefetch.close()
+        return first, second, cache.started, prefetcher.prefetched
+
+    first, second, started, prefetched = asyncio.run(run())
+    assert first == ['0-0', '1-0']
+    assert second == ['0-0', '1-0', '2-0']
+    assert started == ['0-0', '1-0', '2-0', '3-0', '4-0']
+    assert prefetched == 5
+
+def test_media_with_known_file_id_is_not_downloaded():
+    async def run():
+        cache = FakeCache(known={'0-0'})
+        cache.release.set()
+        prefetch = MediaPrefetcher(cache, lookahead=3).start([tweet(0, count=2)])
+        await settle()
+        await prefetch.close()
+        return cache.started
+
+    assert asyncio.run(run()) == ['0-1']
+
+def test_concurrency_is_shared_by_all_runs():
+    async def run():
+        cache = FakeCache()
+        prefetcher = MediaPrefetcher(cache, concurrency=2, lookahead=3)
+        runs = [prefetcher.start([tweet(i, count=3)]) for i in range(2)]
+        await settle()
+        peak = cache.peak
+        cache.release.set()
+        await settle()
+        for prefetch in runs:
+            await prefetch.close()
+        return peak, len(cache.started)
+
+    peak, started = asyncio.run(run())
+    assert peak == 2
+    assert started == 6
+
+def test_close_cancels_pending_downloads():
+    async def run():
+        cache = FakeCache()
+        prefetch = MediaPrefetcher(cache, concurrency=1, lookahead=3).start([tweet(0, count=3)])
+        await settle()
+        await prefetch.close()
+        return cache.started, cache.running
+
+    started, running = asyncio.run(run())
+    assert started == ['0-0']
+    assert running == 0
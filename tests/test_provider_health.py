@@ -0,0 +1,98 @@
+"""Disjoncteur des fournisseurs: fermé → ouvert → semi-ouvert → fermé/ouvert"""
+from typing import Tuple
+
+from utils import provider_health as health_module
+from utils.provider_health import CLOSED, HALF_OPEN, OPEN, HealthRegistry
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_registry(monkeypatch, **kwargs) -> Tuple[HealthRegistry, Clock]:
+    clock = Clock()
+    monkeypatch.setattr(health_module.time, 'monotonic', clock)
+    options = dict(failure_threshold=3, failure_rate=0.5, window=20, min_calls=10,
+                   reset_timeout=60, max_reset_timeout=200, probe_timeout=30)
+    options.update(kwargs)
+    return HealthRegistry(**options), clock
+
+def test_unknown_provider_is_closed(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    assert registry.state('api') == CLOSED
+    assert registry.available('api')
+
+def test_consecutive_failures_open_circuit(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    for _ in range(2):
+        registry.record('api', False, 1.0)
+    assert registry.state('api') == CLOSED
+    registry.record('api', False, 1.0)
+    assert registry.state('api') == OPEN
+    assert not registry.available('api')
+
+def test_failure_rate_opens_circuit(monkeypatch):
+    registry, _ = make_registry(monkeypatch, failure_threshold=100)
+    for _ in range(5):
+        registry.record('api', True, 0.1)
+        registry.record('api', False, 0.1)
+    assert registry.state('api') == OPEN
+
+def test_success_resets_consecutive_failures(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    for _ in range(5):
+        registry.record('api', False, 1.0)
+        registry.record('api', True, 1.0)
+    assert registry.state('api') == CLOSED
+
+def test_half_open_allows_a_single_probe(monkeypatch):
+    registry, clock = make_registry(monkeypatch)
+    for _ in range(3):
+        registry.record('api', False, 1.0)
+    clock.now += 60
+    assert registry.state('api') == HALF_OPEN
+    assert registry.available('api')
+    # Requête de test en cours: pas d'autre appel avant probe_timeout
+    assert not registry.available('api')
+    clock.now += 30
+    assert registry.available('api')
+
+def test_successful_probe_closes_circuit(monkeypatch):
+    registry, clock = make_registry(monkeypatch)
+    for _ in range(3):
+        registry.record('api', False, 1.0)
+    clock.now += 60
+    assert registry.available('api')
+    registry.record('api', True, 0.2)
+    assert registry.state('api') == CLOSED
+    # Historique repris de zéro: les anciens échecs ne comptent plus
+    assert registry.get('api').success_rate == 1.0
+
+def test_failed_probe_reopens_with_doubled_timeout(monkeypatch):
+    registry, clock = make_registry(monkeypatch)
+    for _ in range(3):
+        registry.record('api', False, 1.0)
+    for expected in (120, 200):
+        clock.now += registry.get('api').reset_timeout
+        assert registry.available('api')
+        registry.record('api', False, 1.0)
+        assert registry.state('api') == OPEN
+        assert registry.get('api').reset_timeout == expected
+
+def test_late_failure_while_open_is_ignored(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    for _ in range(3):
+        registry.record('api', False, 1.0)
+    retry_at = registry.get('api').retry_at
+    registry.record('api', False, 1.0)
+    assert registry.get('api').retry_at == retry_at
+
+def test_latency_percentile_needs_min_samples(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    for latency in (0.1, 0.2, 0.3, 0.4):
+        registry.record('api', True, latency)
+    assert registry.latency_percentile('api', 95, min_samples=5) is None
+    assert registry.latency_percentile('api', 50) == 0.2
+    assert registry.latency_percentile('api', 95) == 0.4
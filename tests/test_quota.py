@@ -0,0 +1,112 @@
+"""Journal des requêtes API et régulateur du quota mensuel"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.quota import QuotaExceeded, QuotaGovernor, QuotaLedger, month_bounds
+
+# Juin 2026: 30 jours, la moitié est écoulée le 16 à minuit
+MID_JUNE = datetime(2026, 6, 16, tzinfo=timezone.utc)
+
+def test_month_bounds_rolls_over_december():
+    start, end = month_bounds(datetime(2026, 12, 20, 8, 30, tzinfo=timezone.utc))
+    assert start == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert end == datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+def test_governor_on_pace_keeps_interval():
+    governor = QuotaGovernor({'api': 1000})
+    governor.update({'api': 400}, MID_JUNE)
+    assert governor.slowdown == 1.0
+    assert governor.adjust(60) == 60
+    assert not governor.paused
+
+def test_governor_ahead_of_pace_slows_down():
+    governor = QuotaGovernor({'api': 1000})
+    # 75 % du budget en 50 % du mois: (0.75 / 0.5) * (0.5 / 0.25) = 3
+    governor.update({'api': 750}, MID_JUNE)
+    assert governor.slowdown == pytest.approx(3.0)
+    assert governor.adjust(60) == pytest.approx(180)
+
+def test_governor_slowdown_is_capped():
+    governor = QuotaGovernor({'api': 1000}, max_slowdown=2.0)
+    governor.update({'api': 990}, MID_JUNE)
+    assert governor.slowdown == 2.0
+
+def test_governor_pauses_when_budget_minus_reserve_is_used():
+    governor = QuotaGovernor({'api': 1000, 'other': 0}, reserve=100)
+    # Les fournisseurs sans quota ne sont pas suivis
+    assert governor.budgets == {'api': 1000}
+    governor.update({'api': 900}, MID_JUNE)
+    assert governor.paused
+    assert governor.exhausted == ['api']
+    assert governor.seconds_until_reset(MID_JUNE) == 15 * 86400
+
+def test_check_raises_once_quota_is_reached():
+    governor = QuotaGovernor({'api': 2})
+    governor.check('api')
+    governor.record('api', 200)
+    # Requête sans réponse (status 0): non comptée, comme dans le journal
+    governor.record('api', 0)
+    governor.check('api')
+    governor.record('api', 429)
+    with pytest.raises(QuotaExceeded):
+        governor.check('api')
+    # Fournisseur sans quota: jamais bloqué
+    governor.record('free', 200)
+    governor.check('free')
+
+def test_update_replaces_counted_usage():
+    governor = QuotaGovernor({'api': 10})
+    for _ in range(10):
+        governor.record('api', 200)
+    governor.update({'api': 3}, MID_JUNE)
+    governor.check('api')
+    assert governor.usage == {'api': 3}
+
+def test_ledger_ignores_requests_without_writer():
+    ledger = QuotaLedger()
+    ledger.record('api', 'https://example.com/tweets', 200, 12)
+    assert ledger._pending == []
+
+def test_ledger_flushes_on_batch_size_and_close():
+    written = []
+
+    async def writer(rows):
+        written.append(rows)
+
+    async def run():
+        ledger = QuotaLedger(flush_interval=3600, batch_size=2)
+        ledger.attach(writer)
+        ledger.record('api', 'https://example.com/user/tweets?count=20', 200, 12)
+        ledger.record('api', 'https://example.com/user/tweets', 429, 30)
+        await asyncio.sleep(0)
+        ledger.record('rss', 'https://nitter.example/alice/rss', 200, 5)
+        await ledger.close()
+
+    asyncio.run(run())
+    assert [len(rows) for rows in written] == [2, 1]
+    provider, endpoint, status, latency_ms, created_at = written[0][0]
+    assert (provider, endpoint, status, latency_ms) == ('api', '/user/tweets', 200, 12)
+    assert created_at.tzinfo is not None
+    assert written[1][0][:3] == ('rss', '/alice/rss', 200)
+
+def test_ledger_requeues_rows_when_write_fails():
+    attempts = []
+
+    async def writer(rows):
+        attempts.append(list(rows))
+        if len(attempts) == 1:
+            raise ConnectionError("base indisponible")
+
+    async def run():
+        ledger = QuotaLedger(flush_interval=3600, batch_size=100)
+        ledger.attach(writer)
+        ledger.record('api', 'https://example.com/a', 200, 1)
+        await ledger.flush()
+        # Rien n'est perdu: la ligne repart au lot suivant, avant les nouvelles
+        ledger.record('api', 'https://example.com/b', 200, 1)
+        await ledger.close()
+
+    asyncio.run(run())
+    assert [[row[1] for row in rows] for rows in attempts] == [['/a'], ['/a', '/b']]
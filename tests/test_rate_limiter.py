@@ -0,0 +1,68 @@
+"""Seau de jetons: demandes plus grandes que la capacité, pénalité 429"""
+import asyncio
+import time
+
+from utils.rate_limiter import RateLimiterRegistry, TokenBucket, parse_retry_after
+
+def timed_acquire(bucket: TokenBucket, tokens: int) -> float:
+    async def run():
+        start = time.monotonic()
+        await bucket.acquire(tokens)
+        return time.monotonic() - start
+    return asyncio.run(run())
+
+def test_acquire_within_burst_does_not_wait():
+    bucket = TokenBucket(rate=1.0, burst=5)
+    assert timed_acquire(bucket, 5) < 0.05
+    assert bucket.tokens < 1
+
+def test_acquire_larger_than_capacity_is_fully_charged():
+    # 10 jetons, 2 d'avance, 100/s: les 8 manquants prennent au moins 80 ms
+    bucket = TokenBucket(rate=100.0, burst=2)
+    elapsed = timed_acquire(bucket, 10)
+    assert elapsed >= 0.075
+    # Le seau est vide après la demande: la suivante attend aussi
+    assert bucket.tokens < 1
+
+def test_acquire_larger_than_capacity_delays_next_request():
+    bucket = TokenBucket(rate=50.0, burst=1)
+
+    async def run():
+        start = time.monotonic()
+        await bucket.acquire(3)
+        await bucket.acquire(1)
+        return time.monotonic() - start
+
+    # 1 jeton d'avance, puis 3 jetons à 50/s
+    assert asyncio.run(run()) >= 0.055
+
+def test_penalize_blocks_bucket():
+    bucket = TokenBucket(rate=1000.0, burst=5)
+    bucket.penalize(0.05)
+    assert timed_acquire(bucket, 1) >= 0.045
+
+def test_parse_retry_after():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert parse_retry_after(None) is None
+
+def test_penalize_unconfigured_provider_is_a_one_off_pause():
+    registry = RateLimiterRegistry({})
+
+    async def run():
+        registry.penalize('unknown', 0.05)
+        start = time.monotonic()
+        await registry.acquire('unknown')
+        paused = time.monotonic() - start
+        # Pause écoulée: de nouveau non limité
+        start = time.monotonic()
+        for _ in range(20):
+            await registry.acquire('unknown')
+        return paused, time.monotonic() - start
+
+    paused, unlimited = asyncio.run(run())
+    assert paused >= 0.045
+    assert unlimited < 0.05
+    assert 'unknown' not in registry.buckets
+    assert 'unknown' not in registry.blocked_until
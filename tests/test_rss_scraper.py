@@ -0,0 +1,120 @@
+"""Requêtes RSS conditionnelles: ETag / Last-Modified, 304, validateurs confirmés"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from scraper import rss_scraper as rss_module
+from scraper.rss_scraper import FeedValidators, HybridScraper
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>@alice</title>
+<item><title>Deuxième tweet</title><link>https://x.com/alice/status/102</link>
+<pubDate>Tue, 30 Sep 2025 11:22:10 GMT</pubDate></item>
+<item><title>Premier tweet</title><link>https://x.com/alice/status/101</link>
+<pubDate>Tue, 30 Sep 2025 08:44:46 GMT</pubDate></item>
+</channel></rss>"""
+
+class FakeResponse:
+    def __init__(self, status: int, headers: dict = None, body: str = ''):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+
+    async def text(self):
+        return self.body
+
+class FakeServer:
+    """Répond comme un service RSS gérant ETag / If-None-Match"""
+
+    def __init__(self, etag: str = '"v1"', failing=()):
+        self.etag = etag
+        self.failing = set(failing)
+        self.requests = []
+
+    @asynccontextmanager
+    async def request(self, provider, method, url, headers=None, **kwargs):
+        self.requests.append((provider, dict(headers or {})))
+        if provider in self.failing:
+            yield FakeResponse(500)
+        elif headers and headers.get('If-None-Match') == self.etag:
+            yield FakeResponse(304)
+        else:
+            yield FakeResponse(200, {'ETag': self.etag, 'Last-Modified': 'Tue, 30 Sep 2025 11:25:03 GMT'}, FEED)
+
+async def no_session():
+    return None
+
+def install(monkeypatch, server: FakeServer):
+    monkeypatch.setattr(rss_module.http_client, 'request', server.request)
+    monkeypatch.setattr(rss_module.http_client, 'get_session', no_session)
+
+def test_feed_validators_lru_evicts_oldest():
+    validators = FeedValidators(max_size=2)
+    validators.set('a', {'etag': '1'})
+    validators.set('b', {'etag': '2'})
+    validators.get('a')
+    validators.set('c', {'etag': '3'})
+    assert len(validators) == 2
+    assert validators.get('b') == {}
+    assert validators.get('a') == {'etag': '1'}
+
+def test_validators_are_sent_only_after_confirm_feed(monkeypatch):
+    server = FakeServer()
+    install(monkeypatch, server)
+    scraper = HybridScraper()
+
+    async def run():
+        first = await scraper.fetch_tweets('alice')
+        # Tweets pas encore enregistrés: la lecture suivante est complète
+        second = await scraper.fetch_tweets('alice')
+        scraper.confirm_feed('alice')
+        third = await scraper.fetch_tweets('alice')
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert [tweet['id'] for tweet in first] == ['102', '101']
+    assert [tweet['id'] for tweet in second] == ['102', '101']
+    assert 'If-None-Match' not in server.requests[0][1]
+    assert 'If-None-Match' not in server.requests[1][1]
+
+    # Flux inchangé: 304, aucun tweet et aucun autre service interrogé
+    assert third == []
+    assert server.requests[2][1]['If-None-Match'] == '"v1"'
+    assert server.requests[2][1]['If-Modified-Since'] == 'Tue, 30 Sep 2025 11:25:03 GMT'
+    assert len(server.requests) == 3
+    assert scraper.last_method == "RSS"
+
+def test_discarded_feed_is_read_again_in_full(monkeypatch):
+    server = FakeServer()
+    install(monkeypatch, server)
+    scraper = HybridScraper()
+
+    async def run():
+        await scraper.fetch_tweets('alice')
+        # Publication échouée: les validateurs reçus sont oubliés
+        scraper.discard_feed('alice')
+        scraper.confirm_feed('alice')
+        return await scraper.fetch_tweets('alice')
+
+    tweets = asyncio.run(run())
+    assert [tweet['id'] for tweet in tweets] == ['102', '101']
+    assert all('If-None-Match' not in headers for _, headers in server.requests)
+
+def test_failing_service_falls_back_to_next(monkeypatch):
+    server = FakeServer(failing={'rss:RSSHub'})
+    install(monkeypatch, server)
+    scraper = HybridScraper()
+
+    async def run():
+        tweets = await scraper.fetch_tweets('alice')
+        scraper.confirm_feed('alice')
+        await scraper.fetch_tweets('alice')
+        return tweets
+
+    tweets = asyncio.run(run())
+    assert [tweet['id'] for tweet in tweets] == ['102', '101']
+    assert [provider for provider, _ in server.requests] == [
+        'rss:RSSHub', 'rss:Nitter RSS', 'rss:RSSHub', 'rss:Nitter RSS'
+    ]
+    # Les validateurs sont propres à l'URL du service qui a répondu
+    assert 'If-None-Match' not in server.requests[2][1]
+    assert server.requests[3][1]['If-None-Match'] == '"v1"'
@@ -0,0 +1,83 @@
+"""Ordonnanceur adaptatif: intervalle par compte, échéances, replanification"""
+import pytest
+
+from utils.scheduler import AdaptiveScheduler
+
+DAY = 86400.0
+
+def make_scheduler(**kwargs) -> AdaptiveScheduler:
+    options = dict(base_interval=300, min_interval=60, max_interval=3600)
+    options.update(kwargs)
+    return AdaptiveScheduler(**options)
+
+def account(account_id: int) -> dict:
+    return {'id': account_id, 'username': f'user{account_id}'}
+
+def test_interval_from_history_targets_tweets_per_poll():
+    scheduler = make_scheduler()
+    # 48 tweets par jour: un tweet toutes les 30 minutes
+    assert scheduler.interval_from_history({'tweet_count': 48}, DAY) == 1800
+    # Sans historique: intervalle de base; rythmes extrêmes: bornés
+    assert scheduler.interval_from_history(None, DAY) == 300
+    assert scheduler.interval_from_history({'tweet_count': 10000}, DAY) == 60
+    assert scheduler.interval_from_history({'tweet_count': 1}, DAY) == 3600
+
+def test_new_accounts_are_due_immediately():
+    scheduler = make_scheduler()
+    scheduler.sync([account(1), account(2)], {}, DAY, now=100)
+    assert len(scheduler) == 2
+    assert scheduler.seconds_until_next(now=100) == 0
+    assert [a['id'] for a in scheduler.pop_due(now=100)] == [1, 2]
+    assert scheduler.pop_due(now=100) == []
+    assert scheduler.seconds_until_next(now=100) is None
+
+def test_reschedule_shortens_on_new_tweets_and_backs_off_otherwise():
+    scheduler = make_scheduler(backoff=2.0)
+    scheduler.sync([account(1), account(2)], {}, DAY, now=0)
+    scheduler.pop_due(now=0)
+
+    scheduler.reschedule(1, new_tweets=2, now=0)
+    scheduler.reschedule(2, new_tweets=0, now=0)
+    assert scheduler.interval(1) == 100
+    assert scheduler.interval(2) == 600
+
+    assert scheduler.seconds_until_next(now=0) == 100
+    assert [a['id'] for a in scheduler.pop_due(now=100)] == [1]
+    assert scheduler.pop_due(now=599) == []
+    assert [a['id'] for a in scheduler.pop_due(now=600)] == [2]
+
+def test_reschedule_applies_global_slowdown():
+    scheduler = make_scheduler(backoff=1.0)
+    scheduler.sync([account(1)], {}, DAY, now=0)
+    scheduler.pop_due(now=0)
+    scheduler.slowdown = 3.0
+    scheduler.reschedule(1, new_tweets=0, now=0)
+    # L'intervalle propre au compte n'est pas modifié, seule l'échéance recule
+    assert scheduler.interval(1) == 300
+    assert scheduler.seconds_until_next(now=0) == 900
+
+def test_changed_history_is_blended_into_adjusted_interval():
+    scheduler = make_scheduler(history_weight=0.5)
+    scheduler.sync([account(1)], {1: {'tweet_count': 48, 'last_published_at': 'a'}}, DAY, now=0)
+    assert scheduler.interval(1) == 1800
+    scheduler.pop_due(now=0)
+    scheduler.reschedule(1, new_tweets=3, now=0)
+    assert scheduler.interval(1) == 450
+
+    # Historique inchangé: l'intervalle ajusté est conservé
+    scheduler.sync([account(1)], {1: {'tweet_count': 48, 'last_published_at': 'a'}}, DAY, now=10)
+    assert scheduler.interval(1) == 450
+    # Historique modifié: moyenne géométrique de 450 et de l'estimation (1800)
+    scheduler.sync([account(1)], {1: {'tweet_count': 48, 'last_published_at': 'b'}}, DAY, now=20)
+    assert scheduler.interval(1) == pytest.approx(900)
+
+def test_removed_accounts_are_dropped():
+    scheduler = make_scheduler()
+    scheduler.sync([account(1), account(2)], {}, DAY, now=0)
+    scheduler.sync([account(2)], {}, DAY, now=0)
+    assert len(scheduler) == 1
+    assert scheduler.interval(1) is None
+    assert [a['id'] for a in scheduler.pop_due(now=0)] == [2]
+    # Un compte retiré n'est pas replanifié
+    scheduler.reschedule(1, new_tweets=1, now=0)
+    assert len(scheduler) == 0
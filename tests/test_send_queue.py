@@ -0,0 +1,128 @@
+"""File d'envoi Telegram: ordre par chat, RetryAfter limité au chat concerné"""
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from telegram.error import RetryAfter
+
+from publisher.send_queue import SendQueue, retry_after_seconds
+
+def make_queue(**kwargs) -> SendQueue:
+    options = dict(global_rate=1000, chat_rate=60000, chat_burst=100)
+    options.update(kwargs)
+    return SendQueue(**options)
+
+def test_retry_after_seconds_accepts_int_and_timedelta():
+    assert retry_after_seconds(RetryAfter(3)) == 3.0
+    assert retry_after_seconds(RetryAfter(timedelta(seconds=2))) == 2.0
+
+def test_messages_of_a_chat_keep_their_order():
+    sent = []
+
+    async def run():
+        queue = make_queue()
+
+        def send(value):
+            async def call():
+                await asyncio.sleep(0.001 * (5 - value))
+                sent.append(value)
+                return value
+            return call
+
+        results = await asyncio.gather(*(queue.submit('@a', send(value)) for value in range(5)))
+        await queue.close()
+        return results
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+    assert sent == [0, 1, 2, 3, 4]
+
+def test_retry_after_pauses_only_its_chat():
+    events = []
+
+    async def run():
+        queue = make_queue()
+        attempts = 0
+
+        async def limited():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RetryAfter(0.2)
+            events.append(('@slow', time.monotonic()))
+            return 'slow'
+
+        async def other():
+            events.append(('@fast', time.monotonic()))
+            return 'fast'
+
+        start = time.monotonic()
+        slow = asyncio.create_task(queue.submit('@slow', limited))
+        await asyncio.sleep(0.01)
+        fast = await queue.submit('@fast', other)
+        results = (await slow, fast)
+        await queue.close()
+        return start, results
+
+    start, results = asyncio.run(run())
+    assert results == ('slow', 'fast')
+    times = dict(events)
+    # @fast part pendant la pause de @slow, qui est retenté après le délai
+    assert times['@fast'] - start < 0.1
+    assert times['@slow'] - start >= 0.19
+
+def test_persistent_retry_after_gives_up():
+    calls = 0
+
+    async def run():
+        queue = make_queue(max_retries=2)
+
+        async def always_limited():
+            nonlocal calls
+            calls += 1
+            raise RetryAfter(0.01)
+
+        try:
+            await queue.submit('@a', always_limited)
+        finally:
+            await queue.close()
+
+    with pytest.raises(RetryAfter):
+        asyncio.run(run())
+    assert calls == 3
+
+def test_other_errors_are_not_retried():
+    calls = 0
+
+    async def run():
+        queue = make_queue()
+
+        async def broken():
+            nonlocal calls
+            calls += 1
+            raise ValueError("message refusé")
+
+        try:
+            await queue.submit('@a', broken)
+        finally:
+            await queue.close()
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert calls == 1
+
+def test_album_counts_every_message_against_chat_rate():
+    async def run():
+        # 600 messages/minute = 10/s, rafale de 2: un album de 3 attend le 3e jeton
+        queue = make_queue(chat_rate=600, chat_burst=2)
+
+        async def send():
+            return True
+
+        start = time.monotonic()
+        await queue.submit('@a', send, messages=3)
+        elapsed = time.monotonic() - start
+        await queue.close()
+        return elapsed
+
+    assert asyncio.run(run()) >= 0.09
@@ -0,0 +1,30 @@
+"""Répartition des comptes entre workers (hachage de rendez-vous)"""
+from utils.sharding import account_owner, shard_accounts
+
+ACCOUNTS = [{'id': account_id} for account_id in range(1, 401)]
+
+def test_single_worker_keeps_every_account():
+    assert shard_accounts(ACCOUNTS, 0, 1) is ACCOUNTS
+    assert account_owner('42', 1) == 0
+
+def test_shards_are_disjoint_and_complete():
+    shards = [shard_accounts(ACCOUNTS, worker_id, 4) for worker_id in range(4)]
+    ids = [account['id'] for shard in shards for account in shard]
+    assert sorted(ids) == [account['id'] for account in ACCOUNTS]
+    # Répartition à peu près équilibrée (100 comptes attendus par worker)
+    assert all(60 <= len(shard) <= 140 for shard in shards)
+
+def test_owner_is_stable():
+    assert [account_owner(str(i), 4) for i in range(50)] == [account_owner(str(i), 4) for i in range(50)]
+
+def test_adding_a_worker_moves_only_accounts_to_the_new_worker():
+    moved = 0
+    for account in ACCOUNTS:
+        key = str(account['id'])
+        before, after = account_owner(key, 4), account_owner(key, 5)
+        if before != after:
+            # Un compte ne change de worker que pour rejoindre le nouveau
+            assert after == 4
+            moved += 1
+    # Environ 1/5 des comptes
+    assert 40 <= moved <= 120
@@ -0,0 +1,189 @@
+"""Publication: threads et médias, enregistrement des envois par tweet"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from config import settings
+from publisher.media_cache import MediaCache
+from publisher.send_queue import SendQueue
+from publisher.telegram_publisher import TelegramPublisher
+
+class FakeBot:
+    """Bot Telegram simulé: enregistre les appels, échoue sur les envois demandés"""
+
+    def __init__(self, fail_on=()):
+        self.calls = []
+        self.fail_on = set(fail_on)
+        self.next_id = 100
+
+    def _message(self, **fields):
+        self.next_id += 1
+        message = dict(photo=None, video=None, animation=None)
+        message.update(fields)
+        return SimpleNamespace(message_id=self.next_id, **message)
+
+    def __getattr__(self, method):
+        async def call(**kwargs):
+            self.calls.append((method, kwargs))
+            if len(self.calls) in self.fail_on:
+                raise RuntimeError("boom")
+            if method == 'send_media_group':
+                return [self._message() for _ in kwargs['media']]
+            if method == 'send_photo':
+                return self._message(photo=[SimpleNamespace(file_id=f"file-{self.next_id}")])
+            return self._message()
+        return call
+
+def make_publisher(bot: FakeBot) -> TelegramPublisher:
+    publisher = TelegramPublisher('123456:test')
+    publisher.bot = bot
+    publisher.queue = SendQueue(global_rate=1000, chat_rate=60000, chat_burst=100)
+    return publisher
+
+def make_tweet(tweet_id: str, text: str = "texte", media=None, reply_to=None) -> dict:
+    return {
+        'id': tweet_id,
+        'text': text,
+        'author': 'alice',
+        'author_name': 'Alice',
+        'url': f'https://twitter.com/alice/status/{tweet_id}',
+        'created_at': datetime(2024, 5, 1, 12, 30),
+        'media': media or [],
+        'reply_to': reply_to,
+    }
+
+def photo(name: str) -> dict:
+    return {'type': 'photo', 'url': f'https://pbs.twimg.com/media/{name}.jpg'}
+
+@pytest.fixture(autouse=True)
+def threads_and_media(monkeypatch):
+    monkeypatch.setattr(settings, 'enable_threads', True)
+    monkeypatch.setattr(settings, 'enable_media', True)
+
+def publish(publisher: TelegramPublisher, posts, channels=('@chan',)):
+    async def run():
+        try:
+            return await publisher.publish_to_channels(posts, list(channels))
+        finally:
+            await publisher.close()
+    return asyncio.run(run())
+
+def test_thread_media_follow_their_text_message():
+    bot = FakeBot()
+    thread = [
+        make_tweet('1', media=[photo('a')]),
+        make_tweet('2', reply_to='1'),
+        make_tweet('3', reply_to='2', media=[photo('b'), photo('c')]),
+    ]
+    deliveries = publish(make_publisher(bot), [thread])
+
+    methods = [method for method, _ in bot.calls]
+    assert methods == ['send_message', 'send_photo', 'send_media_group']
+    text_id = deliveries['1']['@chan']
+    # Médias envoyés en réponse au message qui contient le texte du thread
+    assert bot.calls[1][1]['reply_to_message_id'] == text_id
+    assert bot.calls[2][1]['reply_to_message_id'] == text_id
+    assert bot.calls[1][1]['caption'] == "🧵 1/3"
+    assert {tweet_id: channels['@chan'] for tweet_id, channels in deliveries.items()} == {
+        '1': text_id, '2': text_id, '3': text_id
+    }
+
+def test_thread_media_failure_keeps_tweet_delivered():
+    # 2e appel (photo) et son repli texte échouent: le texte du thread est déjà publié
+    bot = FakeBot(fail_on={2, 3})
+    thread = [make_tweet('1', media=[photo('a')]), make_tweet('2', reply_to='1')]
+    deliveries = publish(make_publisher(bot), [thread])
+    assert set(deliveries) == {'1', '2'}
+
+def test_partial_thread_records_only_sent_messages():
+    bot = FakeBot(fail_on={2})
+    thread = [make_tweet(str(i), text="x" * 3000, reply_to=str(i - 1) if i > 1 else None) for i in range(1, 4)]
+    deliveries = publish(make_publisher(bot), [thread])
+    assert set(deliveries) == {'1'}
+
+def test_single_tweet_with_media_is_sent_with_caption():
+    bot = FakeBot()
+    deliveries = publish(make_publisher(bot), [[make_tweet('1', media=[photo('a')])]], channels=('@a', '@b'))
+    assert sorted(method for method, _ in bot.calls) == ['send_photo', 'send_photo']
+    assert set(deliveries['1']) == {'@a', '@b'}
+
+def test_pending_replies_are_not_grouped_when_threads_are_disabled(monkeypatch):
+    monkeypatch.setattr(settings, 'enable_threads', False)
+    bot = FakeBot()
+    publisher = make_publisher(bot)
+    pending = [(make_tweet('1'), '@chan'), (make_tweet('2', reply_to='1'), '@chan')]
+
+    async def run():
+        try:
+            return await publisher.publish_pending(pending)
+        finally:
+            await publisher.close()
+
+    deliveries = asyncio.run(run())
+    assert [method for method, _ in bot.calls] == ['send_message', 'send_message']
+    assert deliveries['1']['@chan'] != deliveries['2']['@chan']
+
+class GatedBot(FakeBot):
+    """Les envois vers @slow restent bloqués jusqu'à release (attente d'un flood-wait)"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    def __getattr__(self, method):
+        call = super().__getattr__(method)
+
+        async def gated(**kwargs):
+            if kwargs.get('chat_id') == '@slow':
+                await self.release.wait()
+            return await call(**kwargs)
+        return gated
+
+def make_cached_publisher(bot: FakeBot, tmp_path) -> TelegramPublisher:
+    publisher = make_publisher(bot)
+    publisher.media_cache = MediaCache(tmp_path, max_bytes=10 ** 6, max_file_bytes=10 ** 6)
+
+    async def no_download(media):
+        # Pas de réseau: le média part par son URL
+        return None
+
+    publisher.media_cache.download = no_download
+    return publisher
+
+def test_cached_file_id_is_sent_without_waiting_for_other_chats(tmp_path):
+    bot = GatedBot()
+    publisher = make_cached_publisher(bot, tmp_path)
+    media = photo('a')
+    publisher.media_cache.remember(media, 'known-file-id')
+
+    async def run():
+        slow = asyncio.create_task(publisher._send_single_media('@slow', media, "légende"))
+        await asyncio.sleep(0.01)
+        # @slow est bloqué pendant son envoi: @fast ne doit pas l'attendre
+        fast = await asyncio.wait_for(publisher._send_single_media('@fast', media, "légende"), 1)
+        bot.release.set()
+        await slow
+        await publisher.close()
+        return fast
+
+    assert asyncio.run(run())
+    assert all(kwargs['photo'] == 'known-file-id' for _, kwargs in bot.calls)
+
+def test_first_upload_is_shared_then_lock_released(tmp_path):
+    bot = FakeBot()
+    publisher = make_cached_publisher(bot, tmp_path)
+    media = photo('a')
+
+    async def run():
+        await asyncio.gather(*(
+            publisher._send_single_media(channel, media, "légende") for channel in ('@a', '@b', '@c')
+        ))
+        await publisher.close()
+
+    asyncio.run(run())
+    sent = [kwargs['photo'] for _, kwargs in bot.calls]
+    # Un seul envoi par URL, les autres canaux réutilisent le file_id obtenu
+    assert sent[0] == media['url']
+    assert sent[1:] == [publisher.media_cache.file_id(media)] * 2
@@ -0,0 +1,125 @@
+"""Reconstitution des threads: lot, cache et ancêtres récupérés"""
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from models.tweet import Tweet
+from scraper.thread_assembler import ThreadAssembler
+from utils.dedup_cache import PublishedTweetCache
+
+def make_tweet(tweet_id: str, reply_to: Optional[str] = None, author: str = 'alice',
+               reply_to_user: Optional[str] = None) -> Tweet:
+    return Tweet(
+        id=tweet_id,
+        text=f"tweet {tweet_id}",
+        created_at=datetime(2024, 5, 1),
+        author=author,
+        reply_to=reply_to,
+        reply_to_user=reply_to_user or (author if reply_to else None)
+    )
+
+def ids(threads):
+    return [[tweet['id'] for tweet in thread] for thread in threads]
+
+def test_links_self_replies_within_batch():
+    assembler = ThreadAssembler()
+    batch = [make_tweet('1'), make_tweet('2', reply_to='1'), make_tweet('3'), make_tweet('4', reply_to='2')]
+    threads = asyncio.run(assembler.assemble('Alice', batch))
+    assert ids(threads) == [['1', '2', '4'], ['3']]
+
+def test_reply_to_other_author_is_not_a_thread():
+    assembler = ThreadAssembler()
+    threads = asyncio.run(assembler.assemble('alice', [make_tweet('2', reply_to='1', reply_to_user='bob')]))
+    assert ids(threads) == [['2']]
+
+def test_uses_cache_from_previous_cycle():
+    assembler = ThreadAssembler()
+    asyncio.run(assembler.assemble('alice', [make_tweet('10')]))
+    batch = [make_tweet('11', reply_to='10'), make_tweet('12', reply_to='11')]
+    threads = asyncio.run(assembler.assemble('alice', batch))
+    assert ids(threads) == [['11', '12']]
+    threads = asyncio.run(assembler.assemble('alice', [make_tweet('13', reply_to='12')], with_ancestors=True))
+    assert ids(threads) == [['10', '11', '12', '13']]
+
+def test_ancestor_links_batch_tweets_without_being_returned():
+    remote = {'2': make_tweet('2', reply_to='1')}
+
+    async def fetch(tweet_id):
+        return remote.get(tweet_id)
+
+    assembler = ThreadAssembler(fetch)
+    # '2' manque au lot (filtré par le backend): il relie '1' et '3' sans être publié
+    threads = asyncio.run(assembler.assemble('alice', [make_tweet('1'), make_tweet('3', reply_to='2')]))
+    assert ids(threads) == [['1', '3']]
+
+def test_fetches_missing_ancestors_level_by_level():
+    remote = {'1': make_tweet('1'), '2': make_tweet('2', reply_to='1')}
+    calls = []
+
+    async def fetch(tweet_id):
+        calls.append(tweet_id)
+        return remote.get(tweet_id)
+
+    assembler = ThreadAssembler(fetch)
+    threads = asyncio.run(assembler.assemble('alice', [make_tweet('3', reply_to='2')], with_ancestors=True))
+    assert ids(threads) == [['1', '2', '3']]
+    assert calls == ['2', '1']
+    assert assembler.fetched == 2
+
+def test_reply_to_ancestor_missing_from_db_publishes_only_the_reply():
+    # Ancêtres jamais enregistrés (trop anciens, antérieurs au compte, purgés)
+    remote = {'1': make_tweet('1'), '2': make_tweet('2', reply_to='1')}
+
+    async def fetch(tweet_id):
+        return remote.get(tweet_id)
+
+    async def lookup(tweet_ids):
+        return list(tweet_ids)
+
+    async def run():
+        threads = await ThreadAssembler(fetch).assemble('alice', [make_tweet('3', reply_to='2')])
+        # Même sélection que process_account: le Bloom vide les dit « forcément nouveaux »
+        unpublished = set(await PublishedTweetCache(bloom_capacity=100).filter_unpublished(
+            [tweet['id'] for thread in threads for tweet in thread], lookup
+        ))
+        return [[tweet['id'] for tweet in thread if tweet['id'] in unpublished] for thread in threads]
+
+    assert asyncio.run(run()) == [['3']]
+
+def test_unavailable_ancestor_is_not_requested_again():
+    calls = []
+
+    async def fetch(tweet_id):
+        calls.append(tweet_id)
+        return None
+
+    assembler = ThreadAssembler(fetch)
+    asyncio.run(assembler.assemble('alice', [make_tweet('5', reply_to='4')]))
+    threads = asyncio.run(assembler.assemble('alice', [make_tweet('6', reply_to='4')]))
+    assert ids(threads) == [['6']]
+    assert calls == ['4']
+
+def test_fetch_error_is_retried_next_cycle():
+    calls = []
+
+    async def fetch(tweet_id):
+        calls.append(tweet_id)
+        raise RuntimeError("timeout")
+
+    assembler = ThreadAssembler(fetch)
+    asyncio.run(assembler.assemble('alice', [make_tweet('5', reply_to='4')]))
+    asyncio.run(assembler.assemble('alice', [make_tweet('6', reply_to='4')]))
+    assert calls == ['4', '4']
+
+def test_max_depth_bounds_fetches():
+    remote = {str(i): make_tweet(str(i), reply_to=str(i - 1) if i > 1 else None) for i in range(1, 10)}
+    calls = []
+
+    async def fetch(tweet_id):
+        calls.append(tweet_id)
+        return remote.get(tweet_id)
+
+    assembler = ThreadAssembler(fetch, max_depth=3)
+    threads = asyncio.run(assembler.assemble('alice', [make_tweet('10', reply_to='9')], with_ancestors=True))
+    assert len(calls) == 3
+    assert ids(threads) == [['7', '8', '9', '10']]
@@ -0,0 +1,85 @@
+"""Modèle Tweet: slots, accès façon dict, aller-retour tweet_data, constructeurs"""
+import json
+from datetime import datetime
+
+import pytest
+
+from models.tweet import Media, Tweet, parse_twitter_date
+
+def make_tweet(**kwargs) -> Tweet:
+    values = dict(id='101', text='Bonjour @bob 🚀', created_at=datetime(2026, 3, 4, 5, 6, 7), author='alice')
+    values.update(kwargs)
+    return Tweet(**values)
+
+def test_tweet_is_slotted():
+    tweet = make_tweet()
+    assert not hasattr(tweet, '__dict__')
+    with pytest.raises(AttributeError):
+        tweet.extra = 1
+
+def test_defaults_are_normalized():
+    tweet = make_tweet(id=101, text=None, likes=None, reply_to=99,
+                       media=[{'type': 'photo', 'url': 'https://img/1.jpg'}, {'type': 'photo', 'url': ''}])
+    assert tweet.id == '101'
+    assert tweet.text == ''
+    assert tweet.author_name == 'alice'
+    assert tweet.url == 'https://twitter.com/alice/status/101'
+    assert tweet.likes == 0
+    assert tweet.reply_to == '99'
+    # Médias sans URL ignorés, dicts convertis
+    assert tweet.media == [Media('photo', 'https://img/1.jpg')]
+
+@pytest.mark.parametrize('kwargs', [{'id': ''}, {'author': ''}, {'created_at': '2026-03-04'}])
+def test_invalid_tweets_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        make_tweet(**kwargs)
+
+def test_mapping_access_matches_old_dicts():
+    tweet = make_tweet(media=[Media('video', 'https://video/1.mp4')])
+    assert tweet['text'] == 'Bonjour @bob 🚀'
+    assert tweet.get('likes') == 0
+    assert tweet.get('missing', 'défaut') == 'défaut'
+    assert tweet['media'][0]['url'] == 'https://video/1.mp4'
+    with pytest.raises(KeyError):
+        tweet['missing']
+
+def test_json_round_trip():
+    tweet = make_tweet(media=[Media('photo', 'https://img/1.jpg')], likes=5, reply_to='100',
+                       reply_to_user='alice', is_quote=True)
+    data = tweet.to_json()
+    assert json.loads(data)['created_at'] == '2026-03-04T05:06:07'
+    assert json.loads(data)['media'] == [{'type': 'photo', 'url': 'https://img/1.jpg'}]
+    assert Tweet.from_json(data) == tweet
+
+def test_from_json_ignores_unknown_keys():
+    # Lignes tweet_data écrites par une version antérieure du modèle
+    data = json.dumps({'id': '7', 'text': 'x', 'created_at': '2026-01-01T00:00:00', 'author': 'alice',
+                       'author_id': '42', 'lang': 'fr'})
+    tweet = Tweet.from_json(data)
+    assert tweet.id == '7'
+    assert tweet.created_at == datetime(2026, 1, 1)
+
+def test_from_twitter241_picks_best_video_variant():
+    tweet = Tweet.from_twitter241({
+        'rest_id': '555',
+        'core': {'user_results': {'result': {'legacy': {'screen_name': 'Alice', 'name': 'Alice A.'}}}},
+        'legacy': {
+            'full_text': 'Vidéo', 'created_at': 'Wed Oct 10 20:19:24 +0000 2018', 'favorite_count': 3,
+            'in_reply_to_status_id_str': '554', 'in_reply_to_screen_name': 'Alice',
+            'extended_entities': {'media': [{'type': 'video', 'video_info': {'variants': [
+                {'content_type': 'application/x-mpegURL', 'url': 'https://video/playlist.m3u8'},
+                {'content_type': 'video/mp4', 'bitrate': 256000, 'url': 'https://video/low.mp4'},
+                {'content_type': 'video/mp4', 'bitrate': 2176000, 'url': 'https://video/high.mp4'},
+            ]}}]}
+        }
+    }, 'alice')
+    assert (tweet.id, tweet.author, tweet.author_name, tweet.likes) == ('555', 'Alice', 'Alice A.', 3)
+    assert tweet.created_at == datetime(2018, 10, 10, 20, 19, 24)
+    assert (tweet.reply_to, tweet.reply_to_user) == ('554', 'Alice')
+    assert tweet.media == [Media('video', 'https://video/high.mp4')]
+
+def test_parse_twitter_date_accepts_iso():
+    assert parse_twitter_date('2026-03-04T05:06:07Z').year == 2026
+    # Illisible ou absente: maintenant
+    assert isinstance(parse_twitter_date('demain'), datetime)
+    assert isinstance(parse_twitter_date(None), datetime)
@@ -67,7 +67,7 @@ async function loadStats() {
             // Update stats cards with animation
             animateNumber(document.getElementById('total-tweets'), stats.total_tweets);
             animateNumber(document.getElementById('active-accounts'), `${stats.active_accounts}/${stats.total_accounts}`);
-            animateNumber(document.getElementById('api-usage'), `${stats.api_usage.estimated_usage}/100`);
+            animateNumber(document.getElementById('api-usage'), `${stats.api_usage.used}/${stats.api_usage.monthly_limit}`);
             
             // Update poll interval with animation
             const hours = Math.round(stats.poll_interval / 3600);
@@ -130,7 +130,7 @@ function createAccountElement(account) {
             </div>
             <div>
                 <p class="text-sm font-medium text-gray-900 dark:text-white">@${account.username}</p>
-                <p class="text-sm text-gray-500 dark:text-gray-400">→ ${account.telegram_channel_id}</p>
+                <p class="text-sm text-gray-500 dark:text-gray-400">→ ${account.channels.join(', ')}</p>
             </div>
         </div>
         <div class="flex items-center space-x-2">
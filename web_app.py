@@ -114,6 +114,27 @@ async def toggle_account(username):
         logger.error(f"Erreur toggle_account: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/accounts/<username>/channels/<path:channel_id>', methods=['DELETE'])
+@async_route
+async def remove_subscription(username, channel_id):
+    """Désabonner un canal d'un compte"""
+    try:
+        await db.connect()
+        removed = await db.remove_subscription(username, channel_id)
+        await db.disconnect()
+        
+        if removed:
+            return jsonify({
+                'success': True,
+                'message': f'{channel_id} désabonné de @{username}'
+            })
+        else:
+            return jsonify({'success': False, 'error': 'Abonnement non trouvé'}), 404
+            
+    except Exception as e:
+        logger.error(f"Erreur remove_subscription: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/stats', methods=['GET'])
 @async_route
 async def get_stats():
@@ -139,11 +160,18 @@ async def get_stats():
         async with db.pool.acquire() as conn:
             recent_tweets = await conn.fetch(query)
         
+        # Utilisation réelle du mois (journal api_requests)
+        api_usage = await db.get_monthly_api_usage()
+        
         await db.disconnect()
         
-        # Calcul utilisation API
+        # Estimation (1 requête par vérification, + 1 requête unique
+        # pour résoudre l'ID des comptes dont twitter_id n'est pas encore connu)
         checks_per_day = 24 * 3600 / settings.poll_interval
-        requests_per_month = active_accounts * 2 * checks_per_day * 30
+        unresolved_ids = len([a for a in accounts if a['is_active'] and not a['twitter_id']])
+        requests_per_month = active_accounts * checks_per_day * 30 + unresolved_ids
+        monthly_limit = int(settings.provider_rate_limits.get('twitter241', {}).get('monthly_quota', 100))
+        used = api_usage.get('twitter241', 0)
         
         return jsonify({
             'success': True,
@@ -152,9 +180,11 @@ async def get_stats():
                 'total_accounts': len(accounts),
                 'active_accounts': active_accounts,
                 'api_usage': {
-                    'monthly_limit': 100,
+                    'monthly_limit': monthly_limit,
+                    'used': used,
                     'estimated_usage': int(requests_per_month),
-                    'percentage': int(requests_per_month / 100 * 100)
+                    'percentage': int(used / monthly_limit * 100) if monthly_limit else 0,
+                    'by_api': api_usage
                 },
                 'poll_interval': settings.poll_interval,
                 'recent_tweets': [dict(t) for t in recent_tweets]